@@ -0,0 +1,31 @@
+__author__ = 'Felix Simkovic'
+
+import collections
+import json
+import pytest
+
+RESULTS = collections.OrderedDict()
+
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmark-json', default=None, help='JSON file to write the benchmark results to')
+    parser.addoption('--benchmark-full', action='store_true', default=False, help='run the full problem sizes')
+
+
+@pytest.fixture(scope='session')
+def benchmark_results():
+    return RESULTS
+
+
+@pytest.fixture(scope='session')
+def benchmark_quick(request):
+    return not request.config.getoption('--benchmark-full')
+
+
+def pytest_sessionfinish(session):
+    output = session.config.getoption('--benchmark-json')
+    if output and RESULTS:
+        import suite
+
+        with open(output, 'w') as f_out:
+            json.dump(suite.report(RESULTS, quick=not session.config.getoption('--benchmark-full')), f_out, indent=2)
@@ -0,0 +1,64 @@
+"""Benchmark the start-up cost of importing pyjob
+
+Each sample imports pyjob in a fresh interpreter with an empty home directory and
+reports the wall time relative to a bare interpreter, the time reported by
+``python -X importtime`` and any heavy modules that were pulled in by the import.
+
+Usage: python benchmarks/import_time.py [-r REPEATS]
+"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY_MODULES = ['asyncio', 'chardet', 'multiprocessing', 'yaml']
+
+
+def run(code, home, *flags):
+    """Run ``code`` in a fresh interpreter and return the wall time and the output"""
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    start = time.time()
+    p = subprocess.run([sys.executable] + list(flags) + ['-c', code], cwd=ROOT, env=env, stdout=subprocess.PIPE,
+                       stderr=subprocess.PIPE, check=True)
+    return time.time() - start, p
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-r', '--repeats', type=int, default=20, help='number of interpreter launches')
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp()
+    baseline = [run('pass', home)[0] for _ in range(args.repeats)]
+    timings = [run('import pyjob', home)[0] for _ in range(args.repeats)]
+    _, p = run('import pyjob', home, '-X', 'importtime')
+    cumulative = [line for line in p.stderr.decode().splitlines() if line.rstrip().endswith('| pyjob')]
+    _, p = run('import json, sys, pyjob; print(json.dumps(sorted(sys.modules)))', home)
+    modules = json.loads(p.stdout.decode())
+    files = os.listdir(home)
+    shutil.rmtree(home)
+
+    print('Interpreter start-up [ms]: {:.1f}'.format(median(baseline) * 1e3))
+    print('import pyjob [ms]:         {:.1f}'.format((median(timings) - median(baseline)) * 1e3))
+    if cumulative:
+        print('-X importtime [ms]:        {:.1f}'.format(int(cumulative[0].split('|')[1]) / 1e3))
+    print('Heavy modules imported:    {}'.format(', '.join(m for m in HEAVY_MODULES if m in modules) or 'none'))
+    print('Files created in home:     {}'.format(', '.join(files) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
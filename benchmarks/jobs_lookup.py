@@ -0,0 +1,104 @@
+"""Benchmark the per-array-element script lookup in the jobs file
+
+Every array element of a :obj:`~pyjob.task.ClusterTask` resolves its script from the
+jobs file. This benchmark times the lookup emitted into the runscript for the legacy
+line-based jobs file (awk scan) and the fixed-width jobs file (dd seek) at sampled
+array indices and extrapolates the total cost for all array elements.
+
+Usage: python benchmarks/jobs_lookup.py [-n ELEMENTS] [-s SAMPLES]
+"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pyjob.slurm import SlurmTask
+
+
+class BenchmarkTask(SlurmTask):
+    """:obj:`~pyjob.slurm.SlurmTask` over fake script paths without scheduler requirements"""
+
+    def __init__(self, paths):
+        self.paths = paths
+        super(BenchmarkTask, self).__init__(None)
+
+    @property
+    def script(self):
+        return self.paths
+
+    def _check_requirements(self):
+        pass
+
+
+def lookup(script_def, index):
+    """Resolve the script of array element ``index`` in a fresh shell"""
+    cmd = script_def + '\necho "$script"'
+    env = dict(os.environ, SLURM_ARRAY_TASK_ID=str(index))
+    return subprocess.check_output(['bash', '-c', cmd], env=env).decode().strip()
+
+
+def benchmark(task, script_def, indices):
+    """Time the lookup for all ``indices`` and validate the resolved scripts"""
+    timings = []
+    for index in indices:
+        start = time.time()
+        script = lookup(script_def, index)
+        timings.append(time.time() - start)
+        if script != task.script[index - 1]:
+            raise RuntimeError('Lookup of element {} returned {}'.format(index, script))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--elements', type=int, default=200000, help='number of array elements')
+    parser.add_argument('-s', '--samples', type=int, default=20, help='number of sampled array elements')
+    args = parser.parse_args()
+
+    paths = ['/scratch/project/pyjob/run_{:08d}/job_{:08d}.sh'.format(i // 1000, i) for i in range(args.elements)]
+    task = BenchmarkTask(paths)
+    step = max(1, args.elements // args.samples)
+    indices = list(range(step, args.elements + 1, step))[: args.samples]
+
+    directory = tempfile.mkdtemp()
+    legacy_jobsf = os.path.join(directory, 'legacy.jobs')
+    fixed_jobsf = os.path.join(directory, 'fixed.jobs')
+    with open(legacy_jobsf, 'w') as f_out:
+        f_out.write('\n'.join(paths))
+    width = task._write_jobs_file(fixed_jobsf)
+
+    # awk evaluates its condition for every line, the dd lookup reads a single record
+    results = []
+    for label, jobsf, w, nbytes in [
+        ('awk scan', legacy_jobsf, None, os.path.getsize(legacy_jobsf)),
+        ('fixed-width seek', fixed_jobsf, width, width),
+    ]:
+        script_def = task.get_array_bash_extension(jobsf, 0, width=w)[0]
+        results.append((label, nbytes, benchmark(task, script_def, indices)))
+
+    os.unlink(legacy_jobsf)
+    os.unlink(fixed_jobsf)
+    os.rmdir(directory)
+
+    print('Array elements: {}, sampled: {}'.format(args.elements, len(indices)))
+    header = ('lookup', 'read/elem [B]', 'total read [MB]', 'mean [ms]', 'total est. [s]')
+    print('{:<18} {:>14} {:>16} {:>10} {:>15}'.format(*header))
+    for label, nbytes, timings in results:
+        mean = sum(timings) / len(timings)
+        print(
+            '{:<18} {:>14d} {:>16.1f} {:>10.2f} {:>15.1f}'.format(
+                label, nbytes, nbytes * args.elements / 1e6, mean * 1e3, mean * args.elements
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""Benchmark suite covering the hot paths of pyjob
+
+Each benchmark returns a flat dictionary of metrics, which are reported as JSON to
+track regressions between releases. Metric names end in their unit: ``_ms`` and
+``_s`` are lower-is-better timings, ``_per_s`` are higher-is-better throughputs.
+All other metrics describe the benchmark and are not compared.
+
+Usage: python benchmarks/suite.py [-b NAME ...] [--quick] [-o FILE] [--compare BASELINE]
+"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import argparse
+import collections
+import datetime
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import import_time
+
+from pyjob import __version__ as pyjob_version
+from pyjob.cexec import cexec
+from pyjob.local import LocalTask
+from pyjob.script import Script, ScriptCollector, ScriptTemplate
+from pyjob.simulator import SchedulerSimulator
+from pyjob.slurm import SlurmTask
+
+LATENCY_SCRIPT = 'import time\ntime.sleep({})\nprint(repr(time.time()))'
+
+
+class RunscriptTask(SlurmTask):
+    """:obj:`~pyjob.slurm.SlurmTask` without scheduler requirements"""
+
+    def _check_requirements(self):
+        pass
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def get_scripts(directory, n, command='true', shebang='#!/bin/sh', suffix='.sh'):
+    """Get ``n`` scripts running ``command`` in ``directory``"""
+    scripts = []
+    for i in range(n):
+        script = Script(shebang=shebang, directory=directory, prefix='bench', stem=str(i), suffix=suffix)
+        script.extend(command.splitlines())
+        scripts.append(script)
+    return scripts
+
+
+def bench_cexec(quick=False):
+    """Overhead of :func:`~pyjob.cexec.cexec` over a bare :func:`subprocess.run` of ``true``"""
+    repeats = 20 if quick else 200
+    timings = {'cexec': [], 'subprocess': []}
+    for _ in range(repeats):
+        start = time.time()
+        cexec(['true'])
+        timings['cexec'].append(time.time() - start)
+        start = time.time()
+        subprocess.run(['true'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        timings['subprocess'].append(time.time() - start)
+    cexec_ms = median(timings['cexec']) * 1e3
+    subprocess_ms = median(timings['subprocess']) * 1e3
+    return {
+        'calls': repeats,
+        'cexec_ms': cexec_ms,
+        'subprocess_ms': subprocess_ms,
+        'cexec_overhead_ms': max(0.0, cexec_ms - subprocess_ms),
+    }
+
+
+def bench_local_task(quick=False):
+    """Throughput of :obj:`~pyjob.local.LocalTask` for trivial scripts at various ``processes``"""
+    n = 50 if quick else 500
+    processes = sorted({1, 2, 4, multiprocessing.cpu_count()})
+    results = {'scripts': n}
+    for nprocesses in processes:
+        if nprocesses > multiprocessing.cpu_count():
+            continue
+        directory = tempfile.mkdtemp()
+        collector = ScriptCollector(get_scripts(directory, n))
+        collector.dump()
+        with LocalTask(collector.paths, processes=nprocesses, directory=directory) as task:
+            start = time.time()
+            task.run()
+            task.wait()
+            elapsed = time.time() - start
+        shutil.rmtree(directory)
+        results['processes_{}_scripts_per_s'.format(nprocesses)] = n / elapsed
+    return results
+
+
+def bench_dump(quick=False):
+    """Throughput of :meth:`~pyjob.script.ScriptCollector.dump` for small scripts"""
+    n = 1000 if quick else 20000
+    directory = tempfile.mkdtemp()
+    collector = ScriptCollector(get_scripts(directory, n, command='echo "Hello World"'))
+    start = time.time()
+    collector.dump()
+    elapsed = time.time() - start
+    shutil.rmtree(directory)
+    return {'scripts': n, 'dump_scripts_per_s': n / elapsed}
+
+
+def bench_create_runscript(quick=False):
+    """Cost of :meth:`~pyjob.slurm.SlurmTask._create_runscript` for large arrays"""
+    n = 10000 if quick else 200000
+    n_bundle = 1000 if quick else 20000
+    results = {'elements': n, 'bundle_elements': n_bundle}
+    for label, size, kwargs in [('jobs_file_ms', n, {}), ('bundle_ms', n_bundle, {'bundle': True})]:
+        directory = tempfile.mkdtemp()
+        template = ScriptTemplate('echo {}', range(size), directory=directory, prefix='bench', suffix='.sh')
+        task = RunscriptTask(ScriptCollector(template), directory=directory, **kwargs)
+        start = time.time()
+        task._create_runscript()
+        results[label] = (time.time() - start) * 1e3
+        shutil.rmtree(directory)
+    return results
+
+
+def bench_wait(quick=False):
+    """Latency between the end of the last script and the return of :meth:`~pyjob.task.Task.wait`
+
+    The cluster latency is measured against the Slurm :obj:`~pyjob.simulator.SchedulerSimulator`
+    and depends on the ``status_interval`` configuration.
+
+    """
+    repeats = 1 if quick else 3
+    command = LATENCY_SCRIPT.format(0.5)
+    results = {'repeats': repeats}
+    directory = tempfile.mkdtemp()
+    with SchedulerSimulator('slurm', os.path.join(directory, 'simulator')):
+        for label, task_class in [('local_latency_ms', LocalTask), ('slurm_latency_ms', SlurmTask)]:
+            latencies = []
+            for i in range(repeats):
+                stem = '{}_{}'.format(label, i)
+                script = Script(shebang='#!' + sys.executable, directory=directory, prefix='bench', stem=stem)
+                script.extend(command.splitlines())
+                with task_class(script, directory=directory) as task:
+                    task.run()
+                    task.wait()
+                    end = time.time()
+                with open(script.log) as f_in:
+                    latencies.append(end - float(f_in.read().strip()))
+            results[label] = median(latencies) * 1e3
+    shutil.rmtree(directory)
+    return results
+
+
+def bench_import(quick=False):
+    """Time of ``import pyjob`` in a fresh interpreter"""
+    repeats = 5 if quick else 20
+    home = tempfile.mkdtemp()
+    baseline = [import_time.run('pass', home)[0] for _ in range(repeats)]
+    timings = [import_time.run('import pyjob', home)[0] for _ in range(repeats)]
+    shutil.rmtree(home)
+    return {'repeats': repeats, 'import_ms': max(0.0, median(timings) - median(baseline)) * 1e3}
+
+
+BENCHMARKS = collections.OrderedDict(
+    [
+        ('cexec', bench_cexec),
+        ('local_task', bench_local_task),
+        ('dump', bench_dump),
+        ('create_runscript', bench_create_runscript),
+        ('wait', bench_wait),
+        ('import', bench_import),
+    ]
+)
+
+
+def report(results, quick=False):
+    """Wrap the benchmark ``results`` with the environment they were measured in"""
+    return {
+        'pyjob': pyjob_version,
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'cpu_count': multiprocessing.cpu_count(),
+        'timestamp': datetime.datetime.now().isoformat(),
+        'quick': quick,
+        'benchmarks': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """Compare all timings and throughputs of two reports
+
+    Returns
+    -------
+    list
+       A tuple of benchmark, metric, baseline value, current value and regression flag per metric
+
+    """
+    rows = []
+    for name, metrics in sorted(current['benchmarks'].items()):
+        for metric, value in sorted(metrics.items()):
+            reference = baseline.get('benchmarks', {}).get(name, {}).get(metric)
+            if not reference:
+                continue
+            if metric.endswith('_per_s'):
+                regression = value < reference * (1 - threshold)
+            elif metric.endswith('_ms') or metric.endswith('_s'):
+                regression = value > reference * (1 + threshold)
+            else:
+                continue
+            rows.append((name, metric, reference, value, regression))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-b', '--benchmark', action='append', choices=list(BENCHMARKS), help='benchmark to run')
+    parser.add_argument('--quick', action='store_true', help='run reduced problem sizes')
+    parser.add_argument('-o', '--output', help='JSON file to write the results to')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change considered a regression')
+    args = parser.parse_args(argv)
+
+    results = collections.OrderedDict()
+    for name in args.benchmark or BENCHMARKS:
+        results[name] = BENCHMARKS[name](quick=args.quick)
+        for metric, value in sorted(results[name].items()):
+            print('{:<18} {:<30} {:>12.2f}'.format(name, metric, value))
+    current = report(results, quick=args.quick)
+    if args.output:
+        with open(args.output, 'w') as f_out:
+            json.dump(current, f_out, indent=2)
+    if args.compare:
+        with open(args.compare) as f_in:
+            rows = compare(current, json.load(f_in), threshold=args.threshold)
+        print('{:<18} {:<30} {:>12} {:>12} {:>8}'.format('benchmark', 'metric', 'baseline', 'current', 'change'))
+        for name, metric, reference, value, regression in rows:
+            change = '{:+.0%}'.format(value / reference - 1)
+            print('{:<18} {:<30} {:>12.2f} {:>12.2f} {:>8}{}'.format(
+                name, metric, reference, value, change, ' REGRESSION' if regression else ''
+            ))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
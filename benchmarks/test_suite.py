@@ -0,0 +1,40 @@
+__author__ = 'Felix Simkovic'
+
+import json
+import os
+import pytest
+import sys
+import tempfile
+
+import suite
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='Unavailable on Windows')
+class TestSuite(object):
+    @pytest.mark.parametrize('name', list(suite.BENCHMARKS))
+    def test_1(self, name, benchmark_results, benchmark_quick):
+        results = suite.BENCHMARKS[name](quick=benchmark_quick)
+        assert results
+        assert all(value >= 0 for value in results.values())
+        benchmark_results[name] = results
+
+    def test_2(self):
+        baseline = suite.report({'dump': {'scripts': 10, 'dump_scripts_per_s': 100.0}, 'import': {'import_ms': 10.0}})
+        current = suite.report({'dump': {'scripts': 20, 'dump_scripts_per_s': 70.0}, 'import': {'import_ms': 11.0}})
+        rows = suite.compare(current, baseline, threshold=0.2)
+        assert rows == [('dump', 'dump_scripts_per_s', 100.0, 70.0, True), ('import', 'import_ms', 10.0, 11.0, False)]
+
+    def test_3(self, capsys):
+        fh = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
+        fh.close()
+        assert suite.main(['-b', 'dump', '--quick', '-o', fh.name]) == 0
+        with open(fh.name) as f_in:
+            report = json.load(f_in)
+        assert list(report['benchmarks']) == ['dump']
+        assert report['quick']
+        report['benchmarks']['dump']['dump_scripts_per_s'] *= 1000
+        with open(fh.name, 'w') as f_out:
+            json.dump(report, f_out)
+        assert suite.main(['-b', 'dump', '--quick', '--compare', fh.name]) == 1
+        assert 'REGRESSION' in capsys.readouterr().out
+        os.unlink(fh.name)
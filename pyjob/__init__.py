@@ -24,7 +24,7 @@ __author__ = 'Felix Simkovic'
 __contributors__ = ['Adam Simpkin']
 
 from pyjob.cexec import cexec
-from pyjob.config import PyJobConfig
+from pyjob.config import LazyPyJobConfig, PyJobConfig
 from pyjob.factory import TaskFactory
 from pyjob.script import Script
 from pyjob.stopwatch import StopWatch
@@ -32,4 +32,4 @@ from pyjob.version import __version__
 
 # Expose this utility function
 read_script = Script.read
-config = PyJobConfig.from_default()
+config = LazyPyJobConfig()
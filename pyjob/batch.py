@@ -0,0 +1,162 @@
+# MIT License
+#
+# Copyright (c) 2017-18 Felix Simkovic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Module to submit many independent tasks concurrently"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import collections
+import logging
+import multiprocessing.pool
+
+from pyjob import config
+
+logger = logging.getLogger(__name__)
+
+SubmissionResult = collections.namedtuple('SubmissionResult', ['task', 'pid', 'error'])
+SubmissionResult.__doc__ = """Outcome of submitting a single :obj:`~pyjob.task.Task`
+
+The ``pid`` is :obj:`None` and ``error`` holds the raised exception if the submission failed.
+"""
+
+
+class BatchSubmitter(object):
+    """Submitter for many independent :obj:`~pyjob.task.Task` instances
+
+    Each :obj:`~pyjob.task.Task` writes its own runscript and submits itself via
+    :meth:`~pyjob.task.Task.run`, but at most ``max_inflight`` submissions are
+    in progress at any time. A failing submission does not affect the others.
+
+    Examples
+    --------
+
+    >>> from pyjob.batch import BatchSubmitter
+    >>> submitter = BatchSubmitter(max_inflight=16)
+    >>> for result in submitter.submit(tasks):
+    ...     if result.error:
+    ...         print(result.task, result.error)
+
+    """
+
+    def __init__(self, max_inflight=None):
+        """Instantiate a new :obj:`~pyjob.batch.BatchSubmitter`
+
+        Parameters
+        ----------
+        max_inflight : int, optional
+           The maximum number of concurrent submissions [default: 8]
+
+        Raises
+        ------
+        :exc:`ValueError`
+           ``max_inflight`` must be a positive integer
+
+        """
+        if max_inflight is None:
+            max_inflight = config.get('max_inflight') or 8
+        self.max_inflight = int(max_inflight)
+        if self.max_inflight < 1:
+            raise ValueError('max_inflight must be a positive integer')
+
+    def __repr__(self):
+        """Representation of the :obj:`~pyjob.batch.BatchSubmitter`"""
+        return '{}(max_inflight={})'.format(self.__class__.__name__, self.max_inflight)
+
+    def submit(self, tasks):
+        """Submit all tasks concurrently
+
+        Parameters
+        ----------
+        tasks : list, tuple
+           The :obj:`~pyjob.task.Task` instances to submit
+
+        Returns
+        -------
+        list
+           A :obj:`~pyjob.batch.SubmissionResult` per task in the order of ``tasks``
+
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        processes = min(self.max_inflight, len(tasks))
+        if processes == 1:
+            results = [self._submit(task) for task in tasks]
+        else:
+            pool = multiprocessing.pool.ThreadPool(processes=processes)
+            try:
+                results = pool.map(self._submit, tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        self._summarise(results)
+        return results
+
+    async def asubmit(self, tasks):
+        """Coroutine to submit all tasks concurrently without blocking the event loop
+
+        Parameters
+        ----------
+        tasks : list, tuple
+           The :obj:`~pyjob.task.Task` instances to submit
+
+        Returns
+        -------
+        list
+           A :obj:`~pyjob.batch.SubmissionResult` per task in the order of ``tasks``
+
+        """
+        import asyncio
+
+        semaphore = asyncio.Semaphore(self.max_inflight)
+
+        async def submit(task):
+            async with semaphore:
+                try:
+                    await task.arun()
+                except Exception as e:
+                    logger.debug('Submission of %s failed: %s', task, e)
+                    return SubmissionResult(task, None, e)
+                return SubmissionResult(task, task.pid, None)
+
+        results = list(await asyncio.gather(*[submit(task) for task in tasks]))
+        self._summarise(results)
+        return results
+
+    @staticmethod
+    def _submit(task):
+        """Submit a single task and capture the outcome"""
+        try:
+            task.run()
+        except Exception as e:
+            logger.debug('Submission of %s failed: %s', task, e)
+            return SubmissionResult(task, None, e)
+        return SubmissionResult(task, task.pid, None)
+
+    @staticmethod
+    def _summarise(results):
+        """Log the number of failed submissions"""
+        failed = sum(1 for result in results if result.error is not None)
+        if failed:
+            logger.warning('%d of %d task submissions failed', failed, len(results))
+        else:
+            logger.debug('Submitted %d tasks', len(results))
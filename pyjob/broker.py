@@ -0,0 +1,261 @@
+# MIT License
+#
+# Copyright (c) 2017-18 Felix Simkovic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Module to share scheduler status queries between cluster tasks"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import logging
+import threading
+import time
+
+from pyjob.cexec import acexec, cexec
+from pyjob.exception import PyJobExecutableNotFoundError
+
+logger = logging.getLogger(__name__)
+
+_BROKERS = {}
+_BROKERS_LOCK = threading.Lock()
+
+
+class StatusBroker(object):
+    """Status snapshot shared by all :obj:`~pyjob.task.ClusterTask` instances of one platform
+
+    Instead of forking one status command per task and poll, the broker issues a single
+    bulk query for every registered job identifier at most once per ``interval`` and
+    answers all subsequent requests from the cached snapshot.
+
+    Examples
+    --------
+
+    >>> from pyjob.broker import StatusBroker
+    >>> broker = StatusBroker(command_f, parse_f, interval=10)
+    >>> broker.register(1234)
+    >>> broker.status(1234)
+    {'job_number': 1234, 'status': 'RUNNING'}
+
+    """
+
+    def __init__(self, command_f, parse_f, interval=5):
+        """Instantiate a new :obj:`~pyjob.broker.StatusBroker`
+
+        Parameters
+        ----------
+        command_f : callable
+           A :obj:`callable` returning the bulk status command for a :obj:`list` of job identifiers
+        parse_f : callable
+           A :obj:`callable` converting the command's standard out and the queried job identifiers
+           into a :obj:`dict` mapping each active job identifier to its information
+        interval : int, float, optional
+           The minimum time between two bulk queries (in seconds)
+
+        """
+        self.command_f = command_f
+        self.parse_f = parse_f
+        self.interval = interval
+        self._active = set()
+        self._finished = set()
+        self._queried = set()
+        self._snapshot = {}
+        self._timestamp = None
+        self._failed = False
+        self._lock = threading.RLock()
+        self._arefresh = None
+
+    def __repr__(self):
+        """Representation of the :obj:`~pyjob.broker.StatusBroker`"""
+        return '{}(active={} interval={})'.format(self.__class__.__name__, len(self._active), self.interval)
+
+    @property
+    def stale(self):
+        """Boolean to indicate whether the snapshot needs refreshing"""
+        if self._timestamp is None or (not self._failed and bool(self._active - self._queried)):
+            return True
+        return time.time() - self._timestamp >= self.interval
+
+    def register(self, pid):
+        """Register a job identifier for inclusion in future bulk queries
+
+        Parameters
+        ----------
+        pid : int, str
+           The job identifier
+
+        """
+        with self._lock:
+            self._active.add(pid)
+            self._finished.discard(pid)
+
+    def unregister(self, pid):
+        """Remove a job identifier from future bulk queries
+
+        Parameters
+        ----------
+        pid : int, str
+           The job identifier
+
+        """
+        with self._lock:
+            self._active.discard(pid)
+            self._finished.discard(pid)
+            self._queried.discard(pid)
+            self._snapshot.pop(pid, None)
+
+    def refresh(self):
+        """Issue one bulk query for all active job identifiers and update the snapshot"""
+        with self._lock:
+            pids = sorted(self._active, key=str)
+            if pids:
+                try:
+                    stdout = cexec(self.command_f(pids), permit_nonzero=True)
+                except PyJobExecutableNotFoundError:
+                    stdout = None
+                self._update(pids, stdout)
+            else:
+                self._update(pids, None)
+
+    async def arefresh(self):
+        """Issue one bulk query for all active job identifiers without blocking the event loop
+
+        Note
+        ----
+        Concurrent callers on the same event loop share a single query.
+
+        """
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        if self._arefresh is None or self._arefresh[0] is not loop or self._arefresh[1].done():
+            self._arefresh = (loop, asyncio.ensure_future(self._aquery()))
+        await asyncio.shield(self._arefresh[1])
+
+    async def astatus(self, pid):
+        """Get the information for a single job identifier without blocking the event loop
+
+        Parameters
+        ----------
+        pid : int, str
+           The job identifier
+
+        Returns
+        -------
+        dict
+           The job information, or an empty :obj:`dict` if the job is no longer active
+
+        """
+        with self._lock:
+            if pid in self._finished:
+                return {}
+            self._active.add(pid)
+            stale = self.stale
+        if stale:
+            await self.arefresh()
+        with self._lock:
+            if pid in self._finished:
+                return {}
+            if pid not in self._queried:
+                return {'job_number': pid, 'status': 'Unknown'}
+            return self._snapshot.get(pid, {})
+
+    async def _aquery(self):
+        """Coroutine issuing the bulk query"""
+        with self._lock:
+            pids = sorted(self._active, key=str)
+        stdout = None
+        if pids:
+            try:
+                stdout = await acexec(self.command_f(pids), permit_nonzero=True)
+            except PyJobExecutableNotFoundError:
+                pass
+        with self._lock:
+            self._update(pids, stdout)
+
+    def status(self, pid):
+        """Get the information for a single job identifier
+
+        Parameters
+        ----------
+        pid : int, str
+           The job identifier
+
+        Returns
+        -------
+        dict
+           The job information, or an empty :obj:`dict` if the job is no longer active
+
+        """
+        with self._lock:
+            if pid in self._finished:
+                return {}
+            self._active.add(pid)
+            if self.stale:
+                self.refresh()
+            if pid not in self._queried:
+                return {'job_number': pid, 'status': 'Unknown'}
+            return self._snapshot.get(pid, {})
+
+    def _update(self, pids, stdout):
+        """Store the result of a bulk query
+
+        Jobs missing from the query output are considered finished and are not queried again.
+        If ``parse_f`` returns :obj:`None`, the query is considered failed and the previous
+        snapshot is retained until the next refresh.
+
+        """
+        snapshot = self.parse_f(stdout, pids) if stdout else {}
+        self._timestamp = time.time()
+        self._failed = snapshot is None
+        if self._failed:
+            logger.debug('Bulk status query failed, retaining previous snapshot')
+            return
+        self._snapshot = snapshot
+        self._queried = set(pids)
+        self._finished.update(pid for pid in pids if pid not in snapshot)
+        self._active.difference_update(self._finished)
+        logger.debug('Refreshed status of %d jobs, %d still active', len(pids), len(self._snapshot))
+
+
+def get_status_broker(key, command_f, parse_f, interval=5):
+    """Get the :obj:`~pyjob.broker.StatusBroker` shared under ``key``
+
+    The broker is created on first request and reused by all later callers.
+
+    Parameters
+    ----------
+    key : hashable
+       The identifier of the broker, e.g. the :obj:`~pyjob.task.ClusterTask` class
+    command_f : callable
+       See :obj:`~pyjob.broker.StatusBroker`
+    parse_f : callable
+       See :obj:`~pyjob.broker.StatusBroker`
+    interval : int, float, optional
+       See :obj:`~pyjob.broker.StatusBroker`
+
+    Returns
+    -------
+    :obj:`~pyjob.broker.StatusBroker`
+
+    """
+    with _BROKERS_LOCK:
+        if key not in _BROKERS:
+            _BROKERS[key] = StatusBroker(command_f, parse_f, interval=interval)
+        return _BROKERS[key]
@@ -0,0 +1,242 @@
+# MIT License
+#
+# Copyright (c) 2017-18 Felix Simkovic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Module to memoize script executions in a content-addressed store"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_SIZE = 1024 ** 3
+RESULT_FIELDS = ('exit_code', 'wall_time', 'user_time', 'system_time', 'max_rss')
+
+
+class ExecutionCache(object):
+    """Content-addressed store of successful script executions
+
+    Each execution is stored under a hash of the script content, the content of its
+    declared input files and the values of its declared environment variables. An
+    entry holds the log and the resource usage of the execution. Once the store
+    exceeds ``max_size``, the least recently used entries are evicted. The size of the
+    store is tracked as entries are stored, and the store is only scanned when this size
+    is unknown or exceeds ``max_size``. Entries stored by other processes are therefore
+    accounted for at the next scan.
+
+    Examples
+    --------
+
+    >>> from pyjob import TaskFactory
+    >>> from pyjob.cache import ExecutionCache
+    >>> cache = ExecutionCache('/path/to/cache', max_size=10 * 1024 ** 3)
+    >>> with TaskFactory('local', scripts, cache=cache, cache_inputs=['input.pdb']) as task:
+    ...     task.run()
+
+    """
+
+    def __init__(self, directory=None, max_size=None):
+        """Instantiate a new :obj:`~pyjob.cache.ExecutionCache`
+
+        Parameters
+        ----------
+        directory : str, optional
+           The directory of the store [default: ``cache_directory`` configuration or ~/.pyjob/cache]
+        max_size : int, optional
+           The maximum size of the store (in bytes) [default: ``cache_max_size`` configuration or 1 GiB]
+
+        """
+        from pyjob import config
+
+        directory = directory or config.get('cache_directory') or os.path.join('~', '.pyjob', 'cache')
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_size = int(max_size or config.get('cache_max_size') or CACHE_MAX_SIZE)
+        self._size = None
+
+    def __repr__(self):
+        """Representation of the :obj:`~pyjob.cache.ExecutionCache`"""
+        return '{}(directory={} max_size={})'.format(self.__class__.__name__, self.directory, self.max_size)
+
+    @property
+    def size(self):
+        """The total size of all entries (in bytes)"""
+        self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    @staticmethod
+    def key(script, inputs=None, environment=None):
+        """Compute the key of a script execution
+
+        Parameters
+        ----------
+        script : :obj:`~pyjob.script.Script`
+           The script to execute
+        inputs : list, tuple, optional
+           The paths to the files read by the script
+        environment : list, tuple, optional
+           The names of the environment variables read by the script
+
+        Returns
+        -------
+        str
+           The hexadecimal SHA-256 digest
+
+        Note
+        ----
+        Missing input files are part of the key, so the key changes once they are created.
+
+        """
+        digest = hashlib.sha256(str(script).encode('utf-8'))
+        for path in sorted(inputs or []):
+            digest.update(b'\0' + os.fsencode(os.path.abspath(path)) + b'\0')
+            try:
+                with open(path, 'rb') as f_in:
+                    for chunk in iter(lambda: f_in.read(1024 ** 2), b''):
+                        digest.update(chunk)
+            except (IOError, OSError):
+                digest.update(b'\0missing')
+        for name in sorted(environment or []):
+            digest.update('\0{}={}'.format(name, os.environ.get(name, '')).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key, log):
+        """Restore the log of a cached execution
+
+        Parameters
+        ----------
+        key : str
+           The key computed by :meth:`~pyjob.cache.ExecutionCache.key`
+        log : str
+           The path to restore the log to
+
+        Returns
+        -------
+        dict
+           The resource usage of the cached execution, or :obj:`None` if not cached
+
+        """
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, 'result.json'), 'r') as f_in:
+                result = json.load(f_in)
+            shutil.copyfile(os.path.join(entry, 'log'), log)
+        except (IOError, OSError, ValueError):
+            return None
+        now = time.time()
+        os.utime(entry, (now, now))
+        return result
+
+    def put(self, key, result):
+        """Store a successful execution
+
+        Parameters
+        ----------
+        key : str
+           The key computed by :meth:`~pyjob.cache.ExecutionCache.key`
+        result : :obj:`~pyjob.task.ScriptResult`
+           The outcome of the execution
+
+        Returns
+        -------
+        bool
+           Indicate if the execution was stored
+
+        """
+        if not os.path.isfile(result.log):
+            return False
+        entry = self._entry(key)
+        try:
+            os.makedirs(entry)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        previous = self._entry_size(entry)
+        # Write to temporary files first so that readers never see partial entries
+        suffix = '.' + uuid.uuid4().hex
+        shutil.copyfile(result.log, os.path.join(entry, 'log' + suffix))
+        with open(os.path.join(entry, 'result.json' + suffix), 'w') as f_out:
+            json.dump({field: getattr(result, field) for field in RESULT_FIELDS}, f_out)
+        os.replace(os.path.join(entry, 'log' + suffix), os.path.join(entry, 'log'))
+        os.replace(os.path.join(entry, 'result.json' + suffix), os.path.join(entry, 'result.json'))
+        if self._size is not None:
+            self._size += self._entry_size(entry) - previous
+        return True
+
+    def evict(self):
+        """Remove the least recently used entries until the store fits into ``max_size``
+
+        Returns
+        -------
+        int
+           The number of removed entries
+
+        Note
+        ----
+        The store is only scanned if its size is unknown or exceeds ``max_size``.
+
+        """
+        if self._size is not None and self._size <= self.max_size:
+            return 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        self._size = total
+        if removed:
+            logger.debug('Evicted %d entries from %s', removed, self.directory)
+        return removed
+
+    def _entries(self):
+        """Yield the last use, size and path of each entry"""
+        if not os.path.isdir(self.directory):
+            return
+        for prefix in os.listdir(self.directory):
+            parent = os.path.join(self.directory, prefix)
+            if not os.path.isdir(parent):
+                continue
+            for name in os.listdir(parent):
+                entry = os.path.join(parent, name)
+                try:
+                    yield os.path.getmtime(entry), self._entry_size(entry), entry
+                except OSError:
+                    continue
+
+    def _entry(self, key):
+        """Get the directory of the entry for ``key``"""
+        return os.path.join(self.directory, key[:2], key)
+
+    @staticmethod
+    def _entry_size(entry):
+        """Get the total size of the files in ``entry``"""
+        return sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
@@ -24,17 +24,23 @@ __author__ = 'Felix Simkovic'
 __contibutors__ = ['Jens Thomas']
 __version__ = '1.0'
 
+import codecs
+import io
 import logging
 import os
 import signal
 import subprocess
 import sys
+import threading
 
 from pyjob.exception import PyJobExecutableNotFoundError, PyJobExecutionError
 from pyjob.misc import decode
 
 logger = logging.getLogger(__name__)
 
+WHICH_CACHE_SIZE = 256
+_WHICH_CACHE = {}
+
 
 def is_exe(fpath):
     """Status to indicate if a file is an executable
@@ -52,19 +58,27 @@ def is_exe(fpath):
     return os.path.isfile(fpath) and os.access(fpath, os.X_OK)
 
 
-def which(executable):
+def which(executable, cache=True):
     """Python-based mirror of UNIX ``which`` command
 
     Parameters
     ----------
     executable : str
        The path or name for an executable
+    cache : bool, optional
+       Use and update the resolution cache [default: True]
 
     Returns
     -------
     str
        The absolute path to the executable, or ``None`` if not found
 
+    Note
+    ----
+    Resolved names are cached per ``PATH`` value, so a changed ``PATH`` never serves a
+    stale entry. A cached path is verified before use and resolved afresh if it has
+    disappeared. Unresolved names are never cached.
+
     Credits
     -------
     https://stackoverflow.com/a/377028/3046533
@@ -74,14 +88,30 @@ def which(executable):
     if fpath:
         if is_exe(executable):
             return executable
-    else:
-        for path in os.environ["PATH"].split(os.pathsep):
-            exe_file = os.path.join(path, executable)
-            if is_exe(exe_file):
-                return exe_file
+        return None
+    search_path = os.environ.get("PATH", os.defpath)
+    key = (executable, search_path)
+    if cache:
+        exe_file = _WHICH_CACHE.get(key)
+        if exe_file is not None and is_exe(exe_file):
+            return exe_file
+    for path in search_path.split(os.pathsep):
+        exe_file = os.path.join(path, executable)
+        if is_exe(exe_file):
+            if cache:
+                if len(_WHICH_CACHE) >= WHICH_CACHE_SIZE:
+                    _WHICH_CACHE.clear()
+                _WHICH_CACHE[key] = exe_file
+            return exe_file
+    return None
+
 
+def clear_which_cache():
+    """Clear the resolution cache used by :func:`~pyjob.cexec.which`"""
+    _WHICH_CACHE.clear()
 
-def cexec(cmd, permit_nonzero=False, **kwargs):
+
+def cexec(cmd, permit_nonzero=False, cache=True, raw=False, **kwargs):
     """Function to execute a command
 
     Parameters
@@ -90,12 +120,61 @@ def cexec(cmd, permit_nonzero=False, **kwargs):
        The command to call
     permit_nonzero : bool, optional
        Allow non-zero return codes [default: False]
+    cache : bool, optional
+       Use the cached executable resolution of :func:`~pyjob.cexec.which` [default: True]
+    raw : bool, optional
+       Return the standard out as undecoded :obj:`bytes` [default: False]
     **kwargs : dict, option
        Any keyword arguments accepted by :obj:`~subprocess.Popen`
 
     Returns
     -------
-    str
+    str, bytes
+       The processes' standard out
+
+    Raises
+    ------
+    :exc:`PyJobExecutableNotFoundError`
+       Cannot find executable
+    :exc:`PyJobExecutionError`
+       Execution exited with non-zero return code
+
+    """
+    stdinstr = _prepare(cmd, kwargs, cache)
+
+    if os.name == 'nt':
+        kwargs.setdefault('bufsize', 0)
+        kwargs.setdefault('shell', 'False')
+
+    try:
+        p = subprocess.Popen(cmd, **kwargs)
+        stdout, stderr = p.communicate(input=stdinstr)
+    except (KeyboardInterrupt, SystemExit):
+        os.kill(p.pid, signal.SIGTERM)
+        sys.exit(signal.SIGTERM)
+    else:
+        return _finalise(cmd, p.returncode, stdout, permit_nonzero, raw)
+
+
+async def acexec(cmd, permit_nonzero=False, cache=True, raw=False, **kwargs):
+    """Coroutine to execute a command without blocking the event loop
+
+    Parameters
+    ----------
+    cmd : list
+       The command to call
+    permit_nonzero : bool, optional
+       Allow non-zero return codes [default: False]
+    cache : bool, optional
+       Use the cached executable resolution of :func:`~pyjob.cexec.which` [default: True]
+    raw : bool, optional
+       Return the standard out as undecoded :obj:`bytes` [default: False]
+    **kwargs : dict, option
+       Any keyword arguments accepted by :func:`~asyncio.create_subprocess_exec`
+
+    Returns
+    -------
+    str, bytes
        The processes' standard out
 
     Raises
@@ -106,17 +185,151 @@ def cexec(cmd, permit_nonzero=False, **kwargs):
        Execution exited with non-zero return code
 
     """
-    executable = which(cmd[0])
+    import asyncio
+
+    stdinstr = _prepare(cmd, kwargs, cache)
+    p = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+    try:
+        stdout, stderr = await p.communicate(input=stdinstr)
+    except asyncio.CancelledError:
+        p.kill()
+        raise
+    return _finalise(cmd, p.returncode, stdout, permit_nonzero, raw)
+
+
+def cexec_stream(cmd, permit_nonzero=False, cache=True, chunksize=None, tee=None, encoding=None, **kwargs):
+    """Generator to execute a command and yield its standard out incrementally
+
+    Parameters
+    ----------
+    cmd : list
+       The command to call
+    permit_nonzero : bool, optional
+       Allow non-zero return codes [default: False]
+    cache : bool, optional
+       Use the cached executable resolution of :func:`~pyjob.cexec.which` [default: True]
+    chunksize : int, optional
+       Yield chunks of at most this many bytes instead of lines
+    tee : str, file, optional
+       A file path or file object to which the standard out is copied as it is read
+    encoding : str, optional
+       The encoding of the standard out, see :func:`~pyjob.misc.decode`
+    **kwargs : dict, option
+       Any keyword arguments accepted by :obj:`~subprocess.Popen`
+
+    Yields
+    ------
+    str
+       The next line (without line ending) or chunk of the processes' standard out
+
+    Raises
+    ------
+    :exc:`PyJobExecutableNotFoundError`
+       Cannot find executable
+    :exc:`PyJobExecutionError`
+       Execution exited with non-zero return code
+    :exc:`ValueError`
+       The standard out is redirected elsewhere
+
+    Note
+    ----
+    Only the current line or chunk is held in memory. Lines are decoded individually with
+    :func:`~pyjob.misc.decode`, chunks incrementally with ``encoding`` [default: UTF-8] and
+    undecodable bytes replaced. The process is killed if the generator is closed early.
+
+    Examples
+    --------
+
+    >>> from pyjob.cexec import cexec_stream
+    >>> for line in cexec_stream(['ls', '-l'], tee='ls.log'):
+    ...     print(line)
+
+    """
+    if kwargs.get('stdout', subprocess.PIPE) != subprocess.PIPE:
+        raise ValueError('Cannot stream a redirected standard out')
+    stdinstr = _prepare(cmd, kwargs, cache)
+
+    if tee is None:
+        ftee, close_tee = None, False
+    elif isinstance(tee, str):
+        ftee, close_tee = open(tee, 'wb'), True
+    else:
+        ftee, close_tee = tee, False
+    text_tee = isinstance(ftee, io.TextIOBase)
+
+    p = subprocess.Popen(cmd, **kwargs)
+    try:
+        if stdinstr is not None:
+            feeder = threading.Thread(target=_feed_stdin, args=(p.stdin, stdinstr))
+            feeder.daemon = True
+            feeder.start()
+        if chunksize is None:
+            for line in iter(p.stdout.readline, b''):
+                text = decode(line, encoding=encoding)
+                if ftee is not None:
+                    ftee.write(text if text_tee else line)
+                yield text.rstrip('\r\n')
+        else:
+            decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+            for chunk in iter(lambda: p.stdout.read1(chunksize), b''):
+                text = decoder.decode(chunk)
+                if ftee is not None:
+                    ftee.write(text if text_tee else chunk)
+                if text:
+                    yield text
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
+        p.stdout.close()
+        p.wait()
+    finally:
+        if p.poll() is None:
+            p.kill()
+            p.wait()
+        if close_tee:
+            ftee.close()
+    _check_returncode(cmd, p.returncode, permit_nonzero)
+
+
+def _feed_stdin(stdin, stdinstr):
+    """Write the standard input to a process without blocking the reader"""
+    try:
+        stdin.write(stdinstr)
+        stdin.close()
+    except (BrokenPipeError, ValueError):
+        pass
+
+
+def _prepare(cmd, kwargs, cache):
+    """Resolve the executable and set the default keyword arguments for execution
+
+    Parameters
+    ----------
+    cmd : list
+       The command to call, its executable is replaced by the absolute path
+    kwargs : dict
+       The keyword arguments for execution, updated in place
+    cache : bool
+       Use the cached executable resolution
+
+    Returns
+    -------
+    bytes
+       The encoded standard input, or ``None``
+
+    Raises
+    ------
+    :exc:`PyJobExecutableNotFoundError`
+       Cannot find executable
+
+    """
+    executable = which(cmd[0], cache=cache)
     if executable is None:
         raise PyJobExecutableNotFoundError('Cannot find executable: %s' % cmd[0])
     cmd[0] = executable
 
     logger.debug('Executing "%s"', ' '.join(cmd))
 
-    if os.name == 'nt':
-        kwargs.setdefault('bufsize', 0)
-        kwargs.setdefault('shell', 'False')
-
     kwargs.setdefault('cwd', os.getcwd())
     kwargs.setdefault('stdout', subprocess.PIPE)
     kwargs.setdefault('stderr', subprocess.STDOUT)
@@ -124,23 +337,56 @@ def cexec(cmd, permit_nonzero=False, **kwargs):
     stdinstr = kwargs.get('stdin', None)
     if stdinstr and isinstance(stdinstr, str):
         kwargs['stdin'] = subprocess.PIPE
+        return stdinstr.encode()
+    return None
 
-    try:
-        p = subprocess.Popen(cmd, **kwargs)
-        if stdinstr:
-            stdinstr = stdinstr.encode()
-        stdout, stderr = p.communicate(input=stdinstr)
-    except (KeyboardInterrupt, SystemExit):
-        os.kill(p.pid, signal.SIGTERM)
-        sys.exit(signal.SIGTERM)
+
+def _finalise(cmd, returncode, stdout, permit_nonzero, raw):
+    """Decode the standard out and check the return code of an executed command
+
+    Parameters
+    ----------
+    cmd : list
+       The command called
+    returncode : int
+       The return code of the command
+    stdout : bytes
+       The standard out of the command
+    permit_nonzero : bool
+       Allow non-zero return codes
+    raw : bool
+       Skip decoding the standard out
+
+    Returns
+    -------
+    str, bytes
+       The standard out
+
+    Raises
+    ------
+    :exc:`PyJobExecutionError`
+       Execution exited with non-zero return code
+
+    """
+    if stdout:
+        stdout = stdout.strip() if raw else decode(stdout).strip()
+    _check_returncode(cmd, returncode, permit_nonzero)
+    return stdout
+
+
+def _check_returncode(cmd, returncode, permit_nonzero):
+    """Check the return code of an executed command
+
+    Raises
+    ------
+    :exc:`PyJobExecutionError`
+       Execution exited with non-zero return code
+
+    """
+    if returncode == 0:
+        return
+    elif permit_nonzero:
+        logger.debug("Ignoring non-zero returncode %d for '%s'", returncode, " ".join(cmd))
     else:
-        if stdout:
-            stdout = decode(stdout).strip()
-        if p.returncode == 0:
-            return stdout
-        elif permit_nonzero:
-            logger.debug("Ignoring non-zero returncode %d for '%s'", p.returncode, " ".join(cmd))
-            return stdout
-        else:
-            msg = "Execution of '{}' exited with non-zero return code ({})"
-            raise PyJobExecutionError(msg.format(' '.join(cmd), p.returncode))
+        msg = "Execution of '{}' exited with non-zero return code ({})"
+        raise PyJobExecutionError(msg.format(' '.join(cmd), returncode))
@@ -23,18 +23,14 @@
 __author__ = 'Felix Simkovic'
 __version__ = '1.0'
 
+import errno
 import logging
 import os
-import sys
-import yaml
+import threading
 
-from pyjob.exception import DictLockedError
+from collections import UserDict
 
-if sys.version_info.major < 3:
-    FileNotFoundError = IOError
-    from UserDict import UserDict
-else:
-    from collections import UserDict
+from pyjob.exception import DictLockedError
 
 logger = logging.getLogger(__name__)
 
@@ -62,17 +58,7 @@ class ImmutableDictMixin(object):
 class PyJobConfig(UserDict, ImmutableDictMixin):
 
     _directory = os.path.expanduser('~/.pyjob')
-    if not os.path.isdir(_directory):
-        try:
-            os.makedirs(_directory)
-        except OSError as e:
-            if e.errno == errno.EEXIST and os.path.isdir(_directory):
-                pass
-            else:
-                raise RuntimeError('Cannot create configuration directory')
     file = os.path.join(_directory, 'pyjob.yml')
-    if not os.path.isfile(file):
-        open(file, 'w').close()
 
     @ImmutableDictMixin.assert_lock
     def __setitem__(self, key, value):
@@ -80,7 +66,7 @@ class PyJobConfig(UserDict, ImmutableDictMixin):
 
     @ImmutableDictMixin.assert_lock
     def setdefault(self, key, value=None):
-        super(PyJobConfig, self).setdefault(key, value=value)
+        super(PyJobConfig, self).setdefault(key, value)
         self.write()
 
     @ImmutableDictMixin.assert_lock
@@ -88,6 +74,15 @@ class PyJobConfig(UserDict, ImmutableDictMixin):
         super(PyJobConfig, self).update(*args, **kwargs)
 
     def write(self):
+        import yaml
+
+        directory = os.path.dirname(os.path.abspath(self.file))
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                if e.errno != errno.EEXIST or not os.path.isdir(directory):
+                    raise RuntimeError('Cannot create configuration directory')
         data = yaml.dump(dict(self), default_flow_style=False)
         with open(self.file, 'w') as f:
             f.write(data)
@@ -112,6 +107,8 @@ class PyJobConfig(UserDict, ImmutableDictMixin):
            Cannot find YAML file
 
         """
+        import yaml
+
         if not os.path.isfile(yamlf):
             raise FileNotFoundError('Cannot find YAML file')
         with open(yamlf, 'r') as f:
@@ -130,7 +127,89 @@ class PyJobConfig(UserDict, ImmutableDictMixin):
         Returns
         -------
         :obj:`~pyjob.config.PyJobConfig`
-           A :obj:`~pyjob.config.PyJobConfig` instance
+           A :obj:`~pyjob.config.PyJobConfig` instance, empty if the default file does not exist
+
+        Note
+        ----
+        The default file and its directory are only created once the configuration is written.
+
+        """
+        if os.path.isfile(cls.file) and os.path.getsize(cls.file) > 0:
+            return PyJobConfig.read_yaml(cls.file)
+        return PyJobConfig()
+
+
+class LazyPyJobConfig(object):
+    """Proxy to a :obj:`~pyjob.config.PyJobConfig` that is only read on first use
+
+    This keeps ``import pyjob`` free of any file system access and YAML parsing.
+
+    Examples
+    --------
+
+    >>> from pyjob.config import LazyPyJobConfig
+    >>> config = LazyPyJobConfig()
+    >>> config.loaded
+    False
+    >>> config.get('processes')
+    >>> config.loaded
+    True
+
+    """
+
+    def __init__(self, loader=None):
+        """Instantiate a new :obj:`~pyjob.config.LazyPyJobConfig`
+
+        Parameters
+        ----------
+        loader : callable, optional
+           A :obj:`callable` returning the :obj:`~pyjob.config.PyJobConfig`
+           [default: :meth:`~pyjob.config.PyJobConfig.from_default`]
 
         """
-        return PyJobConfig.read_yaml(cls.file)
+        self._loader = loader or PyJobConfig.from_default
+        self._config = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+
+    def __delitem__(self, key):
+        del self._load()[key]
+
+    def __contains__(self, key):
+        return key in self._load()
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __eq__(self, other):
+        return self._load() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self._load())
+
+    @property
+    def loaded(self):
+        """Boolean to indicate whether the configuration has been read"""
+        return self._config is not None
+
+    def _load(self):
+        """Read the configuration unless done previously"""
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    self._config = self._loader()
+        return self._config
@@ -23,33 +23,96 @@
 __author__ = 'Felix Simkovic'
 __version__ = '1.0'
 
+import collections
+import heapq
+import itertools
+import json
 import logging
 import multiprocessing
 import os
+import queue
+import subprocess
 import sys
+import threading
 import time
 import uuid
 
-from pyjob.cexec import cexec
-from pyjob.task import Task
+from pyjob import config
+from pyjob.cexec import which
+from pyjob.exception import PyJobError, PyJobTaskLockedError
+from pyjob.script import ScriptCollector
+from pyjob.task import ScriptResult, Task
 
 CPU_COUNT = multiprocessing.cpu_count()
+JOURNAL = 'pyjob.journal'
+MAX_RUNTIMES = 100000
+SCHEDULES = ('fifo', 'longest')
+WORKER_CHECK_INTERVAL = 1
 
 logger = logging.getLogger(__name__)
 
 
 class LocalTask(Task):
-    """Locally executable :obj:`~pyjob.task.Task`"""
+    """Locally executable :obj:`~pyjob.task.Task`
+
+    Examples
+    --------
+
+    Scripts are executed by a private :obj:`~pyjob.local.LocalExecutor`, which
+    is shut down when the :obj:`~pyjob.local.LocalTask` is closed. To reuse warm
+    worker processes across many tasks, attach them to a shared executor instead.
+
+    >>> from pyjob.local import LocalExecutor, LocalTask
+    >>> with LocalExecutor(processes=4) as executor:
+    ...     for scripts in batches:
+    ...         with LocalTask(scripts, executor=executor) as task:
+    ...             task.run()
+
+    Scripts with very different runtimes are best dispatched longest first. The
+    expected cost of each script is taken from ``weights`` or learned from
+    previous runs on the same executor.
+
+    >>> with LocalTask(scripts, schedule='longest', weights={scripts[0]: 100}) as task:
+    ...     task.run()
+
+    An unsealed task starts executing its first scripts while further scripts are
+    still being added, until it is sealed.
+
+    >>> with LocalTask(None, sealed=False) as task:
+    ...     task.run()
+    ...     for script in producer():
+    ...         task.add_script(script)
+    ...     task.seal()
+    ...     task.wait()
+
+    With ``resume=True``, every finished script is recorded in a journal. If the
+    same task is run again, e.g. after the controlling process died, only the
+    scripts that have not completed successfully yet are executed.
+
+    >>> with LocalTask(scripts, resume=True) as task:
+    ...     task.run()
+
+    """
 
     def __init__(self, *args, **kwargs):
         """Instantiate a new :obj:`~pyjob.local.LocalTask`"""
         super(LocalTask, self).__init__(*args, **kwargs)
-        self.queue = multiprocessing.Queue()
-        self.kill_switch = multiprocessing.Event()
-        self.processes = []
+        self.executor = kwargs.get('executor')
         self.chdir = kwargs.get('chdir', False)
         self.permit_nonzero = kwargs.get('permit_nonzero', False)
+        self.schedule = kwargs.get('schedule') or config.get('schedule') or 'fifo'
+        self.weights = kwargs.get('weights')
+        self.sealed = kwargs.get('sealed', True)
+        self.resume = kwargs.get('resume', False)
+        self.journal = kwargs.get('journal') or (os.path.join(self.directory, JOURNAL) if self.resume else None)
+        if self.journal:
+            self.journal = os.path.abspath(self.journal)
+        self._owns_executor = self.executor is None
+        self._task_id = None
         self._killed = False
+        self._results = None
+        self._journal_records = None
+        self._done_futures = {}
 
     @property
     def nprocesses(self):
@@ -66,94 +129,890 @@ class LocalTask(Task):
     @property
     def info(self):
         """:obj:`~pyjob.local.LocalTask` information"""
-        if any(proc.is_alive() for proc in self.processes):
+        if self._task_id is not None and not self.executor.done(self._task_id):
             return {'job_number': self.pid, 'status': 'Running'}
         return {}
 
+    @property
+    def results(self):
+        """The :obj:`~pyjob.task.ScriptResult` of each finished script in order of completion
+
+        Note
+        ----
+        Scripts discarded by :meth:`~pyjob.local.LocalTask.kill` before they started are not included.
+
+        """
+        if self._results is not None:
+            return self._restored_results + self._results
+        if self._task_id is None:
+            return list(self._restored_results)
+        return self._restored_results + self.executor.results(self._task_id)
+
+    def add_script(self, script):
+        """Add further scripts to this :obj:`~pyjob.local.LocalTask`
+
+        Scripts added to a running, unsealed :obj:`~pyjob.local.LocalTask` are written
+        to disk and queued for execution immediately, unless they are restored from
+        the journal or cache.
+
+        Parameters
+        ----------
+        script : :obj:`~pyjob.script.Script`, str, list, tuple
+           Something representing one or more scripts
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobTaskLockedError`
+           Sealed task, cannot add further scripts
+
+        """
+        if not self.locked:
+            super(LocalTask, self).add_script(script)
+            return
+        if self.sealed or self._killed:
+            raise PyJobTaskLockedError('This task is sealed!')
+        collector = self._restore_results(ScriptCollector(script))
+        if len(collector) < 1:
+            return
+        collector.dump()
+        self.script_collector.add(collector.paths)
+        self.executor.extend(self._task_id, collector.paths)
+
+    def seal(self):
+        """Signal that no further scripts will be added to this :obj:`~pyjob.local.LocalTask`
+
+        Note
+        ----
+        An unsealed :obj:`~pyjob.local.LocalTask` is never considered completed.
+
+        """
+        self.sealed = True
+        if self._task_id is not None and not self._killed:
+            self.executor.seal(self._task_id)
+
     def close(self):
-        """Close this :obj:`~pyjob.local.LocalTask` after completion"""
-        if self._killed:
+        """Close this :obj:`~pyjob.local.LocalTask` after completion
+
+        Note
+        ----
+        An unsealed :obj:`~pyjob.local.LocalTask` is sealed first.
+
+        """
+        if self._killed or self._task_id is None:
             return
-        for proc in self.processes:
-            proc.join()
-        self.kill()
+        self.seal()
+        self.executor.wait(self._task_id)
+        self._release()
 
     def kill(self):
-        """Immediately terminate the :obj:`~pyjob.local.LocalTask`"""
-        if self._killed:
+        """Immediately terminate the :obj:`~pyjob.local.LocalTask`
+
+        Note
+        ----
+        Scripts not yet started are discarded, whereas scripts already
+        started are allowed to finish.
+
+        """
+        if self._killed or self._task_id is None:
             return
-        if not self.kill_switch.is_set():
-            self.kill_switch.set()
-        # This is a requirement to avoid access to memory-inaccessible processes
-        # The queue gets flushed by triggering the kill_switch
-        for proc in self.processes:
-            proc.join()
-        for proc in self.processes:
-            proc.terminate()
+        self.sealed = True
+        self.executor.cancel(self._task_id)
+        self.executor.wait(self._task_id)
+        self._release()
+        logger.debug("Terminated task: %d", self.pid)
+
+    async def akill(self):
+        """Coroutine to terminate the :obj:`~pyjob.local.LocalTask` without blocking the event loop
+
+        Note
+        ----
+        See :meth:`~pyjob.local.LocalTask.kill` for further details.
+
+        """
+        if self._killed or self._task_id is None:
+            return
+        self.sealed = True
+        self.executor.cancel(self._task_id)
+        while not await self._await_event(None):
+            pass
+        self._release()
         logger.debug("Terminated task: %d", self.pid)
+
+    def _release(self):
+        """Detach this :obj:`~pyjob.local.LocalTask` from its :obj:`~pyjob.local.LocalExecutor`"""
+        self._results = self.executor.results(self._task_id)
+        self.executor.release(self._task_id)
+        if self.cache and self._cache_keys:
+            self._store_cached(self._results)
+        if self._owns_executor:
+            self.executor.shutdown()
         self._killed = True
 
+    def _wait_for_event(self, timeout):
+        """Block until this :obj:`~pyjob.local.LocalTask` completes or ``timeout`` expires
+
+        Parameters
+        ----------
+        timeout : int, float
+           The maximum time to block (in seconds)
+
+        Returns
+        -------
+        bool
+           Indicate if this :obj:`~pyjob.local.LocalTask` completed before ``timeout`` expired
+
+        """
+        if self._task_id is None:
+            return True
+        return self.executor.wait(self._task_id, timeout=timeout)
+
+    async def _await_event(self, timeout):
+        """Coroutine waiting until this :obj:`~pyjob.local.LocalTask` completes or ``timeout`` expires
+
+        Parameters
+        ----------
+        timeout : int, float
+           The maximum time to wait (in seconds)
+
+        Returns
+        -------
+        bool
+           Indicate if this :obj:`~pyjob.local.LocalTask` completed before ``timeout`` expired
+
+        """
+        import asyncio
+
+        if self._task_id is None or self.executor.done(self._task_id):
+            return True
+        loop = asyncio.get_event_loop()
+        future = self._done_futures.get(loop)
+        if future is None:
+            # A single callback per event loop is shared by all waiting coroutines
+            future = self._done_futures[loop] = loop.create_future()
+            self.executor.add_done_callback(self._task_id, lambda: _resolve_threadsafe(loop, future))
+        done, _ = await asyncio.wait([future], timeout=timeout)
+        return bool(done)
+
+    def _prepare_run(self):
+        """Check that this :obj:`~pyjob.local.LocalTask` can be started and write all scripts to disk
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobError`
+           One or more executable scripts required prior to execution of a sealed task
+        :exc:`~pyjob.exception.PyJobTaskLockedError`
+           Locked task, cannot restart or rerun
+
+        """
+        if self.sealed:
+            super(LocalTask, self)._prepare_run()
+        elif self.locked:
+            raise PyJobTaskLockedError('This task is locked!')
+        else:
+            self.script_collector = self._restore_results(self.script_collector)
+            self._dump_scripts()
+
+    def _restore_results(self, collector):
+        """Remove all scripts from ``collector`` that completed successfully according to the journal or cache
+
+        Note
+        ----
+        The journal is only read with ``resume=True``, once when the :obj:`~pyjob.local.LocalTask`
+        is started.
+
+        """
+        if self.resume:
+            if self._journal_records is None:
+                self._journal_records = read_journal(self.journal)
+            pending = []
+            for script in collector:
+                result = self._journal_records.get(script.path)
+                if result is None or result.error:
+                    pending.append(script)
+                else:
+                    self._restored_results.append(result)
+            if len(pending) < len(collector):
+                logger.debug('Resumed from %s, %d scripts pending', self.journal, len(pending))
+                collector = ScriptCollector(pending)
+        return super(LocalTask, self)._restore_results(collector)
+
+    def _submission_required(self):
+        """Boolean to indicate that scripts are left to execute or may still be added"""
+        return not self.sealed or super(LocalTask, self)._submission_required()
+
     def _run(self):
         """Method to initialise :obj:`~pyjob.local.LocalTask` execution"""
         if self._killed:
             return
-        for _ in range(self.nprocesses):
-            proc = LocalProcess(
-                self.queue,
-                self.kill_switch,
-                directory=self.directory,
-                chdir=self.chdir,
-                permit_nonzero=self.permit_nonzero,
-            )
-            proc.start()
-            self.processes.append(proc)
-        for script in self.script:
-            self.queue.put(script)
-        for _ in self.processes:
-            self.queue.put(None)
-        self.queue.close()
+        if self.journal and not self.resume and os.path.isfile(self.journal):
+            os.unlink(self.journal)
+        if self.executor is None:
+            self.executor = LocalExecutor(processes=self.nprocesses, schedule=self.schedule)
+        self._task_id = self.executor.submit(
+            self.script,
+            directory=self.directory,
+            chdir=self.chdir,
+            permit_nonzero=self.permit_nonzero,
+            weights=self.weights,
+            sealed=self.sealed,
+            journal=self.journal,
+        )
         self.pid = uuid.uuid1().int
-        time.sleep(0.1)
 
 
-class LocalProcess(multiprocessing.Process):
-    """Extension to :obj:`multiprocessing.Process` for :obj:`~pyjob.local.LocalTask`"""
+class LocalExecutor(object):
+    """Long-lived pool of :obj:`~pyjob.local.LocalProcess` workers shared by :obj:`~pyjob.local.LocalTask` instances
 
-    def __init__(self, queue, kill_switch, directory=None, permit_nonzero=False, chdir=False):
-        """Instantiate a :obj:`~pyjob.local.LocalProcess`
+    The executor keeps the queue of pending scripts in the parent process and hands
+    scripts to the workers only as they become idle. This allows to discard the
+    pending scripts of a single :obj:`~pyjob.local.LocalTask` without affecting
+    other tasks attached to the same executor.
+
+    Examples
+    --------
+
+    >>> from pyjob.local import LocalExecutor
+    >>> with LocalExecutor(processes=2) as executor:
+    ...     task_id = executor.submit(['/path/to/script.sh'])
+    ...     executor.wait(task_id)
+
+    With the ``longest`` schedule, pending scripts are dispatched in order of decreasing
+    expected runtime to avoid idle workers at the end of a batch. The expected runtime
+    of a script is its weight at submission, or else its last measured runtime. Runtimes
+    are only measured with the ``longest`` schedule or a ``history`` file, and only the
+    :attr:`~pyjob.local.LocalExecutor.max_runtimes` most recently measured are kept.
+
+    >>> with LocalExecutor(processes=2, schedule='longest', history='runtimes.json') as executor:
+    ...     task_id = executor.submit(['/path/to/short.sh', '/path/to/long.sh'])
+    ...     executor.wait(task_id)
+
+    A worker process that dies, e.g. killed for running out of memory, fails the script
+    it executed and is replaced by a new one.
+
+    Unsealed groups of scripts accept further scripts while they are executed.
+
+    >>> with LocalExecutor(processes=2) as executor:
+    ...     task_id = executor.submit([], sealed=False)
+    ...     executor.extend(task_id, ['/path/to/script.sh'])
+    ...     executor.seal(task_id)
+    ...     executor.wait(task_id)
+
+    """
+
+    def __init__(self, processes=None, schedule='fifo', history=None):
+        """Instantiate a new :obj:`~pyjob.local.LocalExecutor`
 
         Parameters
         ----------
-        queue : :obj:`~multiprocessing.Queue`
-           An instance of a :obj:`~multiprocessing.Queue`
-        kill_switch : obj
-           An instance of a :obj:`~multiprocessing.Event`
+        processes : int, optional
+           The number of worker processes
+        schedule : str, optional
+           The dispatch order of pending scripts, one of ``fifo`` or ``longest`` [default: fifo]
+        history : str, optional
+           A JSON file to load measured runtimes from and to save them to at shutdown
+
+        Raises
+        ------
+        :exc:`ValueError`
+           Unknown schedule
+
+        """
+        if schedule not in SCHEDULES:
+            raise ValueError('Unknown schedule: {}'.format(schedule))
+        self.nprocesses = processes or config.get('processes') or CPU_COUNT
+        self.schedule = schedule
+        self.history = history
+        self.max_runtimes = MAX_RUNTIMES
+        self.runtimes = collections.OrderedDict()
+        if history and os.path.isfile(history):
+            with open(history, 'r') as f:
+                for script, runtime in json.load(f, object_pairs_hook=collections.OrderedDict).items():
+                    self._record(script, runtime)
+        self._results = multiprocessing.Queue()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._counter = itertools.count()
+        self._tasks = {}
+        self._closed = False
+        self._workers = []
+        self._idle = []
+        self._assigned = {}
+        for _ in range(self.nprocesses):
+            self._start_worker()
+        self._collector = threading.Thread(target=self._collect)
+        self._collector.daemon = True
+        self._collector.start()
+
+    def __enter__(self):
+        """Contextmanager entry function
+
+        Note
+        ----
+        For further details see `PEP 343 <https://www.python.org/dev/peps/pep-0343/>`_.
+
+        """
+        return self
+
+    def __exit__(self, *exc):
+        """Contextmanager exit function
+
+        Note
+        ----
+        For further details see `PEP 343 <https://www.python.org/dev/peps/pep-0343/>`_.
+
+        """
+        self.shutdown()
+
+    def __repr__(self):
+        """Representation of the :obj:`~pyjob.local.LocalExecutor`"""
+        return '{}(processes={} tasks={})'.format(self.__class__.__name__, self.nprocesses, len(self._tasks))
+
+    @property
+    def alive(self):
+        """Boolean to indicate that the :obj:`~pyjob.local.LocalExecutor` accepts and processes scripts"""
+        return not self._closed and self._collector.is_alive()
+
+    def submit(
+        self, scripts, directory=None, chdir=False, permit_nonzero=False, weights=None, sealed=True, journal=None
+    ):
+        """Queue one or more scripts for execution
+
+        Parameters
+        ----------
+        scripts : list, tuple
+           The paths to the scripts to execute
         directory : str, optional
-           The directory to execute the jobs in
+           The directory to execute the scripts in
+        chdir : bool, optional
+           Execute each script in its own directory
         permit_nonzero : bool, optional
            Allow non-zero return codes
+        weights : dict, list, tuple, optional
+           The expected relative cost of each script, either aligned with ``scripts``
+           or as a :obj:`dict` keyed by script path
+        sealed : bool, optional
+           Reject further scripts, otherwise see :meth:`~pyjob.local.LocalExecutor.extend` [default: True]
+        journal : str, optional
+           The path to the journal recording each finished script, see :func:`~pyjob.local.append_journal`
 
-        Warning
+        Returns
         -------
-        This object should only be instantiated by :obj:`~pyjob.local.LocalTask`!
+        int
+           The identifier of the submitted group of scripts
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobError`
+           The :obj:`~pyjob.local.LocalExecutor` has been shut down
+        :exc:`ValueError`
+           Number of weights does not match number of scripts
 
         """
-        super(LocalProcess, self).__init__()
-        self.queue = queue
-        self.kill_switch = kill_switch
+        scripts = list(scripts)
+        task_id = uuid.uuid1().int
+        state = _ExecutorTask(directory, chdir, permit_nonzero, sealed, journal)
+        with self._lock:
+            if not self.alive:
+                raise PyJobError('Cannot submit to a shut down executor')
+            costs = self._estimate(scripts, weights)
+            self._tasks[task_id] = state
+            self._push(task_id, state, scripts, costs)
+        return task_id
+
+    def extend(self, task_id, scripts, weights=None):
+        """Queue further scripts for an unsealed group of scripts
+
+        Parameters
+        ----------
+        task_id : int
+           The identifier returned by :meth:`~pyjob.local.LocalExecutor.submit`
+        scripts : list, tuple
+           The paths to the scripts to execute
+        weights : dict, list, tuple, optional
+           See :meth:`~pyjob.local.LocalExecutor.submit`
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobError`
+           The :obj:`~pyjob.local.LocalExecutor` has been shut down or ``task_id`` is sealed
+        :exc:`ValueError`
+           Number of weights does not match number of scripts
+
+        """
+        scripts = list(scripts)
+        with self._lock:
+            if not self.alive:
+                raise PyJobError('Cannot submit to a shut down executor')
+            state = self._tasks.get(task_id)
+            if state is None or state.sealed:
+                raise PyJobError('Cannot extend a sealed group of scripts')
+            costs = self._estimate(scripts, weights)
+            self._push(task_id, state, scripts, costs)
+
+    def seal(self, task_id):
+        """Reject further scripts for ``task_id``, which finishes once its queued scripts have finished
+
+        Parameters
+        ----------
+        task_id : int
+           The identifier returned by :meth:`~pyjob.local.LocalExecutor.submit`
+
+        """
+        callbacks = []
+        with self._lock:
+            state = self._tasks.get(task_id)
+            if state is not None and not state.sealed:
+                state.sealed = True
+                callbacks = self._update(state)
+        self._notify(callbacks)
+
+    def add_done_callback(self, task_id, fn):
+        """Register a :obj:`callable` invoked once all scripts of ``task_id`` have finished
+
+        Parameters
+        ----------
+        task_id : int
+           The identifier returned by :meth:`~pyjob.local.LocalExecutor.submit`
+        fn : callable
+           A :obj:`callable` without arguments
+
+        Note
+        ----
+        ``fn`` is invoked without holding the lock of the :obj:`~pyjob.local.LocalExecutor`
+        from the thread completing the scripts, usually the collector thread, or immediately
+        if the scripts have already finished. Exceptions raised by ``fn`` are logged.
+
+        """
+        with self._lock:
+            state = self._tasks.get(task_id)
+            if state is not None and not state.finished.is_set():
+                state.callbacks.append(fn)
+                return
+        self._notify([fn])
+
+    def done(self, task_id):
+        """Boolean to indicate that all scripts of ``task_id`` have finished"""
+        state = self._tasks.get(task_id)
+        return state is None or state.finished.is_set()
+
+    def results(self, task_id):
+        """Get the :obj:`~pyjob.task.ScriptResult` of each finished script of ``task_id``
+
+        Parameters
+        ----------
+        task_id : int
+           The identifier returned by :meth:`~pyjob.local.LocalExecutor.submit`
+
+        Returns
+        -------
+        list
+           The results in order of completion
+
+        """
+        with self._lock:
+            state = self._tasks.get(task_id)
+            return [] if state is None else list(state.results)
+
+    def wait(self, task_id, timeout=None):
+        """Block until all scripts of ``task_id`` have finished or ``timeout`` expires
+
+        Parameters
+        ----------
+        task_id : int
+           The identifier returned by :meth:`~pyjob.local.LocalExecutor.submit`
+        timeout : int, float, optional
+           The maximum time to block (in seconds)
+
+        Returns
+        -------
+        bool
+           Indicate if all scripts have finished
+
+        """
+        state = self._tasks.get(task_id)
+        if state is None:
+            return True
+        if not self._collector.is_alive():
+            return state.finished.is_set()
+        return state.finished.wait(timeout)
+
+    def cancel(self, task_id):
+        """Discard all scripts of ``task_id`` that have not been started yet and seal it
+
+        Parameters
+        ----------
+        task_id : int
+           The identifier returned by :meth:`~pyjob.local.LocalExecutor.submit`
+
+        """
+        with self._lock:
+            state = self._tasks.get(task_id)
+            if state is None:
+                return
+            state.sealed = True
+            if state.pending > 0:
+                self._pending = [item for item in self._pending if item[2] != task_id]
+                heapq.heapify(self._pending)
+                state.pending = 0
+            callbacks = self._update(state)
+        self._notify(callbacks)
+
+    def release(self, task_id):
+        """Forget all bookkeeping for ``task_id``
+
+        Parameters
+        ----------
+        task_id : int
+           The identifier returned by :meth:`~pyjob.local.LocalExecutor.submit`
+
+        """
+        self.cancel(task_id)
+        with self._lock:
+            self._tasks.pop(task_id, None)
+
+    def shutdown(self):
+        """Discard all pending scripts and stop the workers once the running scripts have finished"""
+        callbacks = []
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            del self._pending[:]
+            for state in self._tasks.values():
+                state.pending = 0
+                state.sealed = True
+                callbacks.extend(self._update(state))
+        self._notify(callbacks)
+        for proc in self._workers:
+            proc.jobs.put(None)
+        for proc in self._workers:
+            proc.join()
+        self._results.put(None)
+        self._collector.join()
+        for proc in self._workers:
+            proc.jobs.close()
+        self._results.close()
+        if self.history:
+            with open(self.history, 'w') as f:
+                json.dump(self.runtimes, f)
+        logger.debug('Shut down %s with %d workers', self.__class__.__name__, len(self._workers))
+
+    def _collect(self):
+        """Collect the results from the workers, replace dead workers and hand out pending scripts"""
+        checked = time.time()
+        while True:
+            try:
+                message = self._results.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                if message is None:
+                    break
+                pid, task_id, result = message
+                callbacks = []
+                with self._lock:
+                    # The script has already failed if its worker was found dead before reporting
+                    assignment = self._assigned.pop(pid, None)
+                    if assignment is not None:
+                        self._idle.append(assignment[0])
+                        callbacks = self._finish(task_id, result)
+                    self._feed()
+                self._notify(callbacks)
+            if time.time() - checked >= WORKER_CHECK_INTERVAL:
+                self._check_workers()
+                checked = time.time()
+
+    def _check_workers(self):
+        """Fail the scripts held by dead workers and replace the workers"""
+        callbacks = []
+        with self._lock:
+            if self._closed:
+                return
+            for proc in [proc for proc in self._workers if not proc.is_alive()]:
+                logger.error('Worker process %d died with exit code %s', proc.pid, proc.exitcode)
+                self._workers.remove(proc)
+                if proc in self._idle:
+                    self._idle.remove(proc)
+                assignment = self._assigned.pop(proc.pid, None)
+                if assignment is not None:
+                    _, task_id, script = assignment
+                    log = os.path.splitext(script)[0] + '.log'
+                    error = 'Worker process died with exit code {}'.format(proc.exitcode)
+                    result = ScriptResult(script, log, None, None, None, None, None, error)
+                    callbacks.extend(self._finish(task_id, result))
+                proc.jobs.close()
+                self._start_worker()
+            self._feed()
+        self._notify(callbacks)
+
+    def _start_worker(self):
+        """Start an idle :obj:`~pyjob.local.LocalProcess` with its own job queue [requires the lock]"""
+        proc = LocalProcess(multiprocessing.Queue(), self._results)
+        proc.daemon = True
+        proc.start()
+        self._workers.append(proc)
+        self._idle.append(proc)
+
+    def _finish(self, task_id, result):
+        """Record the result of a finished script and get the callbacks to invoke [requires the lock]"""
+        if (self.schedule == 'longest' or self.history) and result.wall_time is not None:
+            self._record(result.script, result.wall_time)
+        if result.error:
+            logger.error('Execution of %s failed: %s', result.script, result.error)
+        state = self._tasks.get(task_id)
+        if state is None:
+            return []
+        state.results.append(result)
+        state.running -= 1
+        return self._update(state)
+
+    def _record(self, script, runtime):
+        """Record the measured runtime of ``script``, evicting the least recently measured [requires the lock]"""
+        self.runtimes.pop(script, None)
+        self.runtimes[script] = runtime
+        while len(self.runtimes) > self.max_runtimes:
+            self.runtimes.popitem(last=False)
+
+    def _push(self, task_id, state, scripts, costs):
+        """Queue the scripts of ``task_id`` and hand them to idle workers [requires the lock]"""
+        for script, cost in zip(scripts, costs):
+            heapq.heappush(self._pending, (-cost, next(self._counter), task_id, script))
+            state.pending += 1
+        self._update(state)
+        self._feed()
+
+    def _feed(self):
+        """Hand pending scripts to idle workers [requires the lock]"""
+        while self._idle and self._pending:
+            _, _, task_id, script = heapq.heappop(self._pending)
+            state = self._tasks[task_id]
+            state.pending -= 1
+            state.running += 1
+            if state.chdir:
+                directory = os.path.dirname(script)
+            else:
+                directory = state.directory
+            proc = self._idle.pop()
+            self._assigned[proc.pid] = (proc, task_id, script)
+            proc.jobs.put((task_id, script, directory, state.permit_nonzero, state.journal))
+
+    def _estimate(self, scripts, weights):
+        """Get the expected cost of each script for the ``longest`` schedule [requires the lock]
+
+        Scripts without a weight or measured runtime are assumed to be of average cost.
+
+        """
+        if self.schedule == 'fifo':
+            return [0] * len(scripts)
+        if isinstance(weights, dict):
+            costs = [weights.get(script) for script in scripts]
+        elif weights is not None:
+            costs = list(weights)
+            if len(costs) != len(scripts):
+                raise ValueError('Number of weights does not match number of scripts')
+        else:
+            costs = [None] * len(scripts)
+        costs = [self.runtimes.get(script) if cost is None else cost for script, cost in zip(scripts, costs)]
+        known = [cost for cost in costs if cost is not None]
+        default = sum(known) / len(known) if known else 0
+        return [default if cost is None else cost for cost in costs]
+
+    @staticmethod
+    def _update(state):
+        """Flag the completion of a group of scripts [requires the lock]
+
+        The returned callbacks need to be invoked once the lock is released.
+
+        """
+        callbacks = []
+        if state.sealed and state.pending == 0 and state.running == 0 and not state.finished.is_set():
+            state.finished.set()
+            callbacks, state.callbacks = state.callbacks, []
+        return callbacks
+
+    @staticmethod
+    def _notify(callbacks):
+        """Invoke the done callbacks, so that a failing one cannot stop the collector thread"""
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception:
+                logger.exception('Done callback %r failed', fn)
+
+
+class _ExecutorTask(object):
+    """Bookkeeping for a group of scripts submitted to a :obj:`~pyjob.local.LocalExecutor`"""
+
+    def __init__(self, directory, chdir, permit_nonzero, sealed=True, journal=None):
         self.directory = directory
-        self.permit_nonzero = permit_nonzero
         self.chdir = chdir
+        self.permit_nonzero = permit_nonzero
+        self.sealed = sealed
+        self.journal = journal
+        self.pending = 0
+        self.running = 0
+        self.finished = threading.Event()
+        self.callbacks = []
+        self.results = []
+
+
+class LocalProcess(multiprocessing.Process):
+    """Extension to :obj:`multiprocessing.Process` for :obj:`~pyjob.local.LocalExecutor`"""
+
+    def __init__(self, jobs, results):
+        """Instantiate a :obj:`~pyjob.local.LocalProcess`
+
+        Parameters
+        ----------
+        jobs : :obj:`~multiprocessing.Queue`
+           The :obj:`~multiprocessing.Queue` to receive scripts from
+        results : :obj:`~multiprocessing.Queue`
+           The :obj:`~multiprocessing.Queue` to report the :obj:`~pyjob.task.ScriptResult` of finished scripts
+           to, together with the process identifier of this :obj:`~pyjob.local.LocalProcess`
+
+        Warning
+        -------
+        This object should only be instantiated by :obj:`~pyjob.local.LocalExecutor`!
+
+        """
+        super(LocalProcess, self).__init__()
+        self.jobs = jobs
+        self.results = results
 
     def run(self):
         """Method representing the :obj:`~pyjob.local.LocalProcess` activity"""
-        for job in iter(self.queue.get, None):
-            if self.kill_switch.is_set():
-                continue
-            if self.chdir:
-                directory = os.path.dirname(job)
-            else:
-                directory = self.directory
+        for task_id, job, directory, permit_nonzero, journal in iter(self.jobs.get, None):
             log = os.path.splitext(job)[0] + '.log'
-            with open(log, 'w') as f:
-                cexec([job], cwd=directory, stdout=f, permit_nonzero=self.permit_nonzero)
+            start = time.time()
+            try:
+                result = self.execute(job, directory, log, permit_nonzero)
+            except Exception as e:
+                result = ScriptResult(job, log, None, time.time() - start, None, None, None, str(e))
+            if journal:
+                try:
+                    append_journal(journal, result)
+                except (IOError, OSError) as e:
+                    result = result._replace(error=result.error or 'Cannot write journal: {}'.format(e))
+            self.results.put((os.getpid(), task_id, result))
+
+    @staticmethod
+    def execute(job, directory, log, permit_nonzero):
+        """Execute a script and account for the resources it used
+
+        Parameters
+        ----------
+        job : str
+           The path to the script
+        directory : str
+           The directory to execute the script in
+        log : str
+           The path to the log file
+        permit_nonzero : bool
+           Allow non-zero return codes
+
+        Returns
+        -------
+        :obj:`~pyjob.task.ScriptResult`
+           The outcome and resource usage of the script
+
+        Note
+        ----
+        CPU times and the maximum resident set size are only available on platforms
+        providing :func:`os.wait4`.
+
+        """
+        executable = which(job)
+        if executable is None:
+            return ScriptResult(job, log, None, 0.0, None, None, None, 'Cannot find executable: {}'.format(job))
+        user_time = system_time = max_rss = None
+        with open(log, 'w') as f:
+            start = time.time()
+            p = subprocess.Popen([executable], cwd=directory, stdout=f, stderr=subprocess.STDOUT)
+            if hasattr(os, 'wait4'):
+                _, status, rusage = os.wait4(p.pid, 0)
+                wall_time = time.time() - start
+                p.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+                user_time, system_time = rusage.ru_utime, rusage.ru_stime
+                max_rss = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+            else:
+                p.wait()
+                wall_time = time.time() - start
+        error = None
+        if p.returncode != 0 and not permit_nonzero:
+            error = "Execution of '{}' exited with non-zero return code ({})".format(executable, p.returncode)
+        return ScriptResult(job, log, p.returncode, wall_time, user_time, system_time, max_rss, error)
+
+
+def append_journal(journal, result):
+    """Append the outcome of a finished script to a journal and flush it to disk
+
+    Each record is a single line holding a success flag, the exit code, the wall time
+    and the script path. Records are appended with a single write, so that concurrent
+    writers do not interleave, and are synced before the script is reported as finished.
+
+    Parameters
+    ----------
+    journal : str
+       The path to the journal
+    result : :obj:`~pyjob.task.ScriptResult`
+       The outcome of the script
+
+    """
+    exit_code = '-' if result.exit_code is None else result.exit_code
+    record = '{:d} {} {:.3f} {}\n'.format(result.error is None, exit_code, result.wall_time or 0.0, result.script)
+    fd = os.open(journal, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, record.encode('utf-8'))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_journal(journal):
+    """Read the outcome of each script recorded in a journal
+
+    Parameters
+    ----------
+    journal : str
+       The path to the journal
+
+    Returns
+    -------
+    dict
+       The :obj:`~pyjob.task.ScriptResult` of the last record of each script path
+
+    Note
+    ----
+    Incomplete records, e.g. left behind by a crash, are ignored.
+
+    """
+    records = {}
+    if not journal or not os.path.isfile(journal):
+        return records
+    with open(journal, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                success, exit_code, wall_time, script = line.decode('utf-8').rstrip('\n').split(' ', 3)
+                exit_code = None if exit_code == '-' else int(exit_code)
+                wall_time = float(wall_time)
+            except ValueError:
+                continue
+            error = None if success == '1' else 'Execution failed in a previous run'
+            log = os.path.splitext(script)[0] + '.log'
+            records[script] = ScriptResult(script, log, exit_code, wall_time, None, None, None, error)
+    return records
+
+
+def _resolve_threadsafe(loop, future):
+    """Resolve ``future`` from any thread unless its event loop has been closed"""
+
+    def resolve():
+        if not future.done():
+            future.set_result(True)
+
+    try:
+        loop.call_soon_threadsafe(resolve)
+    except RuntimeError:
+        logger.debug('Event loop closed before task completion')
@@ -24,16 +24,19 @@ __author__ = 'Felix Simkovic'
 __version__ = '1.0'
 
 import logging
+import re
 import time
 import uuid
 
-from pyjob.cexec import cexec
-from pyjob.exception import PyJobExecutableNotFoundError, PyJobError
+from pyjob.cexec import acexec, cexec
 from pyjob.script import Script
 from pyjob.task import ClusterTask
 
 logger = logging.getLogger(__name__)
 
+ACCOUNTING_FIELDS = 'jobid jobindex stat exit_code run_time max_mem delimiter="|"'
+MEMORY_UNITS = {'K': 1, 'M': 1024, 'G': 1024 ** 2, 'T': 1024 ** 3}
+
 
 class LoadSharingFacilityTask(ClusterTask):
     """LoadSharingFacility (LSF) executable :obj:`~pyjob.task.Task`"""
@@ -41,19 +44,70 @@ class LoadSharingFacilityTask(ClusterTask):
     JOB_ARRAY_INDEX = '$LSB_JOBINDEX'
     SCRIPT_DIRECTIVE = '#BSUB'
 
-    @property
-    def info(self):
-        """:obj:`~pyjob.lsf.LoadSharingFacilityTask` information"""
-        if self.pid is None:
-            return {}
-        try:
-            stdout = cexec(['bjobs', '-l', str(self.pid)], permit_nonzero=True)
-        except PyJobExecutableNotFoundError:
-            return {}
-        if 'Done successfully' in stdout:
-            return {}
-        else:
-            return {'job_number': self.pid, 'status': 'Running'}
+    @staticmethod
+    def _status_command(pids):
+        """Utility method to create the bulk status command"""
+        return ['bjobs', '-w'] + list(map(str, pids))
+
+    @staticmethod
+    def _parse_status(stdout, pids):
+        """Utility method to convert the bulk status output into per-job information
+
+        Note
+        ----
+        Array elements share the job identifier, thus the job is active as long as any
+        element has not reached the ``DONE`` or ``EXIT`` state.
+
+        """
+        lookup = {str(pid): pid for pid in pids}
+        data = {}
+        for line in stdout.splitlines():
+            fields = line.split()
+            if len(fields) > 2 and fields[0] in lookup:
+                if fields[2] not in ('DONE', 'EXIT'):
+                    pid = lookup[fields[0]]
+                    data.setdefault(pid, {'job_number': pid, 'status': fields[2]})
+            elif 'not responding' in line or 'LSF is down' in line:
+                return None
+        return data
+
+    def _accounting_command(self):
+        """Utility method to create the accounting command for all array elements"""
+        return ['bjobs', '-a', '-noheader', '-o', ACCOUNTING_FIELDS, str(self.pid)]
+
+    def _parse_accounting(self, stdout):
+        """Utility method to convert the accounting output into a :obj:`dict` keyed by array element
+
+        Note
+        ----
+        Jobs in the ``DONE`` state report no exit code, the CPU times are unavailable.
+
+        """
+        data = {}
+        for line in stdout.splitlines():
+            fields = [field.strip() for field in line.split('|')]
+            if len(fields) != 6 or fields[2] not in ('DONE', 'EXIT'):
+                continue
+            if fields[3].lstrip('-').isdigit():
+                exit_code = int(fields[3])
+            else:
+                exit_code = int(fields[2] == 'EXIT')
+            match = re.match(r'^(\d+)', fields[4])
+            element = int(fields[1]) if fields[1].isdigit() and int(fields[1]) > 0 else None
+            data[element] = {
+                'exit_code': exit_code,
+                'wall_time': float(match.group(1)) if match else None,
+                'max_rss': self._parse_memory(fields[5]),
+            }
+        return data
+
+    @staticmethod
+    def _parse_memory(value):
+        """Utility method to convert an accounting memory size such as ``2 Mbytes`` to kilobytes"""
+        match = re.match(r'^([\d.]+)\s*([KMGT])', value)
+        if match:
+            return int(float(match.group(1)) * MEMORY_UNITS[match.group(2)])
+        return None
 
     def _check_requirements(self):
         """Check if the requirements for task execution are met"""
@@ -79,13 +133,35 @@ class LoadSharingFacilityTask(ClusterTask):
         else:
             raise RuntimeError('Cannot delete task!')
 
-    def _run(self):
-        """Method to initialise :obj:`~pyjob.lsf.LoadSharingFacilityTask` execution"""
-        self.runscript = self._create_runscript()
-        self.runscript.write()
-        stdout = cexec(['bsub'], stdin=str(self.runscript), cwd=self.directory)
-        self.pid = int(stdout.split()[1][1:-1])
-        logger.debug('%s [%d] submission script is %s', self.__class__.__name__, self.pid, self.runscript.path)
+    async def akill(self):
+        """Immediately terminate the :obj:`~pyjob.lsf.LoadSharingFacilityTask` without blocking the event loop
+
+        Raises
+        ------
+        :exc:`RuntimeError`
+           Cannot delete :obj:`~pyjob.lsf.LoadSharingFacilityTask`
+
+        """
+        import asyncio
+
+        if self.pid is None:
+            return
+        stdout = await acexec(['bkill', str(self.pid)], permit_nonzero=True)
+        if "is in progress" in stdout:
+            stdout = await acexec(['bkill', '-b', str(self.pid)], permit_nonzero=True)
+            await asyncio.sleep(10)
+        if any(text in stdout for text in ["has already finished", "is being terminated", "is in progress"]):
+            logger.debug("Terminated task: %d", self.pid)
+        else:
+            raise RuntimeError('Cannot delete task!')
+
+    def _submit_command(self):
+        """Utility method to create the command submitting the ``runscript``"""
+        return ['bsub'], {'stdin': str(self.runscript), 'cwd': self.directory}
+
+    def _parse_pid(self, stdout):
+        """Utility method to extract the job identifier from the submission output"""
+        return int(stdout.split()[1][1:-1])
 
     def _create_runscript(self):
         """Utility method to create runscript"""
@@ -114,15 +190,12 @@ class LoadSharingFacilityTask(ClusterTask):
         if self.extra:
             cmd = ' '.join(map(str, self.extra))
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
-        if len(self.script) > 1:
+        if len(self.script_collector) > 1:
             logf = runscript.path.replace('.script', '.log')
-            jobsf = runscript.path.replace('.script', '.jobs')
-            with open(jobsf, 'w') as f_out:
-                f_out.write('\n'.join(self.script))
-            cmd = '-J {}[{}-{}]%{}'.format(self.name, 1, len(self.script), self.max_array_size)
+            cmd = '-J {}[{}-{}]%{}'.format(self.name, 1, self.array_size, self.max_array_size)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(logf))
-            runscript.extend(self.get_array_bash_extension(jobsf, 1))
+            runscript.extend(self._get_array_extension(runscript, 1))
         else:
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -J {}'.format(self.name))
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(self.log[0]))
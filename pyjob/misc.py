@@ -23,34 +23,63 @@
 __author__ = 'Felix Simkovic'
 __version__ = '1.0'
 
-import chardet.universaldetector
+import locale
 import os
+import random
 import sys
-import tempfile
 import warnings
 
 from pyjob.exception import PyJobError
 
 
-def decode(byte_s):
-    """Decode a string by guessing the encoding
+def decode(byte_s, encoding=None):
+    """Decode a string, guessing the encoding only if necessary
 
     Parameters
     ----------
     byte_s : bytes
        The :obj:`bytes` to decode
+    encoding : str, optional
+       An encoding to try before any other
 
     Returns
     -------
     :obj:`str`
        `byte_s` decoded
 
+    Raises
+    ------
+    :exc:`PyJobError`
+       Unable to infer string encoding
+
+    Note
+    ----
+    `byte_s` is decoded strictly with `encoding`, UTF-8 and the locale's preferred
+    encoding in turn. The comparatively slow encoding detection is only used if all
+    of them fail.
+
+    """
+    for candidate in (encoding, 'utf-8', locale.getpreferredencoding(False)):
+        if not candidate:
+            continue
+        try:
+            return byte_s.decode(candidate)
+        except (LookupError, UnicodeDecodeError):
+            pass
+    return _decode_detected(byte_s)
+
+
+def _decode_detected(byte_s):
+    """Decode a string by detecting the encoding
+
     Raises
     ------
     :exc:`PyJobError`
        Unable to infer string encoding
 
     """
+    import chardet.universaldetector
+
     detector = chardet.universaldetector.UniversalDetector()
     for line in byte_s.splitlines():
         detector.feed(line)
@@ -62,6 +91,66 @@ def decode(byte_s):
     return byte_s.decode(detector.result['encoding'])
 
 
+class ExponentialBackoff(object):
+    """Iterator of exponentially increasing, randomly jittered delays
+
+    Examples
+    --------
+
+    >>> from pyjob.misc import ExponentialBackoff
+    >>> backoff = ExponentialBackoff(initial=1, maximum=30, jitter=0.0)
+    >>> [next(backoff) for _ in range(7)]
+    [1, 2, 4, 8, 16, 30, 30]
+
+    """
+
+    def __init__(self, initial=0.5, maximum=30, factor=2.0, jitter=0.1):
+        """Instantiate a new :obj:`~pyjob.misc.ExponentialBackoff`
+
+        Parameters
+        ----------
+        initial : int, float, optional
+           The first delay (in seconds)
+        maximum : int, float, optional
+           The cap for any delay (in seconds)
+        factor : int, float, optional
+           The multiplier applied after each delay
+        jitter : float, optional
+           The maximum relative deviation applied randomly to each delay
+
+        Raises
+        ------
+        :exc:`ValueError`
+           Invalid parameters
+
+        """
+        if initial <= 0 or maximum <= 0 or factor < 1 or not 0 <= jitter < 1:
+            raise ValueError('Invalid backoff parameters')
+        self.initial = min(initial, maximum)
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self._current = self.initial
+
+    def __iter__(self):
+        """Iterator function"""
+        return self
+
+    def __next__(self):
+        """Get the next delay"""
+        delay = self._current
+        self._current = min(self._current * self.factor, self.maximum)
+        if self.jitter:
+            delay = min(delay * random.uniform(1 - self.jitter, 1 + self.jitter), self.maximum)
+        return delay
+
+    next = __next__
+
+    def reset(self):
+        """Restart the sequence from the initial delay"""
+        self._current = self.initial
+
+
 def deprecate(version, msg=None):
     """Decorator to deprecate Python classes and functions
 
@@ -27,15 +27,15 @@ import logging
 import re
 import uuid
 
-from pyjob.cexec import cexec
-from pyjob.exception import PyJobExecutableNotFoundError, PyJobError
 from pyjob.script import Script
 from pyjob.task import ClusterTask
 
 logger = logging.getLogger(__name__)
 
-RE_LINE_SPLIT_1 = re.compile(r":\\s+")
-RE_LINE_SPLIT_2 = re.compile(r"\\s+=\\s+")
+RE_JOB_NUMBER = re.compile(r"^\d+")
+RE_JOB_ID = re.compile(r"^Job Id:\s*\d+(?:\[(?P<element>\d*)\])?")
+
+MEMORY_UNITS = {'b': 1.0 / 1024, 'kb': 1, 'mb': 1024, 'gb': 1024 ** 2, 'tb': 1024 ** 3}
 
 
 class PortableBatchSystemTask(ClusterTask):
@@ -44,52 +44,112 @@ class PortableBatchSystemTask(ClusterTask):
     JOB_ARRAY_INDEX = '$PBS_ARRAYID'
     SCRIPT_DIRECTIVE = '#PBS'
 
-    @property
-    def info(self):
-        """:obj:`~pyjob.pbs.PortableBatchSystemTask` information"""
-        if self.pid is None:
-            return {}
-        try:
-            stdout = cexec(['qstat', '-f', str(self.pid)], permit_nonzero=True)
-        except PyJobExecutableNotFoundError:
-            return {}
-        all_lines = stdout.splitlines()
-        data = {}
-        key, job_id = RE_LINE_SPLIT_1.split(all_lines[0], 1)
-        data[key] = job_id
-        for line in all_lines[1:]:
-            line = line.strip()
-            if 'Unknown queue destination' in line:
-                return data
-            else:
-                kv = RE_LINE_SPLIT_2.split(line, 1)
-                if len(kv) == 2:
-                    data[kv[0]] = kv[1]
-        return data
-
     def _check_requirements(self):
         """Check if the requirements for task execution are met"""
         self._ensure_exec_available('qstat')
 
-    def kill(self):
-        """Immediately terminate the :obj:`~pyjob.pbs.PortableBatchSystemTask`"""
-        if self.pid is None:
-            return
-        cexec(['qdel', str(self.pid)])
-        logger.debug("Terminated task: %d", self.pid)
+    @staticmethod
+    def _status_command(pids):
+        """Utility method to create the bulk status command"""
+        return ['qstat'] + list(map(str, pids))
+
+    @staticmethod
+    def _parse_status(stdout, pids):
+        """Utility method to convert the bulk status output into per-job information
+
+        Note
+        ----
+        Jobs in the completed (``C``) or finished (``F``) state are no longer active.
+
+        """
+        lookup = {}
+        for pid in pids:
+            match = RE_JOB_NUMBER.match(str(pid))
+            if match:
+                lookup[match.group(0)] = pid
+        data = {}
+        for line in stdout.splitlines():
+            fields = line.split()
+            match = RE_JOB_NUMBER.match(fields[0]) if fields else None
+            if len(fields) > 4 and match and match.group(0) in lookup:
+                if fields[4] not in ('C', 'F'):
+                    pid = lookup[match.group(0)]
+                    data.setdefault(pid, {'job_number': pid, 'status': fields[4]})
+            elif 'cannot connect' in line:
+                return None
+        return data
+
+    def _accounting_command(self):
+        """Utility method to create the accounting command for all array elements"""
+        return ['qstat', '-x', '-f', '-t', str(self.pid)]
 
-    def _run(self):
-        """Method to initialise :obj:`~pyjob.pbs.PortableBatchSystemTask` execution"""
-        self.runscript = self._create_runscript()
-        self.runscript.write()
-        self.pid = cexec(['qsub', self.runscript.path], cwd=self.directory)
-        logger.debug('%s [%d] submission script is %s', self.__class__.__name__, self.pid, self.runscript.path)
+    def _parse_accounting(self, stdout):
+        """Utility method to convert the accounting output into a :obj:`dict` keyed by array element
+
+        Note
+        ----
+        Only the combined CPU time is reported, thus user and system times are unavailable.
+        An exit status above 256 indicates a job terminated by signal ``exit_status - 256``.
+
+        """
+        data = {}
+        for block in re.split(r'^(?=Job Id:)', stdout, flags=re.M):
+            match = RE_JOB_ID.match(block)
+            if not match or match.group('element') == '':
+                continue
+            fields = {}
+            for line in block.splitlines()[1:]:
+                key, _, value = line.partition('=')
+                fields[key.strip().lower()] = value.strip()
+            if not fields.get('exit_status'):
+                continue
+            exit_code = int(fields['exit_status'])
+            element = int(match.group('element')) if match.group('element') else None
+            data[element] = {
+                'exit_code': 256 - exit_code if exit_code > 256 else exit_code,
+                'wall_time': self._parse_time(fields.get('resources_used.walltime')),
+                'max_rss': self._parse_memory(fields.get('resources_used.mem')),
+            }
+        return data
+
+    @staticmethod
+    def _parse_time(value):
+        """Utility method to convert an accounting time such as ``HH:MM:SS`` to seconds"""
+        if not value:
+            return None
+        seconds = 0.0
+        for part in value.split(':'):
+            seconds = seconds * 60 + float(part)
+        return seconds
+
+    @staticmethod
+    def _parse_memory(value):
+        """Utility method to convert an accounting memory size such as ``1480kb`` to kilobytes"""
+        match = re.match(r'^(\d+)([kmgt]?b)$', (value or '').lower())
+        if match:
+            return int(int(match.group(1)) * MEMORY_UNITS[match.group(2)])
+        return None
+
+    def _kill_command(self):
+        """Utility method to create the command terminating the :obj:`~pyjob.pbs.PortableBatchSystemTask`"""
+        return ['qdel', str(self.pid)]
+
+    def _submit_command(self):
+        """Utility method to create the command submitting the ``runscript``"""
+        return ['qsub', self.runscript.path], {'cwd': self.directory}
+
+    def _parse_pid(self, stdout):
+        """Utility method to extract the job identifier from the submission output"""
+        return stdout
 
     def _create_runscript(self):
         """Utility method to create runscript"""
         runscript = Script(directory=self.directory, prefix='pbs_', suffix='.script', stem=str(uuid.uuid1().int))
         runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -V')
         runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -N {}'.format(self.name))
+        if self.dependency:
+            cmd = '-W depend=afterok:{}'.format(':'.join(str(d).strip() for d in self.dependency))
+            runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
         if self.directory:
             cmd = '-w {}'.format(self.directory)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
@@ -111,16 +171,13 @@ class PortableBatchSystemTask(ClusterTask):
         if self.extra:
             cmd = ' '.join(map(str, self.extra))
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
-        if len(self.script) > 1:
+        if len(self.script_collector) > 1:
             logf = runscript.path.replace('.script', '.log')
-            jobsf = runscript.path.replace('.script', '.jobs')
-            with open(jobsf, 'w') as f_out:
-                f_out.write('\n'.join(self.script))
-            cmd = '-t {}-{}%{}'.format(1, len(self.script), self.max_array_size)
+            cmd = '-t {}-{}%{}'.format(1, self.array_size, self.max_array_size)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(logf))
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -e {}'.format(logf))
-            runscript.extend(self.get_array_bash_extension(jobsf, 0))
+            runscript.extend(self._get_array_extension(runscript, 0))
         else:
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(self.log[0]))
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -e {}'.format(self.log[0]))
@@ -25,7 +25,6 @@ __date__ = '29 Jul 2018'
 __version__ = '1.0'
 
 import multiprocessing.pool
-import sys
 
 from pyjob import config
 
@@ -45,11 +44,3 @@ class Pool(multiprocessing.pool.Pool):
     def __init__(self, *args, **kwargs):
         processes = kwargs.pop('processes') or config.get('processes') or None
         super(Pool, self).__init__(processes=processes, *args, **kwargs)
-
-    if sys.version_info.major < 3:
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            self.terminate()
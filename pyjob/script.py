@@ -25,12 +25,17 @@ __contributors__ = ['Adam Simpkin']
 __version__ = '1.0'
 
 import enum
+import errno
+import functools
+import itertools
+import logging
 import os
+import string
 import sys
+import time
 
 from pyjob.cexec import is_exe
 from pyjob.exception import PyJobError
-from pyjob.pool import Pool
 
 
 @enum.unique
@@ -60,6 +65,13 @@ else:
 
 SCRIPT_HEADER, SCRIPT_EXT = (ScriptProperty.SHELL.shebang, ScriptProperty.SHELL.suffix)
 
+DUMP_THREADS = 16
+DUMP_SERIAL_LIMIT = 64
+DUMP_BATCH_SIZE = 4096
+CREATE_CHUNKSIZE = 16
+
+logger = logging.getLogger(__name__)
+
 
 class ScriptCollector(object):
     """A :obj:`~pyjob.script.ScriptCollector` to store executable :obj:`~pyjob.script.Script` instances
@@ -72,30 +84,64 @@ class ScriptCollector(object):
     >>> for _ in range(5):
     ...     collector.add(Script())
 
+    Note
+    ----
+    Scripts added by path are only validated on addition and read from disk when iterated,
+    scripts of a :obj:`~pyjob.script.ScriptTemplate` are rendered when iterated.
+    :attr:`~pyjob.script.ScriptCollector.paths` and :attr:`~pyjob.script.ScriptCollector.logs`
+    are derived without reading or rendering any script.
+
     """
 
     def __init__(self, scripts):
         """Instantiate a new :obj:`~pyjob.script.ScriptCollector`"""
         self._container = []
+        self._size = 0
         self._save_script(scripts)
 
     def __iter__(self):
         """Iterator function"""
-        for script in self._container:
-            yield script
+        for entry in self._container:
+            if isinstance(entry, ScriptTemplate):
+                for script in entry:
+                    yield script
+            else:
+                yield Script.read(entry) if isinstance(entry, str) else entry
 
     def __len__(self):
         """Length function"""
-        return len(self._container)
+        return self._size
 
     def __repr__(self):
         """Representation function"""
         return '{}(nscripts={})'.format(self.__class__.__name__, len(self))
 
+    @property
+    def logs(self):
+        """The log file paths of all scripts"""
+        logs = []
+        for entry in self._container:
+            if isinstance(entry, ScriptTemplate):
+                logs.extend(entry.logs)
+            else:
+                logs.append(_log_path(entry) if isinstance(entry, str) else entry.log)
+        return logs
+
+    @property
+    def paths(self):
+        """The script file paths of all scripts"""
+        paths = []
+        for entry in self._container:
+            if isinstance(entry, ScriptTemplate):
+                paths.extend(entry.paths)
+            else:
+                paths.append(entry if isinstance(entry, str) else entry.path)
+        return paths
+
     @property
     def scripts(self):
         """The script file paths"""
-        return self._container
+        return list(self)
 
     @scripts.setter
     def scripts(self, scripts):
@@ -113,6 +159,7 @@ class ScriptCollector(object):
 
         """
         self._container = []
+        self._size = 0
         self._save_script(scripts)
 
     def add(self, scripts):
@@ -120,7 +167,7 @@ class ScriptCollector(object):
 
         Parameters
         ----------
-        script : :obj:`~pyjob.script.Script`, str, list, tuple
+        script : :obj:`~pyjob.script.Script`, :obj:`~pyjob.script.ScriptTemplate`, str, list, tuple
            Something representing one or more scripts
 
         Raises
@@ -131,18 +178,107 @@ class ScriptCollector(object):
         """
         self._save_script(scripts)
 
-    def dump(self):
-        """Write all scripts to disk if not already done"""
-        for script in self._container:
-            if not os.path.isfile(script.path):
-                script.write()
+    def bundle(self, datafile, indexfile):
+        """Serialise all :obj:`~pyjob.script.Script` instances into a single data file
+
+        The contents of all scripts are concatenated into ``datafile``. The ``indexfile``
+        holds one fixed-width record per script with the byte offset and length of its
+        content in ``datafile`` and the path to its log, so that each script can be
+        extracted without scanning either file.
+
+        Parameters
+        ----------
+        datafile : str
+           The path to the file holding the concatenated script contents
+        indexfile : str
+           The path to the file holding the index records
+
+        Returns
+        -------
+        int
+           The width of each index record (in bytes)
+
+        """
+        records = []
+        offset = 0
+        with open(datafile, 'wb') as f_out:
+            for script in self:
+                content = (str(script) + '\n').encode('utf-8')
+                f_out.write(content)
+                records.append(b' '.join([str(offset).encode(), str(len(content)).encode(), os.fsencode(script.log)]))
+                offset += len(content)
+        width = max(len(record) for record in records) + 1
+        with open(indexfile, 'wb') as f_out:
+            f_out.writelines(record.ljust(width - 1) + b'\n' for record in records)
+        return width
+
+    def dump(self, processes=None):
+        """Write all scripts to disk if not already done
+
+        Parameters
+        ----------
+        processes : int, optional
+           The number of threads writing scripts concurrently [default: ``dump_threads`` configuration or 16]
+
+        Returns
+        -------
+        int
+           The number of scripts written
+
+        Note
+        ----
+        Existing scripts are detected by the exclusive creation of each file rather than
+        a separate existence check. Small collections are written serially. Concurrent writes
+        pay off on high-latency shared file systems, much less so on local disks. Scripts of a
+        :obj:`~pyjob.script.ScriptTemplate` are rendered and written in batches.
+
+        """
+        from pyjob import config
+
+        start = time.time()
+        # Scripts read from disk already exist and are not materialised again
+        nscripts = self._size - sum(isinstance(entry, str) for entry in self._container)
+        nthreads = min(processes or config.get('dump_threads') or DUMP_THREADS, nscripts)
+        if nthreads > 1 and nscripts > DUMP_SERIAL_LIMIT:
+            from multiprocessing.pool import ThreadPool
+
+            pool = ThreadPool(processes=nthreads)
+            try:
+                written = 0
+                for batch in _batched(self._unwritten(), DUMP_BATCH_SIZE):
+                    chunksize = max(1, len(batch) // (nthreads * 4))
+                    written += sum(pool.imap_unordered(_write_exclusive, batch, chunksize=chunksize))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            written = sum(_write_exclusive(script) for script in self._unwritten())
+        elapsed = time.time() - start
+        if written:
+            logger.debug(
+                'Wrote %d of %d scripts in %.3fs (%.0f scripts/s)',
+                written,
+                nscripts,
+                elapsed,
+                written / elapsed if elapsed > 0 else float('inf'),
+            )
+        return written
+
+    def _unwritten(self):
+        """Iterate over all scripts not read from disk, rendering templates on the fly"""
+        for entry in self._container:
+            if isinstance(entry, ScriptTemplate):
+                for script in entry:
+                    yield script
+            elif not isinstance(entry, str):
+                yield entry
 
     def _save_script(self, script):
         """Helper function to assess/standardise executable input
 
         Parameters
         ----------
-        script : :obj:`~pyjob.executable.Script`, str, list, tuple
+        script : :obj:`~pyjob.executable.Script`, :obj:`~pyjob.script.ScriptTemplate`, str, list, tuple
            Something representing one or more executables
 
         Raises
@@ -155,9 +291,13 @@ class ScriptCollector(object):
             return
         elif isinstance(script, Script):
             self._container.append(script)
-        elif isinstance(script, str):
-            script = Script.read(script)
+            self._size += 1
+        elif isinstance(script, ScriptTemplate):
             self._container.append(script)
+            self._size += len(script)
+        elif isinstance(script, str):
+            self._container.append(_check_script_path(script))
+            self._size += 1
         elif isinstance(script, (list, tuple)):
             for s in script:
                 self._save_script(s)
@@ -178,8 +318,16 @@ class Script(list):
     #!/bin/bash
     sleep 5
 
+    Note
+    ----
+    :obj:`~pyjob.script.Script` uses ``__slots__`` to reduce the memory of large collections,
+    so arbitrary attributes cannot be set on its instances. Subclasses without ``__slots__``
+    can hold further attributes.
+
     """
 
+    __slots__ = ('_directory', '_shebang', '_suffix', 'prefix', 'stem', '__weakref__')
+
     def __init__(
         self,
         shebang=ScriptProperty.SHELL.shebang,
@@ -247,12 +395,12 @@ class Script(list):
     @directory.setter
     def directory(self, directory):
         """Setter method for :attr:`~pyjob.script.Script.directory`"""
-        self._directory = os.path.abspath(directory)
+        self._directory = sys.intern(os.path.abspath(directory))
 
     @property
     def log(self):
         """Path to the log of the the :obj:`~pyjob.script.Script`"""
-        return self.path.rsplit('.', 1)[0] + '.log'
+        return _log_path(self.path)
 
     @property
     def path(self):
@@ -281,12 +429,36 @@ class Script(list):
             raise ValueError('Script suffix required!')
         self._suffix = value
 
-    def write(self):
-        """Write the :obj:`~pyjob.script.Script` to :attr:`~pyjob.script.Script.path`"""
-        fname = self.path
-        with open(fname, 'w') as f_out:
+    def write(self, exclusive=False):
+        """Write the :obj:`~pyjob.script.Script` to :attr:`~pyjob.script.Script.path`
+
+        Parameters
+        ----------
+        exclusive : bool, optional
+           Only write the :obj:`~pyjob.script.Script` if the file does not exist yet [default: False]
+
+        Returns
+        -------
+        bool
+           Indicate if the :obj:`~pyjob.script.Script` was written
+
+        Note
+        ----
+        New files are created executable with the permissions applied by the ``open`` call itself.
+
+        """
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_EXCL if exclusive else os.O_TRUNC)
+        try:
+            fd = os.open(self.path, flags, 0o777)
+        except OSError as e:
+            if exclusive and e.errno == errno.EEXIST:
+                return False
+            raise
+        if not exclusive and hasattr(os, 'fchmod'):
+            os.fchmod(fd, 0o777)
+        with os.fdopen(fd, 'w') as f_out:
             f_out.write(str(self))
-        os.chmod(fname, 0o777)
+        return True
 
     def cleanup(self):
         """Cleanup :attr:`~pyjob.script.Script.path` and :attr:`~pyjob.script.Script.log` files if they exist"""
@@ -296,8 +468,9 @@ class Script(list):
         if os.path.isfile(self.log):
             os.remove(self.log)
         # This bit is for cluster tasks
-        if os.path.isfile(self.path.replace('.script', '.jobs')):
-            os.remove(self.path.replace('.script', '.jobs'))
+        for ext in ('.jobs', '.bundle', '.index'):
+            if os.path.isfile(self.path.replace('.script', ext)):
+                os.remove(self.path.replace('.script', ext))
 
     @staticmethod
     def read(path):
@@ -336,6 +509,157 @@ class Script(list):
         return script
 
 
+class ScriptTemplate(object):
+    """A shared command template rendered into one :obj:`~pyjob.script.Script` per parameter
+
+    Only the template and the parameters are held in memory. Each :obj:`~pyjob.script.Script`
+    is rendered when the :obj:`~pyjob.script.ScriptTemplate` is iterated, e.g. when its
+    :obj:`~pyjob.script.ScriptCollector` writes the scripts to disk, and its path and log
+    are derived from its position in ``parameters``.
+
+    Examples
+    --------
+
+    >>> from pyjob.script import ScriptCollector, ScriptTemplate
+    >>> template = ScriptTemplate('run --input {} --seed {index}', ['a.pdb', 'b.pdb'], prefix='job_', stem='')
+    >>> collector = ScriptCollector(template)
+    >>> print(template.render(1))
+    #!/bin/bash
+    run --input b.pdb --seed 1
+    >>> template.paths
+    ['/path/to/job_0.sh', '/path/to/job_1.sh']
+
+    """
+
+    def __init__(
+        self,
+        template,
+        parameters,
+        shebang=ScriptProperty.SHELL.shebang,
+        directory='.',
+        prefix='tmp',
+        stem='pyjob',
+        suffix=ScriptProperty.SHELL.suffix,
+    ):
+        """Instantiate a new :obj:`~pyjob.script.ScriptTemplate`
+
+        Parameters
+        ----------
+        template : str, list, tuple
+           The script content as format string, or a :obj:`list` of format strings per line. The
+           fields are filled with a :obj:`dict` parameter as keyword arguments, a :obj:`tuple` or
+           :obj:`list` parameter as positional arguments and any other parameter as single
+           positional argument. The ``index`` field holds the position of the parameter.
+        parameters : list, tuple, range, iterable
+           The parameters, one for each :obj:`~pyjob.script.Script`
+        shebang : str, optional
+           The Shebang line in each :obj:`~pyjob.script.Script`
+        directory : str, optional
+           The directory for :obj:`~pyjob.script.Script` storage
+        prefix : str, optional
+           The :obj:`~pyjob.script.Script` filename prefix
+        stem : str, optional
+           The :obj:`~pyjob.script.Script` filename middle, followed by the parameter index
+        suffix : str, optional
+           The :obj:`~pyjob.script.Script` filename suffix
+
+        Raises
+        ------
+        :exc:`ValueError`
+           Script suffix required
+        :exc:`ValueError`
+           Invalid template or field not provided by the first parameter
+
+        Note
+        ----
+        Sequences such as :obj:`range` are used as given, any other iterable is converted to a :obj:`list`.
+
+        Note
+        ----
+        Literal braces in the template need to be doubled, e.g. ``${{HOME}}`` for ``${HOME}``
+        or ``awk '{{print $1}}'`` for ``awk '{print $1}'``. The template is checked by rendering
+        the first parameter.
+
+        """
+        if suffix is None or len(suffix) < 1 or '.' not in suffix:
+            raise ValueError('Script suffix required!')
+        if not isinstance(template, str):
+            template = '\n'.join(template)
+        try:
+            list(string.Formatter().parse(template))
+        except ValueError as e:
+            raise ValueError('Invalid template, literal braces need to be doubled: {}'.format(e))
+        if not (hasattr(parameters, '__len__') and hasattr(parameters, '__getitem__')):
+            parameters = list(parameters)
+        self.template = template
+        self.parameters = parameters
+        self.shebang = shebang
+        self.directory = os.path.abspath(directory)
+        self.prefix = prefix
+        self.stem = stem
+        self.suffix = suffix
+        if len(self) > 0:
+            try:
+                self.render(0)
+            except (IndexError, KeyError) as e:
+                msg = 'Template field {} not provided by the parameters, literal braces need to be doubled'
+                raise ValueError(msg.format(e))
+
+    def __iter__(self):
+        """Iterator function"""
+        for i in range(len(self)):
+            yield self.render(i)
+
+    def __len__(self):
+        """Length function"""
+        return len(self.parameters)
+
+    def __repr__(self):
+        """Representation function"""
+        return '{}(nscripts={})'.format(self.__class__.__name__, len(self))
+
+    @property
+    def logs(self):
+        """The log file paths of all scripts"""
+        return [_log_path(path) for path in self.paths]
+
+    @property
+    def paths(self):
+        """The script file paths of all scripts"""
+        head = os.path.join(self.directory, self.prefix + self.stem)
+        return [head + str(i) + self.suffix for i in range(len(self))]
+
+    def render(self, index):
+        """Render the :obj:`~pyjob.script.Script` for the parameter at ``index``
+
+        Parameters
+        ----------
+        index : int
+           The position of the parameter
+
+        Returns
+        -------
+        :obj:`~pyjob.script.Script`
+
+        """
+        parameter = self.parameters[index]
+        if isinstance(parameter, dict):
+            content = self.template.format(index=index, **parameter)
+        elif isinstance(parameter, (list, tuple)):
+            content = self.template.format(*parameter, index=index)
+        else:
+            content = self.template.format(parameter, index=index)
+        script = Script(
+            shebang=self.shebang,
+            directory=self.directory,
+            prefix=self.prefix,
+            stem=self.stem + str(index),
+            suffix=self.suffix,
+        )
+        script.extend(content.splitlines())
+        return script
+
+
 class LocalScriptCreator(object):
     """A :obj:`~pyjob.script.ScriptCollector` to store executable :obj:`~pyjob.script.Script`
     instances created in parallel using an input ``func`` to create the scripts.
@@ -347,9 +671,14 @@ class LocalScriptCreator(object):
     >>> script_creator = LocalScriptCreator(func, iterable, processes)
     >>> collector = script_creator.collector
 
+    For very large ``iterable`` instances, the scripts can be written to disk as they are created
+    so that only their paths are kept in memory.
+
+    >>> collector = script_creator.dump()
+
     """
 
-    def __init__(self, func=None, iterable=None, processes=1):
+    def __init__(self, func=None, iterable=None, processes=1, chunksize=None):
         """Instantiate a new :obj:`~pyjob.script.LocalScriptCreator`
 
         Parameters
@@ -360,22 +689,121 @@ class LocalScriptCreator(object):
             iterable argument to input into func
         processes : int
             Number of processes to generate scripts with
+        chunksize : int, optional
+            Number of items of ``iterable`` sent to a process at once [default: 16]
 
         """
         self.func = func
         self.iterable = iterable
         self.processes = processes
+        self.chunksize = chunksize
 
     def __call__(self, i):
         return self.func(i)
 
     @property
     def collector(self):
+        """The :obj:`~pyjob.script.ScriptCollector` with all scripts in the order of ``iterable``"""
+        script_collector = ScriptCollector(None)
+        for script in self._imap(self.func, ordered=True):
+            script_collector.add(script)
+        return script_collector
+
+    def dump(self):
+        """Create all scripts and write them to disk in the worker processes
+
+        Returns
+        -------
+        :obj:`~pyjob.script.ScriptCollector`
+           The :obj:`~pyjob.script.ScriptCollector` with the paths to all scripts in order of completion
+
+        """
         script_collector = ScriptCollector(None)
-        with Pool(processes=self.processes) as pool:
-            script_collector.add(pool.map(self, self.iterable))
+        for path in self._imap(functools.partial(_create_and_write, self.func), ordered=False):
+            script_collector.add(path)
         return script_collector
 
+    def _imap(self, func, ordered):
+        """Apply ``func`` to all items of ``iterable`` in parallel and yield the results as they arrive
+
+        Note
+        ----
+        At most a few chunks per process are in flight, so that neither the items nor the
+        results pile up in memory while the parent is busy. A new item is fed to the workers
+        whenever a result is consumed, so the workers never run dry between chunks.
+
+        """
+        import threading
+
+        from pyjob import config
+        from pyjob.pool import Pool
+
+        chunksize = self.chunksize or CREATE_CHUNKSIZE
+        nprocesses = self.processes or config.get('processes') or os.cpu_count() or 1
+        slots = threading.Semaphore(chunksize * nprocesses * 4)
+        stopped = threading.Event()
+
+        def feed():
+            for item in self.iterable:
+                # Poll the flag so that an abandoned generator does not block the pool's shutdown
+                while not slots.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                yield item
+
+        with Pool(processes=nprocesses) as pool:
+            imap = pool.imap if ordered else pool.imap_unordered
+            try:
+                for result in imap(func, feed(), chunksize=chunksize):
+                    slots.release()
+                    yield result
+            finally:
+                stopped.set()
+
+
+def _batched(iterable, size):
+    """Split ``iterable`` into :obj:`list` instances of at most ``size`` items"""
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
+
+
+def _create_and_write(func, item):
+    """Create a :obj:`~pyjob.script.Script` with ``func`` and write it to disk"""
+    script = func(item)
+    script.write()
+    return script.path
+
+
+def _check_script_path(path):
+    """Validate the path to an existing script file and return its absolute path
+
+    Raises
+    ------
+    :exc:`ValueError`
+       Script suffix required
+    :exc:`IOError`
+       Script file not found
+
+    """
+    if '.' not in os.path.splitext(path)[1]:
+        raise ValueError('Script suffix required!')
+    if not os.path.isfile(path):
+        raise IOError(errno.ENOENT, 'No such file', path)
+    return os.path.abspath(path)
+
+
+def _log_path(path):
+    """Get the log file path for the script at ``path``"""
+    return path.rsplit('.', 1)[0] + '.log'
+
+
+def _write_exclusive(script):
+    """Write a :obj:`~pyjob.script.Script` unless its file exists"""
+    return script.write(exclusive=True)
+
 
 def is_valid_script_path(fname):
     """Validate a script path
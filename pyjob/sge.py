@@ -24,18 +24,18 @@ __author__ = 'Felix Simkovic'
 __version__ = '1.0'
 
 from enum import Enum
+import getpass
 import re
 import uuid
 import logging
 
 from pyjob.cexec import cexec
-from pyjob.exception import PyJobError, PyJobExecutableNotFoundError
+from pyjob.exception import PyJobError
 from pyjob.script import Script
 from pyjob.task import ClusterTask
 
 logger = logging.getLogger(__name__)
 
-RE_LINE_SPLIT = re.compile(r":\s+")
 RE_PID_MATCH = re.compile(r"Your job.*has been submitted")
 
 
@@ -51,28 +51,6 @@ class SunGridEngineTask(ClusterTask):
     SCRIPT_DIRECTIVE = '#$'
     _sge_avail_configs_by_env = {}
 
-    @property
-    def info(self):
-        """:obj:`~pyjob.sge.SunGridEngineTask` information"""
-        if self.pid is None:
-            return {}
-        try:
-            stdout = cexec(["qstat", "-j", str(self.pid)], permit_nonzero=True)
-        except PyJobExecutableNotFoundError:
-            return {}
-        data = {}
-        for line in stdout.splitlines():
-            line = line.strip()
-            if 'jobs do not exist' in line:
-                return data
-            if not line or "=" * 30 in line:
-                continue
-            else:
-                kv = RE_LINE_SPLIT.split(line, 1)
-                if len(kv) == 2:
-                    data[kv[0]] = kv[1]
-        return data
-
     @classmethod
     def get_sge_avail_configs(cls, param):
         """Get the set of available configurations for a given SGE parameter
@@ -111,7 +89,7 @@ class SunGridEngineTask(ClusterTask):
             if len(line) > 1:
                 break
             else:
-                config.append(line[0].encode('utf-8'))
+                config.append(line[0])
 
         cls._sge_avail_configs_by_env[param] = set(config)
         return cls._sge_avail_configs_by_env[param]
@@ -131,26 +109,73 @@ class SunGridEngineTask(ClusterTask):
             raise PyJobError('Requested queue {} cannot be found. List of available queues: {}'
                              ''.format(self.environment, sge_config_by_queue))
 
-    def kill(self):
-        """Immediately terminate the :obj:`~pyjob.sge.SunGridEngineTask`"""
-        if self.pid is None:
-            return
-        cexec(['qdel', str(self.pid)])
-        logger.debug("Terminated task: %d", self.pid)
-
-    def _run(self):
-        """Method to initialise :obj:`~pyjob.sge.SunGridEngineTask` execution"""
-        self.runscript = self._create_runscript()
-        self.runscript.write()
-        stdout = cexec(['qsub', self.runscript.path], cwd=self.directory)
+    @staticmethod
+    def _status_command(pids):
+        """Utility method to create the bulk status command"""
+        return ['qstat', '-u', getpass.getuser()]
+
+    @staticmethod
+    def _parse_status(stdout, pids):
+        """Utility method to convert the bulk status output into per-job information"""
+        lookup = {str(pid): pid for pid in pids}
+        data = {}
+        for line in stdout.splitlines():
+            fields = line.split()
+            if len(fields) > 4 and fields[0] in lookup:
+                pid = lookup[fields[0]]
+                data.setdefault(pid, {'job_number': pid, 'status': fields[4]})
+            elif line.startswith('error'):
+                return None
+        return data
+
+    def _accounting_command(self):
+        """Utility method to create the accounting command for all array elements"""
+        return ['qacct', '-j', str(self.pid)]
+
+    def _parse_accounting(self, stdout):
+        """Utility method to convert the accounting output into a :obj:`dict` keyed by array element"""
+        data = {}
+        for block in re.split(r'^=+\s*$', stdout, flags=re.M):
+            fields = dict(line.split(None, 1) for line in block.splitlines() if len(line.split(None, 1)) == 2)
+            if 'exit_status' not in fields:
+                continue
+            taskid = fields.get('taskid', 'undefined').strip()
+            element = int(taskid) if taskid.isdigit() else None
+            data[element] = {
+                'exit_code': int(fields['exit_status'].split()[0]),
+                'wall_time': self._parse_seconds(fields.get('ru_wallclock')),
+                'user_time': self._parse_seconds(fields.get('ru_utime')),
+                'system_time': self._parse_seconds(fields.get('ru_stime')),
+                'max_rss': int(float(fields['ru_maxrss'])) if 'ru_maxrss' in fields else None,
+            }
+        return data
+
+    @staticmethod
+    def _parse_seconds(value):
+        """Utility method to convert an accounting time such as ``12.5s`` to seconds"""
+        if value is None:
+            return None
+        return float(value.strip().rstrip('s'))
+
+    def _kill_command(self):
+        """Utility method to create the command terminating the :obj:`~pyjob.sge.SunGridEngineTask`"""
+        return ['qdel', str(self.pid)]
+
+    def _submit_command(self):
+        """Utility method to create the command submitting the ``runscript``"""
+        return ['qsub', self.runscript.path], {'cwd': self.directory}
+
+    def _parse_pid(self, stdout):
+        """Utility method to extract the job identifier from the submission output"""
+        pid = None
         for line in stdout.split('\n'):
             line = line.strip()
             if re.match(RE_PID_MATCH, line):
-                if len(self.script) > 1:
-                    self.pid = int(line.split()[2].split(".")[0])
+                if len(self.script_collector) > 1:
+                    pid = int(line.split()[2].split(".")[0])
                 else:
-                    self.pid = int(line.split()[2])
-        logger.debug('%s [%d] submission script is %s', self.__class__.__name__, self.pid, self.runscript.path)
+                    pid = int(line.split()[2])
+        return pid
 
     def _create_runscript(self):
         """Utility method to create runscript"""
@@ -183,15 +208,12 @@ class SunGridEngineTask(ClusterTask):
         if self.extra:
             cmd = ' '.join(map(str, self.extra))
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
-        if len(self.script) > 1:
+        if len(self.script_collector) > 1:
             logf = runscript.path.replace('.script', '.log')
-            jobsf = runscript.path.replace('.script', '.jobs')
-            with open(jobsf, 'w') as f_out:
-                f_out.write('\n'.join(self.script))
-            cmd = '-t {}-{} -tc {}'.format(1, len(self.script), self.max_array_size)
+            cmd = '-t {}-{} -tc {}'.format(1, self.array_size, self.max_array_size)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(logf))
-            runscript.extend(self.get_array_bash_extension(jobsf, 0))
+            runscript.extend(self._get_array_extension(runscript, 0))
         else:
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(self.log[0]))
             runscript.append(self.script[0])
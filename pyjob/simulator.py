@@ -0,0 +1,694 @@
+# MIT License
+#
+# Copyright (c) 2017-18 Felix Simkovic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Module to simulate cluster schedulers on the local machine
+
+The simulator installs fake scheduler executables, e.g. ``sbatch``, ``squeue``,
+``scancel`` and ``sacct`` for Slurm, which share a state directory. Submitted jobs
+are executed by detached runner processes, so that the unmodified
+:obj:`~pyjob.task.ClusterTask` platforms can be exercised end to end without a cluster.
+
+Usage: python -m pyjob.simulator PLATFORM -d DIRECTORY [--latency SECONDS] [--slots N]
+"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import argparse
+import contextlib
+import errno
+import fcntl
+import functools
+import getpass
+import json
+import os
+import re
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINAL_STATES = (COMPLETED, FAILED, CANCELLED)
+POLL_INTERVAL = 0.05
+
+# Mirrors the platform classes without importing them to keep every simulated command cheap
+PLATFORMS = {
+    'lsf': {
+        'commands': ('bsub', 'bjobs', 'bkill'),
+        'directive': '#BSUB',
+        'index': 'LSB_JOBINDEX',
+        'options': {'-J': 'name', '-o': 'log', '-cwd': 'workdir', '-w': 'dependency'},
+        'states': {PENDING: 'PEND', RUNNING: 'RUN', COMPLETED: 'DONE', FAILED: 'EXIT', CANCELLED: 'EXIT'},
+    },
+    'pbs': {
+        'commands': ('qsub', 'qstat', 'qdel'),
+        'directive': '#PBS',
+        'index': 'PBS_ARRAYID',
+        'options': {'-t': 'array', '-o': 'log', '-w': 'workdir', '-W': 'dependency', '-N': 'name'},
+        'states': {PENDING: 'Q', RUNNING: 'R', COMPLETED: 'C', FAILED: 'C', CANCELLED: 'C'},
+    },
+    'sge': {
+        'commands': ('qsub', 'qstat', 'qdel', 'qacct', 'qconf'),
+        'directive': '#$',
+        'index': 'SGE_TASK_ID',
+        'options': {
+            '-t': 'array',
+            '-tc': 'max_parallel',
+            '-o': 'log',
+            '-wd': 'workdir',
+            '-hold_jid': 'dependency',
+            '-N': 'name',
+        },
+        'states': {PENDING: 'qw', RUNNING: 'r'},
+    },
+    'slurm': {
+        'commands': ('sbatch', 'squeue', 'scancel', 'sacct'),
+        'directive': '#SBATCH',
+        'index': 'SLURM_ARRAY_TASK_ID',
+        'options': {
+            '--array': 'array',
+            '-o': 'log',
+            '--workdir': 'workdir',
+            '--depend': 'dependency',
+            '--job-name': 'name',
+        },
+        'states': {PENDING: 'PENDING', RUNNING: 'RUNNING'},
+    },
+}
+PLATFORMS['torque'] = PLATFORMS['pbs']
+
+RE_ARRAY = re.compile(r'(?P<name>.*\[)?(?P<first>\d+)-(?P<last>\d+)(?::\d+)?\]?(?:%(?P<max_parallel>\d+))?$')
+
+
+class SchedulerSimulator(object):
+    """Simulated cluster scheduler on the local machine
+
+    Jobs become eligible ``latency`` seconds after their submission and start once
+    their dependencies have completed successfully. At most ``slots`` array elements
+    of all jobs run at the same time, which caps the throughput of the simulated cluster.
+    Every simulated command is delayed by ``command_latency`` seconds to mimic a busy
+    scheduler daemon.
+
+    Examples
+    --------
+
+    >>> from pyjob import TaskFactory
+    >>> from pyjob.simulator import SchedulerSimulator
+    >>> with SchedulerSimulator('slurm', latency=2, slots=4):
+    ...     with TaskFactory('slurm', scripts) as task:
+    ...         task.run()
+
+    The fake executables can also be installed for use outside of Python.
+
+    .. code-block:: bash
+
+       $ python -m pyjob.simulator slurm -d /tmp/slurm --latency 2 --slots 4
+       export PATH=/tmp/slurm/bin:$PATH
+
+    """
+
+    def __init__(self, platform, directory=None, latency=0.0, slots=None, command_latency=0.0):
+        """Instantiate a new :obj:`~pyjob.simulator.SchedulerSimulator`
+
+        Parameters
+        ----------
+        platform : str
+           The platform to simulate, one of ``lsf``, ``pbs``, ``sge``, ``slurm`` or ``torque``
+        directory : str, optional
+           The state directory [default: a new temporary directory]
+        latency : int, float, optional
+           The minimum time between submission and start of a job (in seconds)
+        slots : int, optional
+           The maximum number of concurrently running array elements [default: unlimited]
+        command_latency : int, float, optional
+           The time every simulated command takes (in seconds)
+
+        Raises
+        ------
+        :exc:`ValueError`
+           Unknown platform
+
+        """
+        if platform not in PLATFORMS:
+            raise ValueError('Unknown platform: {}'.format(platform))
+        self.platform = platform
+        self.directory = os.path.abspath(directory or tempfile.mkdtemp(prefix='pyjob_simulator_'))
+        self.latency = latency
+        self.slots = slots
+        self.command_latency = command_latency
+        self._path = None
+
+    def __enter__(self):
+        """Contextmanager entry function
+
+        Note
+        ----
+        For further details see `PEP 343 <https://www.python.org/dev/peps/pep-0343/>`_.
+
+        """
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Contextmanager exit function
+
+        Note
+        ----
+        For further details see `PEP 343 <https://www.python.org/dev/peps/pep-0343/>`_.
+
+        """
+        self.stop()
+
+    def __repr__(self):
+        """Representation of the :obj:`~pyjob.simulator.SchedulerSimulator`"""
+        return '{}(platform={} directory={})'.format(self.__class__.__name__, self.platform, self.directory)
+
+    @property
+    def bin_directory(self):
+        """The directory containing the fake scheduler executables"""
+        return os.path.join(self.directory, 'bin')
+
+    @property
+    def jobs(self):
+        """The records of all submitted jobs in order of submission"""
+        return _Scheduler(self.directory).jobs()
+
+    def records(self, job_id):
+        """Get the accounting records of the finished array elements of a job
+
+        Parameters
+        ----------
+        job_id : int
+           The job identifier
+
+        Returns
+        -------
+        list
+           A :obj:`dict` per array element with its exit code, start time, wall time,
+           user and system CPU time and maximum resident set size
+
+        """
+        return _Scheduler(self.directory).records(job_id)
+
+    def install(self):
+        """Write the configuration and the fake scheduler executables to the state directory"""
+        for subdirectory in ('bin', 'jobs', 'slots'):
+            try:
+                os.makedirs(os.path.join(self.directory, subdirectory))
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+        settings = {
+            'platform': self.platform,
+            'latency': self.latency,
+            'slots': self.slots,
+            'command_latency': self.command_latency,
+        }
+        _write_json(os.path.join(self.directory, 'simulator.json'), settings)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for command in PLATFORMS[self.platform]['commands']:
+            path = os.path.join(self.bin_directory, command)
+            with open(path, 'w') as f_out:
+                f_out.write('#!/bin/sh\n')
+                f_out.write(
+                    'PYTHONPATH={}${{PYTHONPATH:+:$PYTHONPATH}} exec {} -m pyjob.simulator exec {} {} "$@"\n'.format(
+                        shlex.quote(root), shlex.quote(sys.executable), shlex.quote(self.directory), command
+                    )
+                )
+            os.chmod(path, 0o755)
+
+    def start(self):
+        """Install the fake scheduler executables and put them first on the ``PATH``"""
+        self.install()
+        self._path = os.environ.get('PATH', '')
+        os.environ['PATH'] = os.pathsep.join([self.bin_directory, self._path])
+
+    def stop(self):
+        """Cancel all active jobs and restore the ``PATH``"""
+        scheduler = _Scheduler(self.directory)
+        for job in scheduler.jobs():
+            scheduler.cancel(job['id'])
+        if self._path is not None:
+            os.environ['PATH'] = self._path
+            self._path = None
+
+
+class _Scheduler(object):
+    """Implementation of the simulated commands operating on the state directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'simulator.json'), 'r') as f_in:
+            settings = json.load(f_in)
+        self.platform = settings['platform']
+        self.latency = settings['latency']
+        self.slots = settings['slots']
+        self.command_latency = settings['command_latency']
+        self.spec = PLATFORMS[self.platform]
+
+    def dispatch(self, command, args):
+        """Execute a simulated command and get its exit code"""
+        if command != 'run':
+            time.sleep(self.command_latency)
+        if command in ('sbatch', 'qsub'):
+            with open(args[-1], 'r') as f_in:
+                return self.submit(f_in.read())
+        elif command == 'bsub':
+            return self.submit(sys.stdin.read())
+        elif (command == 'qstat' and '-f' in args) or (command == 'bjobs' and '-o' in args):
+            return self.accounting(args)
+        elif command in ('squeue', 'qstat', 'bjobs'):
+            return self.status(args)
+        elif command in ('scancel', 'qdel', 'bkill'):
+            return self.kill(args)
+        elif command in ('sacct', 'qacct'):
+            return self.accounting(args)
+        elif command == 'qconf':
+            print('mpi\nsmp' if '-spl' in args else 'all.q')
+            return 0
+        elif command == 'run':
+            return self.run(int(args[0]))
+        sys.stderr.write('{}: unknown command\n'.format(command))
+        return 1
+
+    def jobs(self):
+        """Get the records of all submitted jobs in order of submission"""
+        directory = os.path.join(self.directory, 'jobs')
+        ids = sorted(int(f[:-5]) for f in os.listdir(directory) if f.endswith('.json'))
+        return [self.read(job_id) for job_id in ids]
+
+    def read(self, job_id):
+        """Get the record of a job or :obj:`None` if unknown"""
+        try:
+            with open(self._job_file(job_id, '.json'), 'r') as f_in:
+                return json.load(f_in)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def records(self, job_id):
+        """Get the accounting records of all finished array elements of a job"""
+        try:
+            with open(self._job_file(job_id, '.acct'), 'r') as f_in:
+                records = [json.loads(line) for line in f_in if line.endswith('\n')]
+        except (IOError, OSError):
+            return []
+        return sorted(records, key=lambda record: record['element'] or 0)
+
+    def submit(self, text):
+        """Queue a job script and start its runner"""
+        job = self._parse_directives(text)
+        with self._lock('counter') as fd:
+            job['id'] = int(os.read(fd, 32) or 0) + 1
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, str(job['id']).encode('ascii'))
+        job['script'] = self._job_file(job['id'], '.script')
+        with open(job['script'], 'w') as f_out:
+            f_out.write(text)
+        _write_json(self._job_file(job['id'], '.json'), job)
+        runner = subprocess.Popen(
+            [sys.executable, '-m', 'pyjob.simulator', 'exec', self.directory, 'run', str(job['id'])],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self._update(job['id'], runner=runner.pid)
+        if self.platform == 'slurm':
+            print('Submitted batch job {}'.format(job['id']))
+        elif self.platform == 'sge' and job['array']:
+            first, last = job['array']
+            print('Your job-array {}.{}-{}:1 ("{}") has been submitted'.format(job['id'], first, last, job['name']))
+        elif self.platform == 'sge':
+            print('Your job {} ("{}") has been submitted'.format(job['id'], job['name']))
+        elif self.platform == 'lsf':
+            print('Job <{}> is submitted to default queue <normal>.'.format(job['id']))
+        else:
+            print('{}.simulator'.format(job['id']))
+        return 0
+
+    def status(self, args):
+        """Print the state of the requested or all active jobs"""
+        ids = self._job_ids(args)
+        jobs = [job for job in self.jobs() if ids is None or job['id'] in ids]
+        states = self.spec['states']
+        user = getpass.getuser()
+        if self.platform == 'slurm':
+            for job in jobs:
+                if job['state'] not in FINAL_STATES:
+                    print('{} {}'.format(job['id'], states[job['state']]))
+        elif self.platform == 'sge':
+            lines = []
+            for job in jobs:
+                if job['state'] not in FINAL_STATES:
+                    lines.append('{:>7} 0.50000 {:<10.10} {:<12} {:<5}'.format(
+                        job['id'], job['name'], user, states[job['state']]
+                    ))
+            if lines:
+                print('job-ID  prior   name       user         state\n' + '-' * 50)
+                print('\n'.join(lines))
+        elif self.platform == 'lsf':
+            print('JOBID   USER    STAT  QUEUE      FROM_HOST   EXEC_HOST   JOB_NAME')
+            for job in jobs:
+                print('{:<7} {:<7} {:<5} normal     localhost   localhost   {}'.format(
+                    job['id'], user, states[job['state']], job['name']
+                ))
+        else:
+            print('Job ID            Name             User            Time Use S Queue')
+            print('-' * 80)
+            for job in jobs:
+                print('{:<17} {:<16.16} {:<15} 00:00:00 {} batch'.format(
+                    '{}.simulator'.format(job['id']), job['name'], user, states[job['state']]
+                ))
+        return 0
+
+    def kill(self, args):
+        """Cancel the requested jobs"""
+        user = getpass.getuser()
+        returncode = 0
+        for job_id in sorted(self._job_ids(args) or []):
+            cancelled = self.cancel(job_id)
+            if self.platform == 'lsf' and cancelled:
+                print('Job <{}> is being terminated'.format(job_id))
+            elif self.platform == 'lsf':
+                print('Job <{}>: Job has already finished'.format(job_id))
+            elif self.platform == 'sge' and cancelled:
+                print('{} has deleted job {}'.format(user, job_id))
+            elif self.platform == 'sge':
+                sys.stderr.write('denied: job "{}" does not exist\n'.format(job_id))
+                returncode = 1
+        return returncode
+
+    def cancel(self, job_id):
+        """Cancel a job unless it has finished
+
+        Returns
+        -------
+        bool
+           Indicate if the job was cancelled
+
+        """
+        job = self._update(job_id, state=CANCELLED)
+        if job is None:
+            return False
+        if job.get('runner'):
+            try:
+                os.killpg(job['runner'], signal.SIGTERM)
+            except OSError:
+                pass
+        return True
+
+    def accounting(self, args):
+        """Print the accounting records of the finished array elements of a job"""
+        job_id = self._job_ids(args)
+        records = self.records(min(job_id)) if job_id else []
+        if self.platform == 'slurm':
+            for record in records:
+                jobid = str(record['job']) if record['element'] is None else '{job}_{element}'.format(**record)
+                print('{}|{}:{}|{:d}|{}|{}|{}K'.format(
+                    jobid,
+                    record['exit_code'],
+                    record['signal'],
+                    int(record['wall_time']),
+                    _format_time(record['user_time']),
+                    _format_time(record['system_time']),
+                    record['max_rss'],
+                ))
+            return 0
+        elif self.platform == 'lsf':
+            for record in records:
+                failed = record['exit_code'] or record['signal']
+                print('{}|{}|{}|{}|{:d} second(s)|{} Kbytes'.format(
+                    record['job'],
+                    record['element'] or 0,
+                    'EXIT' if failed else 'DONE',
+                    (record['exit_code'] or 128 + record['signal']) if failed else '-',
+                    int(record['wall_time']),
+                    record['max_rss'],
+                ))
+            return 0
+        if not records:
+            sys.stderr.write('error: job id {} not found\n'.format(','.join(map(str, job_id or []))))
+            return 1
+        if self.platform != 'sge':
+            for record in records:
+                jobid = str(record['job']) if record['element'] is None else '{job}[{element}]'.format(**record)
+                print('Job Id: {}.simulator'.format(jobid))
+                cpu_time = record['user_time'] + record['system_time']
+                print('    resources_used.cput = {}'.format(_format_clock(cpu_time)))
+                print('    resources_used.mem = {}kb'.format(record['max_rss']))
+                print('    resources_used.walltime = {}'.format(_format_clock(record['wall_time'])))
+                exit_status = 256 + record['signal'] if record['signal'] else record['exit_code']
+                print('    Exit_status = {}'.format(exit_status))
+                print('')
+            return 0
+        for record in records:
+            print('=' * 62)
+            print('jobnumber    {}'.format(record['job']))
+            print('taskid       {}'.format('undefined' if record['element'] is None else record['element']))
+            print('exit_status  {}'.format(record['exit_code']))
+            print('ru_wallclock {:.3f}s'.format(record['wall_time']))
+            print('ru_utime     {:.3f}s'.format(record['user_time']))
+            print('ru_stime     {:.3f}s'.format(record['system_time']))
+            print('ru_maxrss    {}'.format(record['max_rss']))
+        return 0
+
+    def run(self, job_id):
+        """Execute a job once it is eligible, acting as its runner"""
+        job = self.read(job_id)
+        time.sleep(max(0.0, job['submitted'] + self.latency - time.time()))
+        while True:
+            states = [(self.read(dependency) or {'state': COMPLETED})['state'] for dependency in job['dependency']]
+            if any(state in (FAILED, CANCELLED) for state in states):
+                self._update(job_id, state=CANCELLED)
+                return 0
+            if all(state == COMPLETED for state in states):
+                break
+            time.sleep(POLL_INTERVAL)
+        if self._update(job_id, state=RUNNING) is None:
+            return 0
+        if job['log']:
+            open(job['log'], 'w').close()
+        elements = list(range(job['array'][0], job['array'][1] + 1)) if job['array'] else [None]
+        workers = min(job['max_parallel'] or len(elements), len(elements))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            exit_codes = list(executor.map(functools.partial(self._execute, job), elements))
+        self._update(job_id, state=FAILED if any(exit_codes) else COMPLETED)
+        return 0
+
+    def _execute(self, job, element):
+        """Execute a single array element and append its accounting record"""
+        env = dict(os.environ)
+        if element is not None:
+            env[self.spec['index']] = str(element)
+        elif self.platform == 'sge':
+            env[self.spec['index']] = 'undefined'
+        with open(job['script'], 'r') as f_in:
+            shebang = f_in.readline()
+        cmd = shlex.split(shebang[2:]) if shebang.startswith('#!') else ['/bin/sh']
+        with self._slot():
+            with open(job['log'] or os.devnull, 'a') as f_out:
+                start = time.time()
+                p = subprocess.Popen(
+                    cmd + [job['script']], cwd=job['workdir'], env=env, stdout=f_out, stderr=subprocess.STDOUT
+                )
+                _, status, rusage = os.wait4(p.pid, 0)
+                wall_time = time.time() - start
+        p.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        record = {
+            'job': job['id'],
+            'element': element,
+            'exit_code': max(p.returncode, 0),
+            'signal': max(-p.returncode, 0),
+            'start': start,
+            'wall_time': wall_time,
+            'user_time': rusage.ru_utime,
+            'system_time': rusage.ru_stime,
+            'max_rss': rusage.ru_maxrss,
+        }
+        fd = os.open(self._job_file(job['id'], '.acct'), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, (json.dumps(record) + '\n').encode('utf-8'))
+        finally:
+            os.close(fd)
+        return p.returncode
+
+    def _parse_directives(self, text):
+        """Extract the job settings from the scheduler directives of a job script"""
+        job = {
+            'name': 'job',
+            'array': None,
+            'max_parallel': None,
+            'log': None,
+            'workdir': os.getcwd(),
+            'dependency': [],
+            'state': PENDING,
+            'submitted': time.time(),
+            'runner': None,
+        }
+        options = self.spec['options']
+        for line in text.splitlines():
+            if not line.startswith(self.spec['directive'] + ' '):
+                continue
+            tokens = shlex.split(line[len(self.spec['directive']):])
+            while tokens:
+                option = tokens.pop(0)
+                if '=' in option and option.startswith('--'):
+                    option, value = option.split('=', 1)
+                elif tokens:
+                    value = tokens.pop(0)
+                else:
+                    continue
+                key = options.get(option)
+                if key == 'dependency':
+                    job[key] = [int(i) for i in re.findall(r'\d+', ' '.join([value] + tokens))]
+                    tokens = []
+                elif key == 'max_parallel':
+                    job[key] = int(value)
+                elif key in ('array', 'name'):
+                    match = RE_ARRAY.match(value)
+                    if match and (key == 'array' or match.group('name')):
+                        job['array'] = [int(match.group('first')), int(match.group('last'))]
+                        job['max_parallel'] = int(match.group('max_parallel') or 0) or job['max_parallel']
+                        if match.group('name'):
+                            job['name'] = match.group('name')[:-1]
+                    else:
+                        job[key] = value
+                elif key:
+                    job[key] = value
+        if job['log']:
+            job['log'] = os.path.join(job['workdir'], job['log'])
+        return job
+
+    def _job_ids(self, args):
+        """Extract the job identifiers from the arguments of a simulated command"""
+        ids = set()
+        for i, arg in enumerate(args):
+            if arg.startswith('-') or (i > 0 and args[i - 1] in ('-o', '-u')):
+                continue
+            for value in arg.split(','):
+                match = re.match(r'\s*(\d+)', value)
+                if match:
+                    ids.add(int(match.group(1)))
+        return ids or None
+
+    def _update(self, job_id, **fields):
+        """Update the record of an active job
+
+        Returns
+        -------
+        dict
+           The updated record, or :obj:`None` if the job is unknown or has finished
+
+        """
+        with self._lock(str(job_id)):
+            job = self.read(job_id)
+            if job is None or job['state'] in FINAL_STATES:
+                return None
+            job.update(fields)
+            _write_json(self._job_file(job_id, '.json'), job)
+        return job
+
+    def _job_file(self, job_id, extension):
+        """Get the path to a file of a job"""
+        return os.path.join(self.directory, 'jobs', str(job_id) + extension)
+
+    @contextlib.contextmanager
+    def _lock(self, name):
+        """Hold the exclusive lock ``name`` shared by all simulated commands"""
+        fd = os.open(os.path.join(self.directory, 'jobs', name + '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            os.close(fd)
+
+    @contextlib.contextmanager
+    def _slot(self):
+        """Block until one of the ``slots`` shared by all jobs is free and hold it"""
+        if not self.slots:
+            yield
+            return
+        while True:
+            for i in range(self.slots):
+                fd = os.open(os.path.join(self.directory, 'slots', str(i)), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except (IOError, OSError):
+                    os.close(fd)
+                    continue
+                try:
+                    yield
+                finally:
+                    os.close(fd)
+                return
+            time.sleep(POLL_INTERVAL)
+
+
+def _format_time(seconds):
+    """Format a duration in seconds as ``MM:SS.mmm``"""
+    return '{:02d}:{:06.3f}'.format(int(seconds // 60), seconds % 60)
+
+
+def _format_clock(seconds):
+    """Format a duration in seconds as ``HH:MM:SS``"""
+    seconds = int(seconds)
+    return '{:02d}:{:02d}:{:02d}'.format(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _write_json(path, data):
+    """Atomically replace the content of ``path`` with ``data``"""
+    tmp = path + '.tmp{}'.format(os.getpid())
+    with open(tmp, 'w') as f_out:
+        json.dump(data, f_out)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    """Install the fake executables of a platform or execute one of its commands"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'exec':
+        return _Scheduler(argv[1]).dispatch(argv[2], argv[3:])
+    p = argparse.ArgumentParser(prog='python -m pyjob.simulator', description=__doc__.splitlines()[0])
+    p.add_argument('platform', choices=sorted(PLATFORMS), help='the platform to simulate')
+    p.add_argument('-d', '--directory', required=True, help='the state directory')
+    p.add_argument('--latency', type=float, default=0.0, help='minimum time between submission and start [s]')
+    p.add_argument('--slots', type=int, default=None, help='maximum number of concurrently running array elements')
+    p.add_argument('--command-latency', type=float, default=0.0, help='time every simulated command takes [s]')
+    args = p.parse_args(argv)
+    simulator = SchedulerSimulator(args.platform, args.directory, args.latency, args.slots, args.command_latency)
+    simulator.install()
+    print('export PATH={}:$PATH'.format(simulator.bin_directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,13 +26,13 @@ __version__ = '1.0'
 import logging
 import uuid
 
-from pyjob.cexec import cexec
-from pyjob.exception import PyJobExecutableNotFoundError, PyJobError
 from pyjob.script import Script
 from pyjob.task import ClusterTask
 
 logger = logging.getLogger(__name__)
 
+MEMORY_UNITS = {'K': 1, 'M': 1024, 'G': 1024 ** 2, 'T': 1024 ** 3}
+
 
 class SlurmTask(ClusterTask):
     """Slurm executable :obj:`~pyjob.task.Task`"""
@@ -40,36 +40,94 @@ class SlurmTask(ClusterTask):
     JOB_ARRAY_INDEX = '$SLURM_ARRAY_TASK_ID'
     SCRIPT_DIRECTIVE = '#SBATCH'
 
-    @property
-    def info(self):
-        """:obj:`~pyjob.slurm.SlurmTask` information"""
-        if self.pid is None:
-            return {}
-        try:
-            cexec(['squeue', '-j', str(self.pid)])
-        except (PyJobExecutableNotFoundError, Exception):
-            return {}
-        else:
-            return {'job_number': self.pid, 'status': 'Running'}
-
-    def kill(self):
-        """Immediately terminate the :obj:`~pyjob.slurm.SlurmTask`"""
-        if self.pid is None:
-            return
-        cexec(['scancel', str(self.pid)])
-        logger.debug("Terminated task: %d", self.pid)
-
     def _check_requirements(self):
         """Check if the requirements for task execution are met"""
         self._ensure_exec_available('squeue')
 
-    def _run(self):
-        """Method to initialise :obj:`~pyjob.slurm.SlurmTask` execution"""
-        self.runscript = self._create_runscript()
-        self.runscript.write()
-        stdout = cexec(['sbatch', self.runscript.path], cwd=self.directory)
-        self.pid = int(stdout.strip().split()[-1])
-        logger.debug('%s [%d] submission script is %s', self.__class__.__name__, self.pid, self.runscript.path)
+    @staticmethod
+    def _status_command(pids):
+        """Utility method to create the bulk status command"""
+        return ['squeue', '-h', '-o', '%i %T', '-j', ','.join(map(str, pids))]
+
+    @staticmethod
+    def _parse_status(stdout, pids):
+        """Utility method to convert the bulk status output into per-job information"""
+        lookup = {str(pid): pid for pid in pids}
+        data = {}
+        for line in stdout.splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[0].split('_')[0] in lookup:
+                pid = lookup[fields[0].split('_')[0]]
+                data.setdefault(pid, {'job_number': pid, 'status': fields[1]})
+            elif 'error' in line and 'Invalid job id' not in line:
+                return None
+        return data
+
+    def _accounting_command(self):
+        """Utility method to create the accounting command for all array elements"""
+        fields = 'JobID,ExitCode,ElapsedRaw,UserCPU,SystemCPU,MaxRSS'
+        return ['sacct', '-n', '-P', '-j', str(self.pid), '-o', fields]
+
+    def _parse_accounting(self, stdout):
+        """Utility method to convert the accounting output into a :obj:`dict` keyed by array element"""
+        data = {}
+        for line in stdout.splitlines():
+            fields = line.strip().split('|')
+            if len(fields) != 6:
+                continue
+            jobid, step = (fields[0].split('.', 1) + [None])[:2]
+            if '_' in jobid:
+                index = jobid.split('_', 1)[1]
+                if not index.isdigit():
+                    continue
+                element = int(index)
+            else:
+                element = None
+            record = data.setdefault(element, {})
+            max_rss = self._parse_memory(fields[5])
+            if max_rss is not None:
+                record['max_rss'] = max(max_rss, record.get('max_rss', 0))
+            if step is None or 'exit_code' not in record:
+                code, signal = (int(value) for value in fields[1].split(':'))
+                record['exit_code'] = -signal if signal else code
+                record['wall_time'] = float(fields[2]) if fields[2] else None
+                record['user_time'] = self._parse_time(fields[3])
+                record['system_time'] = self._parse_time(fields[4])
+        return data
+
+    @staticmethod
+    def _parse_time(value):
+        """Utility method to convert an accounting time such as ``[DD-[HH:]]MM:SS[.mmm]`` to seconds"""
+        if not value:
+            return None
+        days = 0
+        if '-' in value:
+            days, value = value.split('-', 1)
+        seconds = 0.0
+        for part in value.split(':'):
+            seconds = seconds * 60 + float(part)
+        return int(days) * 86400 + seconds
+
+    @staticmethod
+    def _parse_memory(value):
+        """Utility method to convert an accounting memory size such as ``1480K`` to kilobytes"""
+        if not value:
+            return None
+        if value[-1] in MEMORY_UNITS:
+            return int(float(value[:-1]) * MEMORY_UNITS[value[-1]])
+        return int(value) // 1024
+
+    def _kill_command(self):
+        """Utility method to create the command terminating the :obj:`~pyjob.slurm.SlurmTask`"""
+        return ['scancel', str(self.pid)]
+
+    def _submit_command(self):
+        """Utility method to create the command submitting the ``runscript``"""
+        return ['sbatch', self.runscript.path], {'cwd': self.directory}
+
+    def _parse_pid(self, stdout):
+        """Utility method to extract the job identifier from the submission output"""
+        return int(stdout.strip().split()[-1])
 
     def _create_runscript(self):
         """Utility method to create runscript"""
@@ -94,15 +152,12 @@ class SlurmTask(ClusterTask):
         if self.extra:
             cmd = ' '.join(map(str, self.extra))
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
-        if len(self.script) > 1:
+        if len(self.script_collector) > 1:
             logf = runscript.path.replace('.script', '.log')
-            jobsf = runscript.path.replace('.script', '.jobs')
-            with open(jobsf, 'w') as f_out:
-                f_out.write('\n'.join(self.script))
-            cmd = '--array={}-{}%{}'.format(1, len(self.script), self.max_array_size)
+            cmd = '--array={}-{}%{}'.format(1, self.array_size, self.max_array_size)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' ' + cmd)
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(logf))
-            runscript.extend(self.get_array_bash_extension(jobsf, 0))
+            runscript.extend(self._get_array_extension(runscript, 0))
         else:
             runscript.append(self.__class__.SCRIPT_DIRECTIVE + ' -o {}'.format(self.log[0]))
             runscript.append(self.script[0])
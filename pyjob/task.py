@@ -24,17 +24,31 @@ __author__ = 'Felix Simkovic'
 __version__ = '1.0'
 
 import abc
+import collections
 import logging
 import os
 import time
 
-from pyjob import cexec, config
+from pyjob import config
+from pyjob.cexec import acexec, cexec
+from pyjob.broker import get_status_broker
+from pyjob.cache import RESULT_FIELDS, ExecutionCache
 from pyjob.exception import PyJobError, PyJobExecutableNotFoundError, PyJobTaskLockedError
+from pyjob.misc import ExponentialBackoff
 from pyjob.script import ScriptCollector
 
 ABC = abc.ABCMeta('ABC', (object,), {})
 logger = logging.getLogger(__name__)
 
+ScriptResult = collections.namedtuple(
+    'ScriptResult', ['script', 'log', 'exit_code', 'wall_time', 'user_time', 'system_time', 'max_rss', 'error']
+)
+ScriptResult.__doc__ = """Outcome and resource usage of a single executed script
+
+Times are given in seconds and ``max_rss`` in kilobytes. Fields unavailable on a
+platform are :obj:`None`, ``error`` describes why a script failed.
+"""
+
 
 class Task(ABC):
     """Abstract base class for executable tasks"""
@@ -57,6 +71,13 @@ class Task(ABC):
         # These arguments are universal to all Task entities
         self.directory = os.path.abspath(kwargs.get('directory') or config.get('directory') or '.')
         self.nprocesses = kwargs.get('processes') or config.get('processes') or 1
+        self.cache = kwargs.get('cache') or config.get('cache') or None
+        if self.cache is True:
+            self.cache = ExecutionCache()
+        self.cache_inputs = kwargs.get('cache_inputs') or []
+        self.cache_environment = kwargs.get('cache_environment') or []
+        self._cache_keys = {}
+        self._restored_results = []
 
     def __del__(self):
         """Exit function at instance deletion"""
@@ -122,12 +143,25 @@ class Task(ABC):
     @property
     def log(self):
         """The log file path"""
-        return [script.log for script in self.script_collector]
+        return self.script_collector.logs
 
     @property
     def script(self):
         """The script file path"""
-        return [script.path for script in self.script_collector]
+        return self.script_collector.paths
+
+    @property
+    def results(self):
+        """The :obj:`~pyjob.task.ScriptResult` of each script
+
+        Note
+        ----
+        Platforms without accounting only report the script and log paths.
+
+        """
+        return self._restored_results + [
+            ScriptResult(script, log, None, None, None, None, None, None) for script, log in zip(self.script, self.log)
+        ]
 
     @staticmethod
     def get_time(minutes):
@@ -165,7 +199,7 @@ class Task(ABC):
     def lock(self):
         """Lock this :obj:`~pyjob.task.Task`"""
         self.locked = True
-        logger.debug('Locked %s [%d]', self.__class__.__name__, self.pid)
+        logger.debug('Locked %s [%s]', self.__class__.__name__, self.pid)
 
     def run(self):
         """Start the execution of this :obj:`~pyjob.task.Task`
@@ -178,65 +212,271 @@ class Task(ABC):
            Locked task, cannot restart or rerun
 
         """
-        if self.locked:
-            raise PyJobTaskLockedError('This task is locked!')
-        if len(self.script_collector) < 1:
-            raise PyJobError('One or more executable scripts required prior to execution')
-        self.script_collector.dump()
-        self._run()
-        logger.debug('Started execution of %s [%d]', self.__class__.__name__, self.pid)
+        self._prepare_run()
+        if self._submission_required():
+            self._run()
+            logger.debug('Started execution of %s [%s]', self.__class__.__name__, self.pid)
         self.lock()
 
-    def wait(self, interval=30, monitor_f=None, success_f=None):
+    async def arun(self):
+        """Start the execution of this :obj:`~pyjob.task.Task` without blocking the event loop
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobError`
+           One or more executable scripts required prior to execution
+        :exc:`~pyjob.exception.PyJobTaskLockedError`
+           Locked task, cannot restart or rerun
+
+        """
+        self._prepare_run()
+        if self._submission_required():
+            await self._arun()
+            logger.debug('Started execution of %s [%s]', self.__class__.__name__, self.pid)
+        self.lock()
+
+    async def ainfo(self):
+        """Coroutine to provide info about the :obj:`~pyjob.task.Task` without blocking the event loop"""
+        return self.info
+
+    async def akill(self):
+        """Coroutine to forcefully terminate the :obj:`~pyjob.task.Task` without blocking the event loop"""
+        self.kill()
+
+    def wait(self, interval=30, monitor_f=None, success_f=None, min_interval=0.5):
         """Method to wait for the completion of the current :obj:`~pyjob.task.Task`
 
         Parameters
         ----------
-        interval : int, optional
-           The interval to wait between checking (in seconds)
+        interval : int, float, optional
+           The maximum interval to wait between checking (in seconds)
         monitor_f : callable, optional
            A :obj:`callable` that is regularly invoked
         success_f : callable, optional
            A :obj:`callable` to check for early termination of :obj:`~pyjob.task.Task`
+        min_interval : int, float, optional
+           The initial interval to wait between checking (in seconds)
 
         Note
         ----
         The `success_f` argument needs to accept a log file as input and return
         a :obj:`bool`.
 
+        Note
+        ----
+        The interval between checks starts at `min_interval` and grows exponentially
+        (with jitter) up to `interval`, so short tasks return promptly while long tasks
+        generate little polling load. Platforms providing completion notifications wake
+        up early when such a notification arrives.
+
         """
+        success_f, callback = self._prepare_wait(monitor_f, success_f)
+        backoff = ExponentialBackoff(initial=min_interval, maximum=interval)
+        while not self.completed:
+            if success_f and self._successful_log(success_f):
+                self.kill()
+            callback()
+            self._wait_for_event(next(backoff))
+
+    async def await_completion(self, interval=30, monitor_f=None, success_f=None, min_interval=0.5):
+        """Coroutine to wait for the completion of the current :obj:`~pyjob.task.Task`
 
-        def is_successful_run(log):
-            return os.path.isfile(log) and success_f(log)
+        Examples
+        --------
+
+        >>> import asyncio
+        >>> async def main(tasks):
+        ...     await asyncio.gather(*[task.arun() for task in tasks])
+        ...     await asyncio.gather(*[task.await_completion() for task in tasks])
+        >>> asyncio.get_event_loop().run_until_complete(main(tasks))
+
+        Parameters
+        ----------
+        interval : int, float, optional
+           The maximum interval to wait between checking (in seconds)
+        monitor_f : callable, optional
+           A :obj:`callable` that is regularly invoked
+        success_f : callable, optional
+           A :obj:`callable` to check for early termination of :obj:`~pyjob.task.Task`
+        min_interval : int, float, optional
+           The initial interval to wait between checking (in seconds)
+
+        Note
+        ----
+        See :meth:`~pyjob.task.Task.wait` for further details.
+
+        """
+        success_f, callback = self._prepare_wait(monitor_f, success_f)
+        backoff = ExponentialBackoff(initial=min_interval, maximum=interval)
+        while not (self.locked and not await self.ainfo()):
+            if success_f and self._successful_log(success_f):
+                await self.akill()
+            callback()
+            await self._await_event(next(backoff))
+
+    def _prepare_run(self):
+        """Check that this :obj:`~pyjob.task.Task` can be started and write all scripts to disk
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobError`
+           One or more executable scripts required prior to execution
+        :exc:`~pyjob.exception.PyJobTaskLockedError`
+           Locked task, cannot restart or rerun
+
+        """
+        if self.locked:
+            raise PyJobTaskLockedError('This task is locked!')
+        if len(self.script_collector) < 1:
+            raise PyJobError('One or more executable scripts required prior to execution')
+        self.script_collector = self._restore_results(self.script_collector)
+        self._dump_scripts()
+
+    def _restore_results(self, collector):
+        """Remove all scripts with a cached execution from ``collector`` and restore their logs
+
+        Parameters
+        ----------
+        collector : :obj:`~pyjob.script.ScriptCollector`
+           The scripts to look up
+
+        Returns
+        -------
+        :obj:`~pyjob.script.ScriptCollector`
+           The scripts that still need to be executed
+
+        Note
+        ----
+        The :obj:`~pyjob.task.ScriptResult` instances of the removed scripts are reported first
+        by :attr:`~pyjob.task.Task.results`.
+
+        """
+        if not self.cache:
+            return collector
+        pending = []
+        restored = len(self._restored_results)
+        for script in collector:
+            key = self.cache.key(script, inputs=self.cache_inputs, environment=self.cache_environment)
+            record = self.cache.get(key, script.log)
+            if record is None:
+                self._cache_keys[script.path] = key
+                pending.append(script)
+            else:
+                fields = [record.get(field) for field in RESULT_FIELDS]
+                self._restored_results.append(ScriptResult(script.path, script.log, *(fields + [None])))
+        if len(self._restored_results) > restored:
+            restored = len(self._restored_results) - restored
+            logger.debug('Restored %d cached executions, %d scripts pending', restored, len(pending))
+            return ScriptCollector(pending)
+        return collector
+
+    def _submission_required(self):
+        """Boolean to indicate that scripts are left to execute after restoring previous executions"""
+        return len(self.script_collector) > 0 or not self._restored_results
+
+    def _store_cached(self, results):
+        """Store the successful executions of this :obj:`~pyjob.task.Task` in its :obj:`~pyjob.cache.ExecutionCache`
+
+        Parameters
+        ----------
+        results : list
+           The :obj:`~pyjob.task.ScriptResult` of each executed script
+
+        """
+        stored = 0
+        for result in results:
+            key = self._cache_keys.pop(result.script, None)
+            if key and result.exit_code == 0 and result.error is None:
+                stored += self.cache.put(key, result)
+        if stored:
+            logger.debug('Stored %d executions in %s', stored, self.cache)
+            self.cache.evict()
+
+    def _dump_scripts(self):
+        """Write all scripts of this :obj:`~pyjob.task.Task` to disk"""
+        self.script_collector.dump()
+
+    async def _arun(self):
+        """Coroutine to start execution of the :obj:`~pyjob.task.Task`, defaults to :meth:`_run`"""
+        self._run()
+
+    def _prepare_wait(self, monitor_f, success_f):
+        """Validate the callables passed to :meth:`~pyjob.task.Task.wait`
+
+        Returns
+        -------
+        tuple
+           The ``success_f`` or ``None`` if not callable, and the monitor callback
+
+        """
 
         def is_callable_fn(fn):
             return bool(fn and callable(fn))
 
-        check_success = is_callable_fn(success_f)
         callback = monitor_f if is_callable_fn(monitor_f) else lambda: None
+        if not is_callable_fn(success_f):
+            return None, callback
+        msg = 'Checking for %s %d success with function %s'
+        logger.debug(msg, self.__class__.__name__, self.pid, success_f.__name__)
+        return success_f, callback
+
+    def _successful_log(self, success_f):
+        """Get the first log file that indicates success according to ``success_f``"""
+        for log in self.log:
+            if os.path.isfile(log) and success_f(log):
+                logger.debug("%s %d succeeded, run log: %s", self.__class__.__name__, self.pid, log)
+                return log
+        return None
+
+    def _wait_for_event(self, timeout):
+        """Block until a completion notification arrives or ``timeout`` expires
 
-        if check_success:
-            msg = 'Checking for %s %d success with function %s'
-            logger.debug(msg, self.__class__.__name__, self.pid, success_f.__name__)
+        Parameters
+        ----------
+        timeout : int, float
+           The maximum time to block (in seconds)
 
-        while not self.completed:
-            if check_success:
-                for log in self.log:
-                    if is_successful_run(log):
-                        logger.debug("%s %d succeeded, run log: %s", self.__class__.__name__, self.pid, log)
-                        self.kill()
-            callback()
-            time.sleep(interval)
+        Returns
+        -------
+        bool
+           Indicate if a notification arrived before ``timeout`` expired
+
+        """
+        time.sleep(timeout)
+        return False
+
+    async def _await_event(self, timeout):
+        """Coroutine waiting until a completion notification arrives or ``timeout`` expires
+
+        Parameters
+        ----------
+        timeout : int, float
+           The maximum time to wait (in seconds)
+
+        Returns
+        -------
+        bool
+           Indicate if a notification arrived before ``timeout`` expired
+
+        """
+        import asyncio
+
+        await asyncio.sleep(timeout)
+        return False
 
 
 class ClusterTask(Task):
     """Abstract base class for executable cluster tasks"""
 
+    _closed = False
+
     def __init__(self, *args, **kwargs):
         """Instantiate a new :obj:`~pyjob.task.ClusterTask`"""
         super(ClusterTask, self).__init__(*args, **kwargs)
         self.dependency = kwargs.get('dependency', [])
-        self.max_array_size = kwargs.get('max_array_size') or config.get('max_array_size') or len(self.script)
+        self.scripts_per_element = int(kwargs.get('scripts_per_element') or config.get('scripts_per_element') or 1)
+        self.element_processes = int(kwargs.get('element_processes') or config.get('element_processes') or 1)
+        self.max_array_size = kwargs.get('max_array_size') or config.get('max_array_size') or self.array_size
         self.priority = kwargs.get('priority', None)
         self.queue = kwargs.get('queue') or config.get('queue')
         self.environment = kwargs.get('environment') or config.get('environment') or 'mpi'
@@ -245,14 +485,139 @@ class ClusterTask(Task):
         self.name = kwargs.get('name') or config.get('name') or 'pyjob'
         self.extra = kwargs.get('extra', [])
         self.cleanup = kwargs.get('cleanup') or config.get('cleanup') or False
+        self.bundle = kwargs.get('bundle') or config.get('bundle') or False
         self.runscript = None
+        if self.scripts_per_element < 1:
+            raise ValueError('Invalid number of scripts per array element')
+        if self.element_processes < 1:
+            raise ValueError('Invalid number of processes per array element')
         self._check_requirements()
 
+    @property
+    def info(self):
+        """:obj:`~pyjob.task.ClusterTask` information
+
+        Note
+        ----
+        The information is served from the platform's shared :obj:`~pyjob.broker.StatusBroker`,
+        which issues a single bulk status query for all active tasks of this platform.
+
+        """
+        if self.pid is None or self._closed:
+            return {}
+        return self.status_broker.status(self.pid)
+
+    async def ainfo(self):
+        """Coroutine to provide :obj:`~pyjob.task.ClusterTask` information without blocking the event loop"""
+        if self.pid is None or self._closed:
+            return {}
+        return await self.status_broker.astatus(self.pid)
+
+    async def akill(self):
+        """Coroutine to terminate the :obj:`~pyjob.task.ClusterTask` without blocking the event loop"""
+        if self.pid is None:
+            return
+        await acexec(self._kill_command(), permit_nonzero=True)
+        logger.debug("Terminated task: %d", self.pid)
+
+    @property
+    def results(self):
+        """The :obj:`~pyjob.task.ScriptResult` of each script from the scheduler's accounting
+
+        Note
+        ----
+        The accounting records of all array elements are gathered in a single query. If an array
+        element runs several scripts, they all report the exit status and resource usage of the
+        element. Fields are :obj:`None` while the accounting is unavailable, e.g. for running jobs.
+        Executions restored from the cache are reported first.
+
+        """
+        if self.pid is None:
+            return list(self._restored_results)
+        accounting = {}
+        cmd = self._accounting_command()
+        if cmd:
+            try:
+                stdout = cexec(cmd, permit_nonzero=True)
+            except PyJobExecutableNotFoundError:
+                logger.debug('Accounting unavailable for %s %d', self.__class__.__name__, self.pid)
+            else:
+                accounting = self._parse_accounting(stdout or '')
+        results = []
+        for i, (script, log) in enumerate(zip(self.script, self.log)):
+            element = i // self.scripts_per_element + 1 if len(self.script_collector) > 1 else None
+            record = accounting.get(element, {})
+            exit_code = record.get('exit_code')
+            error = None
+            if exit_code and element:
+                error = 'Array element {} exited with code {}'.format(element, exit_code)
+            elif exit_code:
+                error = 'Job {} exited with code {}'.format(self.pid, exit_code)
+            results.append(
+                ScriptResult(
+                    script,
+                    log,
+                    exit_code,
+                    record.get('wall_time'),
+                    record.get('user_time'),
+                    record.get('system_time'),
+                    record.get('max_rss'),
+                    error,
+                )
+            )
+        return self._restored_results + results
+
+    @property
+    def array_size(self):
+        """The number of array elements required to run all scripts"""
+        return -(-len(self.script_collector) // self.scripts_per_element)
+
+    @property
+    def status_broker(self):
+        """The :obj:`~pyjob.broker.StatusBroker` shared by all tasks of this platform"""
+        interval = config.get('status_interval') or 5
+        return get_status_broker(self.__class__, self._status_command, self._parse_status, interval=interval)
+
     @abc.abstractmethod
     def _create_runscript(self):
         """Utility method to create a :obj:`~pyjob.task.ClusterTask` runscript"""
         pass
 
+    def _kill_command(self):  # pragma: no cover
+        """Utility method to create the command terminating the :obj:`~pyjob.task.ClusterTask`"""
+        raise NotImplementedError
+
+    def _submit_command(self):  # pragma: no cover
+        """Utility method to create the command and its keyword arguments submitting the ``runscript``"""
+        raise NotImplementedError
+
+    def _parse_pid(self, stdout):  # pragma: no cover
+        """Utility method to extract the job identifier from the submission output"""
+        raise NotImplementedError
+
+    def _accounting_command(self):
+        """Utility method to create the accounting command for all array elements, if supported"""
+        return None
+
+    def _parse_accounting(self, stdout):
+        """Utility method to convert the accounting output into a :obj:`dict` keyed by array element
+
+        Non-array jobs are keyed by :obj:`None`, the values are :obj:`dict` instances
+        with any of the :obj:`~pyjob.task.ScriptResult` resource fields.
+
+        """
+        return {}
+
+    @staticmethod
+    def _status_command(pids):  # pragma: no cover
+        """Utility method to create the bulk status command for one or more job identifiers"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _parse_status(stdout, pids):  # pragma: no cover
+        """Utility method to convert the bulk status output into per-job information"""
+        raise NotImplementedError
+
     @staticmethod
     def _ensure_exec_available(exe):
         """Ensure that the specified executable is available in the system
@@ -277,21 +642,149 @@ class ClusterTask(Task):
         """Abstract method to check if the user input meets the requirements for the task execution"""
         pass
 
+    def _dump_scripts(self):
+        """Write all scripts of this :obj:`~pyjob.task.ClusterTask` to disk unless they are bundled"""
+        if self.bundle and len(self.script_collector) > 1:
+            return
+        super(ClusterTask, self)._dump_scripts()
+
     def close(self):
-        """Close this :obj:`~pyjob.sge.ClusterTask` after completion"""
+        """Close this :obj:`~pyjob.sge.ClusterTask` after completion
+
+        Note
+        ----
+        Only the first call has an effect. A closed :obj:`~pyjob.task.ClusterTask` is no
+        longer tracked by the :obj:`~pyjob.broker.StatusBroker` and reports no information.
+
+        """
+        if self._closed:
+            return
         self.wait()
+        if self.cache and self._cache_keys:
+            self._store_cached(self.results)
         if self.cleanup and self.runscript is not None:
             self.runscript.cleanup()
+        if self.pid is not None:
+            self.status_broker.unregister(self.pid)
+        self._closed = True
+
+    def kill(self):
+        """Immediately terminate the :obj:`~pyjob.task.ClusterTask`"""
+        if self.pid is None:
+            return
+        # Permit a non-zero exit code for jobs that have already left the queue
+        cexec(self._kill_command(), permit_nonzero=True)
+        logger.debug("Terminated task: %d", self.pid)
+
+    def _run(self):
+        """Method to initialise :obj:`~pyjob.task.ClusterTask` execution"""
+        self.runscript = self._create_runscript()
+        self.runscript.write()
+        cmd, kwargs = self._submit_command()
+        self.pid = self._parse_pid(cexec(cmd, **kwargs))
+        logger.debug('%s [%s] submission script is %s', self.__class__.__name__, self.pid, self.runscript.path)
+
+    async def _arun(self):
+        """Coroutine to initialise :obj:`~pyjob.task.ClusterTask` execution without blocking the event loop"""
+        self.runscript = self._create_runscript()
+        self.runscript.write()
+        cmd, kwargs = self._submit_command()
+        self.pid = self._parse_pid(await acexec(cmd, **kwargs))
+        logger.debug('%s [%s] submission script is %s', self.__class__.__name__, self.pid, self.runscript.path)
+
+    def run(self):
+        """Start the execution of this :obj:`~pyjob.task.ClusterTask`
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobError`
+           One or more executable scripts required prior to execution
+        :exc:`~pyjob.exception.PyJobTaskLockedError`
+           Locked task, cannot restart or rerun
+
+        """
+        super(ClusterTask, self).run()
+        if self.pid is not None:
+            self.status_broker.register(self.pid)
+
+    async def arun(self):
+        """Start the execution of this :obj:`~pyjob.task.ClusterTask` without blocking the event loop
+
+        Raises
+        ------
+        :exc:`~pyjob.exception.PyJobError`
+           One or more executable scripts required prior to execution
+        :exc:`~pyjob.exception.PyJobTaskLockedError`
+           Locked task, cannot restart or rerun
+
+        """
+        await super(ClusterTask, self).arun()
+        if self.pid is not None:
+            self.status_broker.register(self.pid)
+
+    def _write_jobs_file(self, jobsf):
+        """Write all scripts to the ``jobsf`` file as fixed-width records
+
+        Each script path is padded with trailing spaces so that every line, including
+        its newline, has the same length in bytes. This allows the array elements to
+        seek directly to their records rather than scanning the file.
+
+        Parameters
+        ----------
+        jobsf : str
+           The path to the jobs file
 
-    def get_array_bash_extension(self, jobsf, offset):
+        Returns
+        -------
+        int
+           The width of each record (in bytes)
+
+        """
+        paths = [os.fsencode(path) for path in self.script]
+        width = max(len(path) for path in paths) + 1
+        with open(jobsf, 'wb') as f_out:
+            f_out.writelines(path.ljust(width - 1) + b'\n' for path in paths)
+        return width
+
+    def _get_array_extension(self, runscript, offset):
+        """Write the files required by all array elements and get the ``runscript`` bash extension
+
+        Parameters
+        ----------
+        runscript : :obj:`~pyjob.script.Script`
+           The runscript of this :obj:`~pyjob.task.ClusterTask`
+        offset : int
+           The offset to be applied to the ``JOB_ARRAY_INDEX``
+
+        Returns
+        -------
+        list
+           A list of lines to be written to the ``runscript``
+
+        """
+        if self.bundle:
+            bundlef = runscript.path.replace('.script', '.bundle')
+            indexf = runscript.path.replace('.script', '.index')
+            width = self.script_collector.bundle(bundlef, indexf)
+            return self.get_bundle_bash_extension(bundlef, indexf, offset, width)
+        jobsf = runscript.path.replace('.script', '.jobs')
+        width = self._write_jobs_file(jobsf)
+        return self.get_array_bash_extension(jobsf, offset, width=width)
+
+    def get_array_bash_extension(self, jobsf, offset, width=None):
         """Get the array job bash extension for the ``runscript``
 
+        Each array element runs ``scripts_per_element`` consecutive scripts, at most
+        ``element_processes`` of them at any time.
+
         Parameters
         ----------
         jobsf : str
            The file containing all scripts on a per-line basis
         offset : int
            The offset to be applied to the ``JOB_ARRAY_INDEX``
+        width : int, optional
+           The record width of a fixed-width ``jobsf``, see :meth:`_write_jobs_file`
 
         Returns
         -------
@@ -305,13 +798,99 @@ class ClusterTask(Task):
         :exc:`ValueError`
            Valid job file required
 
+        Note
+        ----
+        Without ``width``, each array element scans ``jobsf`` up to its scripts. With ``width``,
+        the records are read directly at their byte offset in constant time.
+
         """
         if jobsf is None or not os.path.isfile(jobsf):
             raise ValueError('Valid job file required')
         if offset < 0:
             raise ValueError('Invalid offset')
+        element = self.__class__.JOB_ARRAY_INDEX
         if offset > 0:
-            script_def = 'script=$(awk "NR==$(({} + {}))" {})'.format(self.__class__.JOB_ARRAY_INDEX, offset, jobsf)
+            element = '{} + {}'.format(element, offset)
+        if self.scripts_per_element > 1:
+            return self._get_chunked_bash_extension(jobsf, element, width)
+        if width:
+            script_def = 'script=$(dd if={} bs={} skip=$(({} - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, width, element
+            )
+        elif offset > 0:
+            script_def = 'script=$(awk "NR==$(({}))" {})'.format(element, jobsf)
         else:
-            script_def = 'script=$(awk "NR=={}" {})'.format(self.__class__.JOB_ARRAY_INDEX, jobsf)
+            script_def = 'script=$(awk "NR=={}" {})'.format(element, jobsf)
         return [script_def, 'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")', '$script > $log 2>&1']
+
+    def _get_chunked_bash_extension(self, jobsf, element, width):
+        """Get the array job bash extension running ``scripts_per_element`` scripts per array element"""
+        run_cmd = 'tr "\\n" "\\0" | xargs -0 -n 1 -P {} sh -c \'"$0" > "${{0%.*}}.log" 2>&1\''.format(
+            self.element_processes
+        )
+        if width:
+            return [
+                'skip=$((({} - 1) * {}))'.format(element, self.scripts_per_element),
+                'dd if={} bs={} skip=$skip count={} 2>/dev/null | sed "s/ *$//" | {}'.format(
+                    jobsf, width, self.scripts_per_element, run_cmd
+                ),
+            ]
+        return [
+            'first=$((({} - 1) * {} + 1))'.format(element, self.scripts_per_element),
+            'last=$(($first + {}))'.format(self.scripts_per_element - 1),
+            'sed -n "${{first}},${{last}}p;${{last}}q" {} | {}'.format(jobsf, run_cmd),
+        ]
+
+    def get_bundle_bash_extension(self, bundlef, indexf, offset, width):
+        """Get the array job bash extension for the ``runscript`` of a script bundle
+
+        Each script is extracted from ``bundlef`` at its byte offset recorded in ``indexf``
+        into a temporary file next to ``bundlef``, executed and removed again. Nothing is
+        executed from ``$TMPDIR``, which may be mounted ``noexec``. Its output is still
+        written to the log of the original script.
+
+        Parameters
+        ----------
+        bundlef : str
+           The file containing the contents of all scripts, see :meth:`~pyjob.script.ScriptCollector.bundle`
+        indexf : str
+           The file containing the fixed-width index records
+        offset : int
+           The offset to be applied to the ``JOB_ARRAY_INDEX``
+        width : int
+           The record width of ``indexf``
+
+        Returns
+        -------
+        list
+           A list of lines to be written to the ``runscript``
+
+        Raises
+        ------
+        :exc:`ValueError`
+           Invalid offset
+        :exc:`ValueError`
+           Valid bundle and index files required
+
+        """
+        if any(f is None or not os.path.isfile(f) for f in (bundlef, indexf)):
+            raise ValueError('Valid bundle and index files required')
+        if offset < 0:
+            raise ValueError('Invalid offset')
+        element = self.__class__.JOB_ARRAY_INDEX
+        if offset > 0:
+            element = '{} + {}'.format(element, offset)
+        run_def = (
+            "run='set -- $(dd if={0} bs={1} skip=$(($0 - 1)) count=1 2>/dev/null); tmp=$(mktemp {2}.XXXXXX); "
+            "tail -c +$(($1 + 1)) {2} | head -c $2 > $tmp; chmod +x $tmp; $tmp > \"$3\" 2>&1; "
+            "status=$?; rm -f $tmp; exit $status'"
+        ).format(indexf, width, os.path.abspath(bundlef))
+        if self.scripts_per_element > 1:
+            return [
+                run_def,
+                'first=$((({} - 1) * {} + 1))'.format(element, self.scripts_per_element),
+                'last=$(($first + {}))'.format(self.scripts_per_element - 1),
+                'if [ $last -gt {0} ]; then last={0}; fi'.format(len(self.script_collector)),
+                'seq $first $last | xargs -n 1 -P {} sh -c "$run"'.format(self.element_processes),
+            ]
+        return [run_def, 'sh -c "$run" $(({}))'.format(element)]
@@ -0,0 +1,107 @@
+__author__ = 'Felix Simkovic'
+
+import asyncio
+import pytest
+import threading
+import time
+
+from pyjob.batch import BatchSubmitter
+from pyjob.exception import PyJobError
+from pyjob.task import Task
+
+
+class MockTask(Task):
+    active = 0
+    peak = 0
+    counter_lock = threading.Lock()
+
+    def __init__(self, pid, fail=False):
+        super(MockTask, self).__init__(None)
+        self._pid = pid
+        self._fail = fail
+
+    @property
+    def info(self):
+        return {}
+
+    def close(self):
+        pass
+
+    def kill(self):
+        pass
+
+    def run(self):
+        with MockTask.counter_lock:
+            MockTask.active += 1
+            MockTask.peak = max(MockTask.peak, MockTask.active)
+        time.sleep(0.02)
+        with MockTask.counter_lock:
+            MockTask.active -= 1
+        if self._fail:
+            raise PyJobError('Submission failed')
+        self.pid = self._pid
+
+    async def arun(self):
+        MockTask.active += 1
+        MockTask.peak = max(MockTask.peak, MockTask.active)
+        await asyncio.sleep(0.02)
+        MockTask.active -= 1
+        if self._fail:
+            raise PyJobError('Submission failed')
+        self.pid = self._pid
+
+    def _run(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def reset_peak():
+    MockTask.active = MockTask.peak = 0
+
+
+class TestBatchSubmitter(object):
+    def test_1(self):
+        tasks = [MockTask(i) for i in range(20)]
+        results = BatchSubmitter(max_inflight=4).submit(tasks)
+        assert [r.task for r in results] == tasks
+        assert [r.pid for r in results] == list(range(20))
+        assert all(r.error is None for r in results)
+        assert 1 < MockTask.peak <= 4
+
+    def test_2(self):
+        tasks = [MockTask(i, fail=i % 2 == 1) for i in range(6)]
+        results = BatchSubmitter(max_inflight=3).submit(tasks)
+        assert [r.pid for r in results] == [0, None, 2, None, 4, None]
+        assert all(isinstance(r.error, PyJobError) for r in results[1::2])
+
+    def test_3(self):
+        tasks = [MockTask(i) for i in range(5)]
+        results = BatchSubmitter(max_inflight=1).submit(tasks)
+        assert [r.pid for r in results] == list(range(5))
+        assert MockTask.peak == 1
+
+    def test_4(self):
+        assert BatchSubmitter().submit([]) == []
+
+    def test_5(self):
+        with pytest.raises(ValueError):
+            BatchSubmitter(max_inflight=-1)
+        with pytest.raises(ValueError):
+            BatchSubmitter(max_inflight=0)
+
+
+class TestBatchSubmitterAsync(object):
+    @staticmethod
+    def run(coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_1(self):
+        tasks = [MockTask(i, fail=i == 3) for i in range(10)]
+        results = self.run(BatchSubmitter(max_inflight=3).asubmit(tasks))
+        assert [r.pid for r in results] == [0, 1, 2, None, 4, 5, 6, 7, 8, 9]
+        assert isinstance(results[3].error, PyJobError)
+        assert MockTask.peak == 3
@@ -0,0 +1,120 @@
+__author__ = 'Felix Simkovic'
+
+import asyncio
+import mock
+import pytest
+
+from pyjob.broker import StatusBroker, get_status_broker
+from pyjob.exception import PyJobExecutableNotFoundError
+
+
+def command_f(pids):
+    return ['squeue', '-j', ','.join(map(str, pids))]
+
+
+def parse_f(stdout, pids):
+    if stdout == 'error':
+        return None
+    active = set(stdout.split())
+    return {pid: {'job_number': pid, 'status': 'RUNNING'} for pid in pids if str(pid) in active}
+
+
+@mock.patch('pyjob.broker.cexec')
+class TestStatusBroker(object):
+    def test_1(self, cexec_mock):
+        cexec_mock.return_value = '1 2'
+        broker = StatusBroker(command_f, parse_f, interval=60)
+        for pid in (1, 2, 3):
+            broker.register(pid)
+        assert broker.status(1) == {'job_number': 1, 'status': 'RUNNING'}
+        assert broker.status(2) == {'job_number': 2, 'status': 'RUNNING'}
+        assert broker.status(3) == {}
+        assert cexec_mock.call_count == 1
+        assert cexec_mock.call_args[0][0] == ['squeue', '-j', '1,2,3']
+
+    def test_2(self, cexec_mock):
+        cexec_mock.return_value = '1'
+        broker = StatusBroker(command_f, parse_f, interval=60)
+        broker.register(1)
+        assert broker.status(1)
+        broker.register(2)
+        assert broker.status(2) == {}
+        assert cexec_mock.call_count == 2
+        assert broker.status(2) == {}
+        assert cexec_mock.call_count == 2
+
+    def test_3(self, cexec_mock):
+        cexec_mock.return_value = '1'
+        broker = StatusBroker(command_f, parse_f, interval=0)
+        broker.register(1)
+        assert broker.status(1)
+        cexec_mock.return_value = ''
+        assert broker.status(1) == {}
+        assert cexec_mock.call_count == 2
+        assert broker.status(1) == {}
+        assert cexec_mock.call_count == 2
+
+    def test_4(self, cexec_mock):
+        cexec_mock.return_value = '1'
+        broker = StatusBroker(command_f, parse_f, interval=0)
+        assert broker.status(1)
+        cexec_mock.return_value = 'error'
+        assert broker.status(1) == {'job_number': 1, 'status': 'RUNNING'}
+        broker.register(2)
+        assert broker.status(2) == {'job_number': 2, 'status': 'Unknown'}
+
+    def test_5(self, cexec_mock):
+        cexec_mock.side_effect = PyJobExecutableNotFoundError
+        broker = StatusBroker(command_f, parse_f, interval=60)
+        assert broker.status(1) == {}
+
+    def test_6(self, cexec_mock):
+        cexec_mock.return_value = '1'
+        broker = StatusBroker(command_f, parse_f, interval=60)
+        assert broker.status(1)
+        broker.unregister(1)
+        broker.refresh()
+        assert cexec_mock.call_count == 1
+
+
+@mock.patch('pyjob.broker.acexec')
+class TestStatusBrokerAsync(object):
+    @staticmethod
+    def run(coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_1(self, acexec_mock):
+        async def acexec(cmd, **kwargs):
+            await asyncio.sleep(0.1)
+            return '1 2'
+
+        acexec_mock.side_effect = acexec
+        broker = StatusBroker(command_f, parse_f, interval=60)
+        for pid in (1, 2, 3):
+            broker.register(pid)
+
+        async def main():
+            return await asyncio.gather(*[broker.astatus(pid) for pid in (1, 2, 3)])
+
+        assert self.run(main()) == [
+            {'job_number': 1, 'status': 'RUNNING'},
+            {'job_number': 2, 'status': 'RUNNING'},
+            {},
+        ]
+        assert acexec_mock.call_count == 1
+
+
+class TestGetStatusBroker(object):
+    def test_1(self):
+        broker1 = get_status_broker('test_1', command_f, parse_f)
+        broker2 = get_status_broker('test_1', command_f, parse_f)
+        assert broker1 is broker2
+
+    def test_2(self):
+        broker1 = get_status_broker('test_2a', command_f, parse_f)
+        broker2 = get_status_broker('test_2b', command_f, parse_f)
+        assert broker1 is not broker2
@@ -0,0 +1,96 @@
+__author__ = 'Felix Simkovic'
+
+import os
+import pytest
+import shutil
+import tempfile
+import time
+
+from pyjob.cache import ExecutionCache
+from pyjob.task import ScriptResult
+
+
+def write_log(path, content):
+    with open(path, 'w') as f_out:
+        f_out.write(content)
+    return ScriptResult('test.py', path, 0, 1.5, 1.0, 0.1, 1024, None)
+
+
+class TestExecutionCache(object):
+    def test_1(self):
+        script = pytest.helpers.get_py_script(0, 1)
+        key = ExecutionCache.key(script)
+        assert len(key) == 64
+        assert key == ExecutionCache.key(pytest.helpers.get_py_script(0, 1))
+        assert key != ExecutionCache.key(pytest.helpers.get_py_script(0, 2))
+
+    def test_2(self):
+        script = pytest.helpers.get_py_script(0, 1)
+        fh = tempfile.NamedTemporaryFile(mode='w', delete=False)
+        fh.write('A')
+        fh.close()
+        key_1 = ExecutionCache.key(script, inputs=[fh.name])
+        with open(fh.name, 'w') as f_out:
+            f_out.write('B')
+        key_2 = ExecutionCache.key(script, inputs=[fh.name])
+        os.unlink(fh.name)
+        key_3 = ExecutionCache.key(script, inputs=[fh.name])
+        assert len({key_1, key_2, key_3, ExecutionCache.key(script)}) == 4
+
+    def test_3(self, monkeypatch):
+        script = pytest.helpers.get_py_script(0, 1)
+        monkeypatch.setenv('PYJOB_CACHE_TEST', 'A')
+        key_1 = ExecutionCache.key(script, environment=['PYJOB_CACHE_TEST'])
+        assert key_1 == ExecutionCache.key(script, environment=['PYJOB_CACHE_TEST'])
+        monkeypatch.setenv('PYJOB_CACHE_TEST', 'B')
+        assert key_1 != ExecutionCache.key(script, environment=['PYJOB_CACHE_TEST'])
+        assert key_1 != ExecutionCache.key(script)
+
+    def test_4(self):
+        directory = tempfile.mkdtemp()
+        cache = ExecutionCache(os.path.join(directory, 'cache'))
+        result = write_log(os.path.join(directory, 'test.log'), 'Hello World')
+        assert cache.get('a' * 64, os.path.join(directory, 'restored.log')) is None
+        assert cache.put('a' * 64, result)
+        record = cache.get('a' * 64, os.path.join(directory, 'restored.log'))
+        assert record == {'exit_code': 0, 'wall_time': 1.5, 'user_time': 1.0, 'system_time': 0.1, 'max_rss': 1024}
+        with open(os.path.join(directory, 'restored.log')) as f_in:
+            assert f_in.read() == 'Hello World'
+        assert not cache.put('b' * 64, result._replace(log=os.path.join(directory, 'missing.log')))
+        shutil.rmtree(directory)
+
+    def test_5(self):
+        directory = tempfile.mkdtemp()
+        result = write_log(os.path.join(directory, 'test.log'), 'X' * 100)
+        cache = ExecutionCache(os.path.join(directory, 'cache'), max_size=10 ** 6)
+        for i, key in enumerate(['a' * 64, 'b' * 64, 'c' * 64]):
+            cache.put(key, result)
+            os.utime(cache._entry(key), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get('a' * 64, os.path.join(directory, 'restored.log'))
+        size = cache.size
+        assert cache.evict() == 0
+        cache.max_size = size * 2 // 3
+        assert cache.evict() == 1
+        assert cache.get('b' * 64, os.path.join(directory, 'restored.log')) is None
+        assert cache.get('a' * 64, os.path.join(directory, 'restored.log')) is not None
+        assert cache.get('c' * 64, os.path.join(directory, 'restored.log')) is not None
+        shutil.rmtree(directory)
+
+    def test_6(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        result = write_log(os.path.join(directory, 'test.log'), 'X' * 100)
+        cache = ExecutionCache(os.path.join(directory, 'cache'), max_size=10 ** 6)
+        scans = []
+        entries = cache._entries
+        monkeypatch.setattr(cache, '_entries', lambda: scans.append(1) or entries())
+        assert cache.evict() == 0
+        assert len(scans) == 1
+        for key in ['a' * 64, 'b' * 64, 'a' * 64]:
+            cache.put(key, result)
+            assert cache.evict() == 0
+        assert len(scans) == 1
+        assert cache._size == cache.size
+        cache.max_size = cache._size - 1
+        assert cache.evict() == 1
+        assert len(scans) == 3
+        shutil.rmtree(directory)
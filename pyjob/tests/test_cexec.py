@@ -1,12 +1,19 @@
 __author__ = 'Felix Simkovic'
 
+import asyncio
+import mock
 import os
 import pytest
+import shutil
 import sys
+import tempfile
 
-from pyjob.cexec import cexec
+from pyjob.cexec import acexec, cexec, cexec_stream, clear_which_cache, which
 from pyjob.exception import PyJobExecutableNotFoundError, PyJobExecutionError
 
+# pyjob.cexec is shadowed by the function of the same name in the package namespace
+CEXEC_MODULE = sys.modules[which.__module__]
+
 
 class TestCexec(object):
     def test_1(self):
@@ -23,10 +30,7 @@ class TestCexec(object):
         assert stdout == 'hello'
 
     def test_4(self):
-        if sys.version_info < (3, 0):
-            cmd = [sys.executable, '-c', 'import sys; print(raw_input()); sys.exit(0)']
-        else:
-            cmd = [sys.executable, '-c', 'import sys; print(input()); sys.exit(0)']
+        cmd = [sys.executable, '-c', 'import sys; print(input()); sys.exit(0)']
         stdout = cexec(cmd, stdin='hello')
         assert stdout == 'hello'
 
@@ -61,3 +65,157 @@ class TestCexec(object):
     def test_8(self):
         with pytest.raises(PyJobExecutableNotFoundError):
             cexec(['fjezfsdkj'])
+
+    def test_9(self):
+        cmd = [sys.executable, '-c', 'import sys; sys.stdout.buffer.write(b"\\xff\\xfe hello \\n")']
+        stdout = cexec(cmd, raw=True)
+        assert stdout == b'\xff\xfe hello'
+
+
+class TestAcexec(object):
+    @staticmethod
+    def run(coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_1(self):
+        stdout = self.run(acexec([sys.executable, '-c', 'import sys; print("hello"); sys.exit(0)']))
+        assert stdout == 'hello'
+
+    def test_2(self):
+        with pytest.raises(PyJobExecutionError):
+            self.run(acexec([sys.executable, '-c', 'import sys; sys.exit(1)']))
+
+    def test_3(self):
+        cmd = [sys.executable, '-c', 'import sys; print("hello"); sys.exit(1)']
+        stdout = self.run(acexec(cmd, permit_nonzero=True))
+        assert stdout == 'hello'
+
+    def test_4(self):
+        stdout = self.run(acexec([sys.executable, '-c', 'import sys; print(input()); sys.exit(0)'], stdin='hello'))
+        assert stdout == 'hello'
+
+    def test_5(self):
+        with pytest.raises(PyJobExecutableNotFoundError):
+            self.run(acexec(['fjezfsdkj']))
+
+    def test_6(self):
+        async def main():
+            cmd = [sys.executable, '-c', 'import sys, time; time.sleep(0.5); print("hello")']
+            return await asyncio.gather(*[acexec(list(cmd)) for _ in range(5)])
+
+        assert self.run(main()) == ['hello'] * 5
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+class TestCexecStream(object):
+    def test_1(self):
+        cmd = [sys.executable, '-c', 'import sys; [print(i) for i in range(5)]']
+        assert list(cexec_stream(cmd)) == ['0', '1', '2', '3', '4']
+
+    def test_2(self):
+        cmd = [sys.executable, '-c', 'import sys; sys.stdout.write("a" * 10)']
+        chunks = list(cexec_stream(cmd, chunksize=4))
+        assert ''.join(chunks) == 'a' * 10
+        assert all(len(c) <= 4 for c in chunks)
+
+    def test_3(self):
+        cmd = [sys.executable, '-c', 'import sys; print("hello"); sys.exit(1)']
+        stream = cexec_stream(cmd)
+        assert next(stream) == 'hello'
+        with pytest.raises(PyJobExecutionError):
+            next(stream)
+
+    def test_4(self):
+        cmd = [sys.executable, '-c', 'import sys; print("hello"); sys.exit(1)']
+        assert list(cexec_stream(cmd, permit_nonzero=True)) == ['hello']
+
+    def test_5(self):
+        cmd = [sys.executable, '-c', 'import sys; [print(i) for i in range(3)]']
+        fname = 'test.log'
+        assert list(cexec_stream(cmd, tee=fname)) == ['0', '1', '2']
+        with open(fname, 'r') as f:
+            assert f.read().split() == ['0', '1', '2']
+        pytest.helpers.unlink([fname])
+
+    def test_6(self):
+        cmd = [sys.executable, '-c', 'import sys; print(sys.stdin.read().upper())']
+        assert list(cexec_stream(cmd, stdin='hello')) == ['HELLO']
+
+    def test_7(self):
+        cmd = [sys.executable, '-u', '-c', 'import time\nwhile True:\n    print("x")\n    time.sleep(0.01)']
+        stream = cexec_stream(cmd)
+        assert next(stream) == 'x'
+        stream.close()
+
+    def test_8(self):
+        cmd = [sys.executable, '-c', 'print("\\u00e9" * 3)']
+        env = dict(os.environ, PYTHONIOENCODING='utf-8')
+        assert ''.join(cexec_stream(cmd, chunksize=1, env=env)).strip() == '\u00e9' * 3
+
+    def test_9(self):
+        with open('test.log', 'w') as f:
+            with pytest.raises(ValueError):
+                list(cexec_stream([sys.executable, '-c', 'print(1)'], stdout=f))
+        pytest.helpers.unlink(['test.log'])
+
+
+class TestWhich(object):
+    @staticmethod
+    def make_exe(directory, name):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            f.write('#!/bin/bash')
+        os.chmod(path, 0o777)
+        return path
+
+    def test_1(self):
+        clear_which_cache()
+        directory = tempfile.mkdtemp()
+        exe = self.make_exe(directory, 'pyjob_which_test')
+        with mock.patch.dict(os.environ, {'PATH': directory}):
+            assert which('pyjob_which_test') == exe
+            with mock.patch.object(CEXEC_MODULE, 'is_exe', return_value=True) as is_exe_mock:
+                assert which('pyjob_which_test') == exe
+                assert is_exe_mock.call_count == 1
+        shutil.rmtree(directory)
+
+    def test_2(self):
+        clear_which_cache()
+        directory1, directory2 = tempfile.mkdtemp(), tempfile.mkdtemp()
+        exe1 = self.make_exe(directory1, 'pyjob_which_test')
+        exe2 = self.make_exe(directory2, 'pyjob_which_test')
+        with mock.patch.dict(os.environ, {'PATH': directory1}):
+            assert which('pyjob_which_test') == exe1
+        with mock.patch.dict(os.environ, {'PATH': directory2}):
+            assert which('pyjob_which_test') == exe2
+        shutil.rmtree(directory1)
+        shutil.rmtree(directory2)
+
+    def test_3(self):
+        clear_which_cache()
+        directory1, directory2 = tempfile.mkdtemp(), tempfile.mkdtemp()
+        exe1 = self.make_exe(directory1, 'pyjob_which_test')
+        exe2 = self.make_exe(directory2, 'pyjob_which_test')
+        with mock.patch.dict(os.environ, {'PATH': os.pathsep.join([directory1, directory2])}):
+            assert which('pyjob_which_test') == exe1
+            os.unlink(exe1)
+            assert which('pyjob_which_test') == exe2
+        shutil.rmtree(directory1)
+        shutil.rmtree(directory2)
+
+    def test_4(self):
+        clear_which_cache()
+        directory = tempfile.mkdtemp()
+        with mock.patch.dict(os.environ, {'PATH': directory}):
+            assert which('pyjob_which_test') is None
+            exe = self.make_exe(directory, 'pyjob_which_test')
+            assert which('pyjob_which_test') == exe
+            with mock.patch.object(CEXEC_MODULE, 'is_exe', return_value=True) as is_exe_mock:
+                assert which('pyjob_which_test', cache=False) == exe
+                assert which('pyjob_which_test', cache=False) == exe
+                assert is_exe_mock.call_count == 2
+        shutil.rmtree(directory)
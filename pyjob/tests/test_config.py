@@ -1,15 +1,14 @@
 __author__ = 'Felix Simkovic'
 
+import mock
 import os
 import pytest
-import sys
+import shutil
+import tempfile
 
-from pyjob.config import PyJobConfig
+from pyjob.config import LazyPyJobConfig, PyJobConfig
 from pyjob.exception import DictLockedError
 
-if sys.version_info.major < 3:
-    FileNotFoundError = IOError
-
 
 class TestPyJobConfig(object):
     def test_1(self):
@@ -80,3 +79,54 @@ cutoff: 1.0
         config['platform'] = 'local'
         assert config['platform'] == 'local'
         os.unlink(fname)
+
+
+class TestPyJobConfigDefault(object):
+    def test_1(self):
+        directory = tempfile.mkdtemp()
+        fname = os.path.join(directory, '.pyjob', 'pyjob.yml')
+        with mock.patch.object(PyJobConfig, 'file', fname):
+            config = PyJobConfig.from_default()
+        assert config == {}
+        assert not os.path.exists(os.path.dirname(fname))
+        shutil.rmtree(directory)
+
+    def test_2(self):
+        directory = tempfile.mkdtemp()
+        fname = os.path.join(directory, '.pyjob', 'pyjob.yml')
+        with mock.patch.object(PyJobConfig, 'file', fname):
+            config = PyJobConfig.from_default()
+            config.setdefault('processes', value=4)
+            assert os.path.isfile(fname)
+            assert PyJobConfig.from_default() == {'processes': 4}
+        shutil.rmtree(directory)
+
+
+class TestLazyPyJobConfig(object):
+    def test_1(self):
+        loader = mock.Mock(return_value=PyJobConfig(platform='local'))
+        config = LazyPyJobConfig(loader=loader)
+        assert not config.loaded
+        assert not loader.called
+        assert config.get('platform') == 'local'
+        assert config.get('processes') is None
+        assert config.loaded
+        assert loader.call_count == 1
+
+    def test_2(self):
+        config = LazyPyJobConfig(loader=lambda: PyJobConfig(platform='local', processes=2))
+        assert config['platform'] == 'local'
+        assert 'processes' in config
+        assert len(config) == 2
+        assert sorted(config) == ['platform', 'processes']
+        assert config == {'platform': 'local', 'processes': 2}
+        config['platform'] = 'sge'
+        assert config['platform'] == 'sge'
+        del config['platform']
+        assert config == {'processes': 2}
+
+    def test_3(self):
+        config = LazyPyJobConfig(loader=lambda: PyJobConfig(platform='local'))
+        config.lock()
+        with pytest.raises(DictLockedError):
+            config['platform'] = 'sge'
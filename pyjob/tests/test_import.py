@@ -0,0 +1,36 @@
+__author__ = 'Felix Simkovic'
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+IMPORT_CHECK = """
+import json, sys
+import pyjob
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+class TestImport(object):
+    @staticmethod
+    def import_pyjob(home):
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        cwd = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        stdout = subprocess.check_output([sys.executable, '-c', IMPORT_CHECK], env=env, cwd=cwd)
+        return set(__import__('json').loads(stdout.decode()))
+
+    def test_1(self):
+        home = tempfile.mkdtemp()
+        modules = TestImport.import_pyjob(home)
+        assert os.listdir(home) == []
+        shutil.rmtree(home)
+        assert 'pyjob' in modules
+
+    def test_2(self):
+        home = tempfile.mkdtemp()
+        modules = TestImport.import_pyjob(home)
+        shutil.rmtree(home)
+        for module in ('yaml', 'chardet', 'multiprocessing', 'asyncio', 'pyjob.pool', 'pyjob.task'):
+            assert module not in modules
@@ -1,12 +1,18 @@
 __author__ = 'Felix Simkovic'
 
+import asyncio
 import os
 import pytest
+import shutil
 import sys
+import tempfile
 import time
 
+from pyjob.cache import ExecutionCache
 from pyjob.exception import PyJobError, PyJobTaskLockedError
-from pyjob.local import CPU_COUNT, LocalTask
+from pyjob.local import CPU_COUNT, LocalExecutor, LocalTask, append_journal, read_journal
+from pyjob.script import Script
+from pyjob.task import ScriptResult
 
 
 @pytest.mark.skipif(pytest.on_windows, reason='Deadlock on Windows')
@@ -109,6 +115,32 @@ class TestLocalTaskTermination(object):
         assert all_found
 
 
+@pytest.mark.skipif(pytest.on_windows, reason='Deadlock on Windows')
+class TestLocalTaskWait(object):
+    def test_wait_1(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(2)]
+        task = LocalTask(scripts, processes=CPU_COUNT)
+        task.run()
+        start = time.time()
+        task.wait(interval=30)
+        elapsed = time.time() - start
+        all_found = all(os.path.isfile(f) for f in task.log)
+        pytest.helpers.unlink(task.script + task.log)
+        assert all_found
+        assert elapsed < 10
+
+    def test_wait_2(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(2)]
+        task = LocalTask(scripts, processes=CPU_COUNT)
+        task.run()
+        task.wait()
+        start = time.time()
+        assert task._wait_for_event(30)
+        elapsed = time.time() - start
+        pytest.helpers.unlink(task.script + task.log)
+        assert elapsed < 1
+
+
 @pytest.mark.skipif(pytest.on_windows, reason='Deadlock on Windows')
 class TestLocalPerformance(object):
     def test_performance_1(self):
@@ -142,3 +174,462 @@ class TestLocalPerformance(object):
         all_found = all(os.path.isfile(f) for f in task.log)
         pytest.helpers.unlink(task.script + task.log)
         assert all_found
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Deadlock on Windows')
+class TestLocalExecutor(object):
+    def test_executor_1(self):
+        with LocalExecutor(processes=2) as executor:
+            tasks = []
+            for i in range(3):
+                scripts = [pytest.helpers.get_py_script(i * 10 + j, 10) for j in range(4)]
+                task = LocalTask(scripts, executor=executor)
+                task.run()
+                tasks.append(task)
+            for task in tasks:
+                task.wait()
+            workers = [proc.pid for proc in executor._workers]
+            assert executor.alive
+        all_found = all(os.path.isfile(f) for task in tasks for f in task.log)
+        pytest.helpers.unlink([f for task in tasks for f in task.script + task.log])
+        assert all_found
+        assert len(set(workers)) == 2
+
+    def test_executor_2(self):
+        with LocalExecutor(processes=1) as executor:
+            slow = LocalTask([pytest.helpers.get_py_script(i, 100000) for i in range(5)], executor=executor)
+            fast = LocalTask([pytest.helpers.get_py_script(i, 10) for i in range(10, 12)], executor=executor)
+            slow.run()
+            fast.run()
+            slow.kill()
+            fast.wait()
+            assert executor.alive
+        slow_logs = [os.path.isfile(f) for f in slow.log]
+        fast_logs = [os.path.isfile(f) for f in fast.log]
+        pytest.helpers.unlink(slow.script + slow.log + fast.script + fast.log)
+        assert not all(slow_logs)
+        assert all(fast_logs)
+
+    def test_executor_3(self):
+        executor = LocalExecutor(processes=1)
+        executor.shutdown()
+        assert not executor.alive
+        with pytest.raises(PyJobError):
+            executor.submit(['/some/script.sh'])
+
+    def test_executor_4(self):
+        script = pytest.helpers.get_py_script(0, 10)
+        script.append('\timport sys; sys.exit(1)')
+        with LocalExecutor(processes=1) as executor:
+            with LocalTask(script, executor=executor) as task:
+                task.run()
+            assert executor.alive
+        pytest.helpers.unlink(task.script + task.log)
+
+    def test_executor_5(self):
+        script = pytest.helpers.get_py_script(0, 10)
+        script.append('\timport os, signal; os.kill(os.getppid(), signal.SIGKILL)')
+        with LocalExecutor(processes=1) as executor:
+            worker = executor._workers[0].pid
+            with LocalTask(script, executor=executor) as task:
+                task.run()
+                finished = executor.wait(task._task_id, timeout=30)
+                results = task.results
+            other = LocalTask(pytest.helpers.get_py_script(1, 10), executor=executor)
+            other.run()
+            other_finished = executor.wait(other._task_id, timeout=30)
+            replaced = worker not in [proc.pid for proc in executor._workers]
+            assert executor.alive
+        pytest.helpers.unlink(task.script + task.log + other.script + other.log)
+        assert finished and other_finished and replaced
+        assert results[0].error == 'Worker process died with exit code -9'
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Deadlock on Windows')
+class TestLocalExecutorSchedule(object):
+    @staticmethod
+    def get_scripts(n, fname):
+        scripts = []
+        for i in range(n):
+            shebang = '#!{}'.format(sys.executable)
+            script = Script(shebang=shebang, prefix='pyjob', stem='order{}'.format(i), suffix='.py')
+            script.append("open({!r}, 'a').write('{}\\n')".format(os.path.abspath(fname), i))
+            scripts.append(script)
+        return scripts
+
+    @staticmethod
+    def read_order(fname):
+        with open(fname, 'r') as f:
+            order = [int(l) for l in f]
+        os.unlink(fname)
+        return order
+
+    def test_schedule_1(self):
+        fname = 'order.txt'
+        scripts = self.get_scripts(4, fname)
+        with LocalTask(scripts, processes=1, schedule='longest', weights=[1, 5, 2, 10]) as task:
+            task.run()
+        pytest.helpers.unlink(task.script + task.log)
+        assert self.read_order(fname) == [3, 1, 2, 0]
+
+    def test_schedule_2(self):
+        fname = 'order.txt'
+        scripts = self.get_scripts(4, fname)
+        with LocalTask(scripts, processes=1, weights=[1, 5, 2, 10]) as task:
+            task.run()
+        pytest.helpers.unlink(task.script + task.log)
+        assert self.read_order(fname) == [0, 1, 2, 3]
+
+    def test_schedule_3(self):
+        fname = 'order.txt'
+        scripts = self.get_scripts(3, fname)
+        [s.write() for s in scripts]
+        paths = [s.path for s in scripts]
+        with LocalExecutor(processes=1, schedule='longest') as executor:
+            executor.runtimes.update({paths[0]: 0.1, paths[2]: 9.0})
+            executor.wait(executor.submit(paths, weights={paths[1]: 1.0}))
+            assert sorted(executor.runtimes) == sorted(paths)
+        pytest.helpers.unlink([s.path for s in scripts] + [s.log for s in scripts])
+        assert self.read_order(fname) == [2, 1, 0]
+
+    def test_schedule_4(self):
+        fname = 'order.txt'
+        history = 'runtimes.json'
+        scripts = self.get_scripts(2, fname)
+        [s.write() for s in scripts]
+        paths = [s.path for s in scripts]
+        with LocalExecutor(processes=1, history=history) as executor:
+            executor.wait(executor.submit(paths))
+        with LocalExecutor(processes=1, history=history) as executor:
+            assert sorted(executor.runtimes) == sorted(paths)
+        pytest.helpers.unlink(paths + [s.log for s in scripts] + [history, fname])
+
+    def test_schedule_5(self):
+        with pytest.raises(ValueError):
+            LocalExecutor(processes=1, schedule='random')
+        with LocalExecutor(processes=1, schedule='longest') as executor:
+            with pytest.raises(ValueError):
+                executor.submit(['/some/script.sh'], weights=[1, 2])
+            assert executor._tasks == {}
+
+    def test_schedule_6(self):
+        fname = 'order.txt'
+        scripts = self.get_scripts(3, fname)
+        [s.write() for s in scripts]
+        paths = [s.path for s in scripts]
+        with LocalExecutor(processes=1) as executor:
+            executor.wait(executor.submit(paths))
+            assert executor.runtimes == {}
+        with LocalExecutor(processes=1, schedule='longest') as executor:
+            executor.max_runtimes = 2
+            executor.wait(executor.submit(paths))
+            assert list(executor.runtimes) == paths[1:]
+        pytest.helpers.unlink(paths + [s.log for s in scripts] + [fname])
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Deadlock on Windows')
+class TestLocalTaskResults(object):
+    def test_results_1(self):
+        scripts = [pytest.helpers.get_py_script(i, 1000) for i in range(3)]
+        with LocalTask(scripts, processes=2) as task:
+            task.run()
+            task.wait(interval=1)
+        results = task.results
+        pytest.helpers.unlink(task.script + task.log)
+        assert sorted(r.script for r in results) == sorted(task.script)
+        assert all(r.log == r.script.replace('.py', '.log') for r in results)
+        assert all(r.exit_code == 0 and r.error is None for r in results)
+        assert all(r.wall_time > 0 for r in results)
+        assert all(r.user_time >= 0 and r.system_time >= 0 for r in results)
+        assert all(r.max_rss > 1024 for r in results)
+
+    def test_results_2(self):
+        script = pytest.helpers.get_py_script(0, 10)
+        script.append('\timport sys; sys.exit(3)')
+        with LocalTask(script, processes=1) as task:
+            task.run()
+        results = task.results
+        pytest.helpers.unlink(task.script + task.log)
+        assert len(results) == 1
+        assert results[0].exit_code == 3
+        assert 'non-zero return code (3)' in results[0].error
+
+    def test_results_3(self):
+        script = pytest.helpers.get_py_script(0, 10)
+        script.append('\timport sys; sys.exit(3)')
+        with LocalTask(script, processes=1, permit_nonzero=True) as task:
+            task.run()
+        results = task.results
+        pytest.helpers.unlink(task.script + task.log)
+        assert results[0].exit_code == 3
+        assert results[0].error is None
+
+    def test_results_4(self):
+        script = pytest.helpers.get_py_script(0, 10)
+        script.append('\timport os, signal; os.kill(os.getpid(), signal.SIGKILL)')
+        with LocalTask(script, processes=1) as task:
+            task.run()
+        results = task.results
+        pytest.helpers.unlink(task.script + task.log)
+        assert results[0].exit_code == -9
+        assert results[0].error
+
+    def test_results_5(self):
+        task = LocalTask(pytest.helpers.get_py_script(0, 10))
+        assert task.results == []
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Deadlock on Windows')
+class TestLocalTaskAsync(object):
+    @staticmethod
+    def run(coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_async_1(self):
+        tasks = [LocalTask([pytest.helpers.get_py_script(i * 10 + j, 10) for j in range(2)]) for i in range(3)]
+
+        async def main():
+            await asyncio.gather(*[task.arun() for task in tasks])
+            await asyncio.gather(*[task.await_completion(interval=5) for task in tasks])
+
+        start = time.time()
+        self.run(main())
+        elapsed = time.time() - start
+        all_found = all(os.path.isfile(f) for task in tasks for f in task.log)
+        completed = all(task.completed for task in tasks)
+        for task in tasks:
+            task.close()
+        pytest.helpers.unlink([f for task in tasks for f in task.script + task.log])
+        assert all_found and completed
+        assert elapsed < 10
+
+    def test_async_2(self):
+        with LocalExecutor(processes=1) as executor:
+            task = LocalTask([pytest.helpers.get_py_script(i, 10) for i in range(10)], executor=executor)
+            self.run(task.arun())
+            self.run(task.akill())
+            assert task.completed
+        some_logs_found = not all(os.path.isfile(f) for f in task.log)
+        pytest.helpers.unlink(task.script + task.log)
+        assert some_logs_found
+
+    def test_async_3(self):
+        with LocalExecutor(processes=1) as executor:
+            task = LocalTask(pytest.helpers.get_py_script(0, 10), executor=executor, sealed=False)
+            task.run()
+
+            async def poll():
+                for _ in range(3):
+                    assert not await task._await_event(0.01)
+
+            self.run(poll())
+            callbacks = len(executor._tasks[task._task_id].callbacks)
+            task.seal()
+            finished = executor.wait(task._task_id, timeout=10)
+            other = LocalTask(pytest.helpers.get_py_script(1, 10), executor=executor)
+            other.run()
+            other_finished = executor.wait(other._task_id, timeout=10)
+            assert executor.alive
+        pytest.helpers.unlink(task.script + task.log + other.script + other.log)
+        assert callbacks == 1
+        assert finished and other_finished
+
+
+class TestLocalTaskOpenQueue(object):
+    def test_open_queue_1(self):
+        scripts = [pytest.helpers.get_py_script(i, 1000) for i in range(6)]
+        with LocalTask(None, processes=2, sealed=False) as task:
+            task.run()
+            for script in scripts:
+                task.add_script(script)
+            start = time.time()
+            while len(task.results) < len(scripts) and time.time() - start < 30:
+                time.sleep(0.05)
+            assert len(task.results) == len(scripts)
+            assert task.info
+            task.seal()
+            task.wait(interval=1)
+            assert not task.info
+        pytest.helpers.unlink(task.script + task.log)
+        assert task.script == [s.path for s in scripts]
+        assert sorted(r.script for r in task.results) == sorted(task.script)
+        assert all(r.exit_code == 0 for r in task.results)
+
+    def test_open_queue_2(self):
+        script = pytest.helpers.get_py_script(0, 10)
+        with LocalTask(script, processes=1, sealed=False) as task:
+            task.run()
+            task.seal()
+            with pytest.raises(PyJobTaskLockedError):
+                task.add_script(pytest.helpers.get_py_script(1, 10))
+            task.wait(interval=1)
+        pytest.helpers.unlink(task.script + task.log)
+        assert len(task.results) == 1
+
+    def test_open_queue_3(self):
+        scripts = [pytest.helpers.get_py_script(i, 10) for i in range(2)]
+        with LocalTask(scripts[:1], processes=1, sealed=False) as task:
+            task.run()
+            task.add_script(scripts[1])
+        pytest.helpers.unlink(task.script + task.log)
+        assert task.completed
+        assert len(task.results) == 2
+
+    def test_open_queue_4(self):
+        scripts = [pytest.helpers.get_py_script(i, 10) for i in range(2)]
+        [s.write() for s in scripts]
+        with LocalExecutor(processes=1) as executor:
+            task_id = executor.submit([], sealed=False)
+            assert not executor.wait(task_id, timeout=0.1)
+            executor.extend(task_id, [scripts[0].path])
+            executor.extend(task_id, [scripts[1].path])
+            assert not executor.wait(task_id, timeout=0.5)
+            executor.seal(task_id)
+            assert executor.wait(task_id, timeout=30)
+            with pytest.raises(PyJobError):
+                executor.extend(task_id, [scripts[0].path])
+            assert len(executor.results(task_id)) == 2
+        pytest.helpers.unlink([s.path for s in scripts] + [s.log for s in scripts])
+
+
+class TestLocalTaskCache(object):
+    def test_cache_1(self):
+        directory = tempfile.mkdtemp()
+        counter = os.path.join(directory, 'counter.txt')
+        cache = ExecutionCache(os.path.join(directory, 'cache'))
+        scripts = []
+        for i in range(3):
+            script = pytest.helpers.get_py_script(i, 10)
+            script.append("\topen({!r}, 'a').write('x')".format(counter))
+            scripts.append(script)
+        for _ in range(2):
+            with LocalTask(scripts, processes=2, cache=cache) as task:
+                task.run()
+            assert sorted(r.script for r in task.results) == sorted(s.path for s in scripts)
+            assert all(r.exit_code == 0 for r in task.results)
+            assert all(os.path.isfile(s.log) for s in scripts)
+            pytest.helpers.unlink([s.log for s in scripts])
+        with open(counter) as f_in:
+            assert f_in.read() == 'xxx'
+        pytest.helpers.unlink([s.path for s in scripts])
+        shutil.rmtree(directory)
+
+    def test_cache_2(self):
+        directory = tempfile.mkdtemp()
+        cache = ExecutionCache(os.path.join(directory, 'cache'))
+        script = pytest.helpers.get_py_script(0, 10)
+        script.append('\traise SystemExit(1)')
+        for _ in range(2):
+            with LocalTask(script, processes=1, cache=cache) as task:
+                task.run()
+            assert task.results[0].exit_code == 1
+            assert task.pid is not None
+        pytest.helpers.unlink(task.script + task.log)
+        assert cache.size == 0
+        shutil.rmtree(directory)
+
+    def test_cache_3(self):
+        directory = tempfile.mkdtemp()
+        counter = os.path.join(directory, 'counter.txt')
+        cache = ExecutionCache(os.path.join(directory, 'cache'))
+        scripts = []
+        for i in range(3):
+            script = pytest.helpers.get_py_script(i, 10)
+            script.append("\topen({!r}, 'a').write('{}')".format(counter, i))
+            scripts.append(script)
+        with LocalTask(scripts[:2], processes=1, cache=cache) as task:
+            task.run()
+        with LocalTask(scripts[:1], processes=1, cache=cache, sealed=False) as task:
+            task.run()
+            task.add_script(scripts[1:])
+        assert task.pid is not None
+        assert [r.script for r in task.results] == [s.path for s in scripts]
+        pytest.helpers.unlink([s.path for s in scripts] + [s.log for s in scripts])
+        with open(counter) as f_in:
+            assert f_in.read() == '012'
+        shutil.rmtree(directory)
+
+
+class TestLocalTaskResume(object):
+    def test_resume_1(self):
+        directory = tempfile.mkdtemp()
+        journal = os.path.join(directory, 'test.journal')
+        append_journal(journal, ScriptResult('/a b/test.py', '/a b/test.log', 0, 1.5, None, None, None, None))
+        append_journal(journal, ScriptResult('/c.py', '/c.log', None, None, None, None, None, 'Failed'))
+        with open(journal, 'a') as f_out:
+            f_out.write('1 0 1.000 /d')
+        records = read_journal(journal)
+        assert sorted(records) == ['/a b/test.py', '/c.py']
+        assert records['/a b/test.py'] == ScriptResult('/a b/test.py', '/a b/test.log', 0, 1.5, None, None, None, None)
+        assert records['/c.py'].exit_code is None
+        assert records['/c.py'].error
+        assert read_journal(os.path.join(directory, 'missing.journal')) == {}
+        shutil.rmtree(directory)
+
+    def test_resume_2(self):
+        directory = tempfile.mkdtemp()
+        counter = os.path.join(directory, 'counter.txt')
+        scripts = []
+        for i in range(4):
+            script = pytest.helpers.get_py_script(i, 10)
+            script.append("\topen({!r}, 'a').write('{}')".format(counter, i))
+            scripts.append(script)
+        journal = os.path.join(directory, 'test.journal')
+        append_journal(journal, ScriptResult(scripts[0].path, scripts[0].log, 0, 1.0, None, None, None, None))
+        append_journal(journal, ScriptResult(scripts[1].path, scripts[1].log, 1, 1.0, None, None, None, 'Failed'))
+        append_journal(journal, ScriptResult(scripts[2].path, scripts[2].log, 0, 1.0, None, None, None, None))
+        with LocalTask(scripts, processes=2, resume=True, journal=journal) as task:
+            task.run()
+        pytest.helpers.unlink(task.script + task.log)
+        with open(counter) as f_in:
+            assert sorted(f_in.read()) == ['1', '3']
+        assert [r.script for r in task.results[:2]] == [scripts[0].path, scripts[2].path]
+        assert sorted(r.script for r in task.results[2:]) == [scripts[1].path, scripts[3].path]
+        assert all(r.error is None for r in read_journal(journal).values())
+        pytest.helpers.unlink([scripts[0].path, scripts[2].path])
+        shutil.rmtree(directory)
+
+    def test_resume_3(self):
+        directory = tempfile.mkdtemp()
+        journal = os.path.join(directory, 'test.journal')
+        scripts = [pytest.helpers.get_py_script(i, 10) for i in range(2)]
+        append_journal(journal, ScriptResult('/other.py', '/other.log', 0, 1.0, None, None, None, None))
+        with LocalTask(scripts, processes=1, journal=journal) as task:
+            task.run()
+        pytest.helpers.unlink(task.script + task.log)
+        assert len(task.results) == 2
+        assert sorted(read_journal(journal)) == sorted(s.path for s in scripts)
+        shutil.rmtree(directory)
+
+    def test_resume_4(self):
+        directory = tempfile.mkdtemp()
+        script = pytest.helpers.get_py_script(0, 10)
+        with LocalTask(script, processes=1, directory=directory, resume=True) as task:
+            task.run()
+        assert task.journal == os.path.join(directory, 'pyjob.journal')
+        assert list(read_journal(task.journal)) == [script.path]
+        with LocalTask(script, processes=1, directory=directory, resume=True) as task:
+            task.run()
+        assert task.pid is None
+        assert len(task.results) == 1
+        pytest.helpers.unlink([script.path, script.log])
+        shutil.rmtree(directory)
+
+    def test_resume_5(self):
+        directory = tempfile.mkdtemp()
+        journal = os.path.join(directory, 'test.journal')
+        scripts = [pytest.helpers.get_py_script(i, 10) for i in range(3)]
+        append_journal(journal, ScriptResult(scripts[0].path, scripts[0].log, 0, 1.0, None, None, None, None))
+        append_journal(journal, ScriptResult(scripts[1].path, scripts[1].log, 0, 1.0, None, None, None, None))
+        with LocalTask(scripts[:1], processes=1, resume=True, journal=journal, sealed=False) as task:
+            task.run()
+            task.add_script(scripts[1:])
+        assert task.pid is not None
+        assert [r.script for r in task.results] == [s.path for s in scripts]
+        assert [r.wall_time for r in task.results[:2]] == [1.0, 1.0]
+        pytest.helpers.unlink(task.script + task.log)
+        shutil.rmtree(directory)
@@ -45,7 +45,9 @@ class TestCreateRunscript(object):
             '#BSUB -R "span[ptile=1]"',
             '#BSUB -J pyjob[1-3]%3',
             '#BSUB -o {}'.format(logf),
-            'script=$(awk "NR==$(($LSB_JOBINDEX + 1))" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($LSB_JOBINDEX + 1 - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -69,7 +71,9 @@ class TestCreateRunscript(object):
             '#BSUB -R "span[ptile=1]"',
             '#BSUB -J pyjob[1-3]%1',
             '#BSUB -o {}'.format(logf),
-            'script=$(awk "NR==$(($LSB_JOBINDEX + 1))" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($LSB_JOBINDEX + 1 - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -234,3 +238,53 @@ class TestCreateRunscript(object):
             '#BSUB -o ' + paths[0].replace('.py', '.log'),
             paths[0],
         ]
+
+
+class TestParseStatus(object):
+    def test_1(self):
+        stdout = """JOBID   USER    STAT  QUEUE      FROM_HOST   EXEC_HOST   JOB_NAME   SUBMIT_TIME
+100     user    DONE  normal     host1       host2       pyjob[1]   Jun 19 10:52
+100     user    RUN   normal     host1       host2       pyjob[2]   Jun 19 10:52
+101     user    EXIT  normal     host1       host2       pyjob      Jun 19 10:52
+Job <102> is not found"""
+        assert LoadSharingFacilityTask._parse_status(stdout, [100, 101, 102]) == {
+            100: {'job_number': 100, 'status': 'RUN'}
+        }
+
+    def test_2(self):
+        stdout = 'LSF is down. Please wait ...'
+        assert LoadSharingFacilityTask._parse_status(stdout, [100]) is None
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+@mock.patch('pyjob.lsf.LoadSharingFacilityTask._check_requirements')
+class TestResults(object):
+    def test_1(self, check_requirements_mock):
+        stdout = '\n'.join(
+            [
+                '100|1|DONE|-|65 second(s)|1.5 Mbytes',
+                '100|2|EXIT|2|3 second(s)|-',
+                '100|3|RUN|-|1 second(s)|2 Mbytes',
+            ]
+        )
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        task = LoadSharingFacilityTask(scripts)
+        task.pid = 100
+        with mock.patch('pyjob.task.cexec', return_value=stdout) as cexec_mock:
+            results = task.results
+        task.pid = None
+        assert cexec_mock.call_args[0][0][:3] == ['bjobs', '-a', '-noheader']
+        assert cexec_mock.call_args[0][0][-1] == '100'
+        assert [r.exit_code for r in results] == [0, 2, None]
+        assert [r.wall_time for r in results] == [65.0, 3.0, None]
+        assert [r.max_rss for r in results] == [1536, None, None]
+        assert results[1].error == 'Array element 2 exited with code 2'
+
+    def test_2(self, check_requirements_mock):
+        task = LoadSharingFacilityTask([pytest.helpers.get_py_script(0, 1)])
+        task.pid = 100
+        with mock.patch('pyjob.task.cexec', return_value='100|0|EXIT|-|0 second(s)|-'):
+            results = task.results
+        task.pid = None
+        assert results[0].exit_code == 1
+        assert results[0].error == 'Job 100 exited with code 1'
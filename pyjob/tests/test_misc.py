@@ -1,6 +1,9 @@
 __author__ = 'Felix Simkovic'
 
-from pyjob.misc import typecast
+import mock
+import pytest
+
+from pyjob.misc import ExponentialBackoff, decode, typecast
 
 
 class TestTypecast(object):
@@ -47,3 +50,56 @@ class TestTypecast(object):
         output = typecast({'int': ['1', '2', 3], 'bool': 'False', 'mixed': ['3.0', 'foo'], 'char': 't', 'str': 'test'})
         assert isinstance(output, dict)
         assert output == {'int': [1, 2, 3], 'bool': False, 'mixed': [3.0, 'foo'], 'char': 't', 'str': 'test'}
+
+
+class TestDecode(object):
+    def test_1(self):
+        assert decode(b'hello world') == 'hello world'
+
+    def test_2(self):
+        assert decode('h\u00e9llo w\u00f6rld'.encode('utf-8')) == 'h\u00e9llo w\u00f6rld'
+
+    def test_3(self):
+        assert decode('h\u00e9llo'.encode('latin-1'), encoding='latin-1') == 'h\u00e9llo'
+
+    def test_4(self):
+        with mock.patch('pyjob.misc._decode_detected', return_value='detected') as detected:
+            assert decode(b'hello') == 'hello'
+            assert not detected.called
+
+    def test_5(self):
+        with mock.patch('pyjob.misc._decode_detected', return_value='detected') as detected, \
+                mock.patch('locale.getpreferredencoding', return_value='ascii'):
+            assert decode(b'\xff\xfe\xfd') == 'detected'
+            assert detected.called
+
+    def test_6(self):
+        assert decode(b'') == ''
+
+
+class TestExponentialBackoff(object):
+    def test_1(self):
+        backoff = ExponentialBackoff(initial=1, maximum=30, jitter=0.0)
+        assert [next(backoff) for _ in range(7)] == [1, 2, 4, 8, 16, 30, 30]
+
+    def test_2(self):
+        backoff = ExponentialBackoff(initial=1, maximum=10, jitter=0.5)
+        delays = [next(backoff) for _ in range(20)]
+        assert all(0.5 <= d <= 10 for d in delays)
+        assert delays[-1] > 5
+
+    def test_3(self):
+        backoff = ExponentialBackoff(initial=1, maximum=30, jitter=0.0)
+        [next(backoff) for _ in range(5)]
+        backoff.reset()
+        assert next(backoff) == 1
+
+    def test_4(self):
+        backoff = ExponentialBackoff(initial=60, maximum=30, jitter=0.0)
+        assert next(backoff) == 30
+
+    def test_5(self):
+        with pytest.raises(ValueError):
+            ExponentialBackoff(initial=0)
+        with pytest.raises(ValueError):
+            ExponentialBackoff(jitter=1.0)
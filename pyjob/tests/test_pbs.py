@@ -50,7 +50,9 @@ class TestCreateRunscript(object):
             '#PBS -t 1-3%3',
             '#PBS -o {}'.format(logf),
             '#PBS -e {}'.format(logf),
-            'script=$(awk "NR==$PBS_ARRAYID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($PBS_ARRAYID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -77,7 +79,9 @@ class TestCreateRunscript(object):
             '#PBS -t 1-3%1',
             '#PBS -o {}'.format(logf),
             '#PBS -e {}'.format(logf),
-            'script=$(awk "NR==$PBS_ARRAYID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($PBS_ARRAYID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -240,3 +244,78 @@ class TestCreateRunscript(object):
             '#PBS -e ' + paths[0].replace('.py', '.log'),
             paths[0],
         ]
+
+    def test_12(self, check_requirements_mock):
+        check_requirements_mock.return_value = None
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(1)]
+        [s.write() for s in scripts]
+        paths = [s.path for s in scripts]
+        task = PortableBatchSystemTask(paths, dependency=['1.server\n', 2])
+        runscript = task._create_runscript()
+        pytest.helpers.unlink(paths)
+        assert runscript.content[:3] == ['#PBS -V', '#PBS -N pyjob', '#PBS -W depend=afterok:1.server:2']
+
+
+class TestParseStatus(object):
+    def test_1(self):
+        stdout = """Job ID                    Name             User            Time Use S Queue
+------------------------- ---------------- --------------- -------- - -----
+100[].server              pyjob            user                   0 R batch
+101.server                pyjob            user            00:00:01 C batch
+102.server                pyjob            user                   0 Q batch
+qstat: Unknown Job Id 103.server"""
+        pids = ['100[].server', '101.server', '102.server', '103.server']
+        assert PortableBatchSystemTask._parse_status(stdout, pids) == {
+            '100[].server': {'job_number': '100[].server', 'status': 'R'},
+            '102.server': {'job_number': '102.server', 'status': 'Q'},
+        }
+
+    def test_2(self):
+        stdout = 'qstat: cannot connect to server server (errno=111) Connection refused'
+        assert PortableBatchSystemTask._parse_status(stdout, ['100.server']) is None
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+@mock.patch('pyjob.pbs.PortableBatchSystemTask._check_requirements')
+class TestResults(object):
+    def test_1(self, check_requirements_mock):
+        stdout = """Job Id: 100[].server
+    Job_Name = pyjob
+    job_state = F
+
+Job Id: 100[1].server
+    resources_used.cput = 00:00:01
+    resources_used.mem = 1480kb
+    resources_used.walltime = 00:01:05
+    Exit_status = 0
+
+Job Id: 100[2].server
+    resources_used.mem = 2mb
+    resources_used.walltime = 00:00:03
+    Exit_status = 2
+
+Job Id: 100[3].server
+    job_state = R"""
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        task = PortableBatchSystemTask(scripts)
+        task.pid = '100[].server'
+        with mock.patch('pyjob.task.cexec', return_value=stdout) as cexec_mock:
+            results = task.results
+        task.pid = None
+        assert cexec_mock.call_args[0][0] == ['qstat', '-x', '-f', '-t', '100[].server']
+        assert [r.exit_code for r in results] == [0, 2, None]
+        assert [r.wall_time for r in results] == [65.0, 3.0, None]
+        assert [r.max_rss for r in results] == [1480, 2048, None]
+        assert results[0].user_time is None
+        assert results[1].error == 'Array element 2 exited with code 2'
+
+    def test_2(self, check_requirements_mock):
+        stdout = 'Job Id: 100.server\n    exit_status = 265\n    resources_used.walltime = 01:00:00\n'
+        task = PortableBatchSystemTask([pytest.helpers.get_py_script(0, 1)])
+        task.pid = '100.server'
+        with mock.patch('pyjob.task.cexec', return_value=stdout):
+            results = task.results
+        task.pid = None
+        assert results[0].exit_code == -9
+        assert results[0].wall_time == 3600.0
+        assert results[0].error == 'Job 100.server exited with code -9'
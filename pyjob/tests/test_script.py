@@ -1,13 +1,18 @@
 __author__ = 'Felix Simkovic'
 
+import logging
 import os
 import pytest
+import shutil
 import tempfile
+import time
+import weakref
 
 from pyjob.exception import PyJobError
 from pyjob.script import Script
 from pyjob.script import ScriptCollector
 from pyjob.script import ScriptProperty
+from pyjob.script import ScriptTemplate
 from pyjob.script import LocalScriptCreator
 from pyjob.script import is_valid_script_path
 
@@ -131,6 +136,88 @@ class TestScriptCollector(object):
         assert script == ['what the hell']
         assert script is not content
 
+    def test_22(self):
+        directory = tempfile.mkdtemp()
+        scripts = [Script(directory=directory, stem='s{}'.format(i)) for i in range(200)]
+        for i, script in enumerate(scripts):
+            script.append('echo {}'.format(i))
+        sc = ScriptCollector(scripts)
+        assert sc.dump(processes=8) == 200
+        assert all(os.access(s.path, os.X_OK) for s in scripts)
+        with open(scripts[123].path, 'r') as f:
+            assert f.read().splitlines() == ['#!/bin/bash', 'echo 123']
+        shutil.rmtree(directory)
+
+    def test_23(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        with open(scripts[1].path, 'w') as f:
+            f.write('existing')
+        sc = ScriptCollector(scripts)
+        assert sc.dump() == 2
+        assert sc.dump() == 0
+        with open(scripts[1].path, 'r') as f:
+            assert f.read() == 'existing'
+        pytest.helpers.unlink([s.path for s in scripts])
+
+    def test_24(self):
+        script = pytest.helpers.get_py_script(0, 1)
+        with open(script.path, 'w') as f:
+            f.write('existing')
+        os.chmod(script.path, 0o644)
+        assert not script.write(exclusive=True)
+        assert script.write()
+        assert os.access(script.path, os.X_OK)
+        with open(script.path, 'r') as f:
+            assert f.read() == str(script)
+        pytest.helpers.unlink([script.path])
+
+    def test_25(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in (1, 100, 10)]
+        collector = ScriptCollector(scripts)
+        width = collector.bundle('test.bundle', 'test.index')
+        assert not any(os.path.isfile(s.path) for s in scripts)
+        with open('test.index', 'rb') as f:
+            records = f.readlines()
+        assert [len(r) for r in records] == [width] * 3
+        with open('test.bundle', 'rb') as f:
+            data = f.read()
+        for script, record in zip(scripts, records):
+            offset, length, log = record.decode().split()
+            assert data[int(offset):int(offset) + int(length)].decode() == str(script) + '\n'
+            assert log == script.log
+        pytest.helpers.unlink(['test.bundle', 'test.index'])
+
+    def test_26(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        [s.write() for s in scripts]
+        sc = ScriptCollector([os.path.relpath(s.path) for s in scripts])
+        assert sc.paths == [s.path for s in scripts]
+        assert sc.logs == [s.log for s in scripts]
+        assert sc.scripts == scripts
+        assert [s.shebang for s in sc] == [s.shebang for s in scripts]
+        os.unlink(scripts[0].path)
+        assert sc.dump() == 0
+        assert not os.path.isfile(scripts[0].path)
+        pytest.helpers.unlink([s.path for s in scripts[1:]])
+
+    def test_27(self):
+        script = pytest.helpers.get_py_script(0, 1)
+        assert not hasattr(script, '__dict__')
+        with pytest.raises(AttributeError):
+            script.name = 'test'
+        assert weakref.ref(script)() is script
+        assert Script(directory='.').directory is Script(directory='.').directory
+
+    def test_28(self, caplog):
+        script = pytest.helpers.get_py_script(0, 1)
+        script.write()
+        template = ScriptTemplate('echo {}', range(3), prefix='pyjob', stem='test')
+        sc = ScriptCollector([script.path, template])
+        with caplog.at_level(logging.DEBUG, logger='pyjob.script'):
+            assert sc.dump() == 3
+        assert 'Wrote 3 of 3 scripts' in caplog.text
+        pytest.helpers.unlink([script.path] + template.paths)
+
 
 class TestScriptRead(object):
     def test_read_1(self):
@@ -261,3 +348,96 @@ class TestLocalScriptCreator(object):
         options = [1, 2, 3, 4, 5]
         script_creator = LocalScriptCreator(func=self, iterable=options, processes=nproc)
         assert script_creator.collector.scripts == [['echo 1'], ['echo 2'], ['echo 3'], ['echo 4'], ['echo 5']]
+
+    @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+    def test_2(self):
+        options = (i for i in range(100))
+        script_creator = LocalScriptCreator(func=self, iterable=options, processes=2, chunksize=3)
+        assert script_creator.collector.scripts == [['echo {}'.format(i)] for i in range(100)]
+
+    @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+    def test_3(self):
+        options = ('pyjobtest{}'.format(i) for i in range(50))
+        script_creator = LocalScriptCreator(func=self.named_function, iterable=options, processes=2, chunksize=4)
+        sc = script_creator.dump()
+        paths = [os.path.join(os.getcwd(), 'pyjobtest{}.sh'.format(i)) for i in range(50)]
+        assert sorted(sc.paths) == sorted(paths)
+        assert all(os.path.isfile(p) for p in paths)
+        assert sorted(s.content for s in sc) == sorted(['echo pyjobtest{}'.format(i)] for i in range(50))
+        pytest.helpers.unlink(paths)
+
+    @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+    def test_4(self):
+        consumed = []
+
+        def options():
+            for i in range(10000):
+                consumed.append(i)
+                yield i
+
+        script_creator = LocalScriptCreator(func=self, iterable=options(), processes=2, chunksize=2)
+        results = script_creator._imap(self, ordered=True)
+        assert [next(results).content for _ in range(20)] == [['echo {}'.format(i)] for i in range(20)]
+        time.sleep(0.5)
+        assert len(consumed) <= 20 + 2 * 2 * 4 + 1
+        results.close()
+
+    @staticmethod
+    def named_function(option):
+        script = Script(directory=os.getcwd(), prefix='', stem=option)
+        script.append('echo {}'.format(option))
+        return script
+
+
+class TestScriptTemplate(object):
+    def test_1(self):
+        template = ScriptTemplate('echo {} {index}', ['a', 'b', 'c'], prefix='pyjob', stem='test')
+        assert len(template) == 3
+        assert template.paths == [os.path.join(os.getcwd(), 'pyjobtest{}.sh'.format(i)) for i in range(3)]
+        assert template.logs == [os.path.join(os.getcwd(), 'pyjobtest{}.log'.format(i)) for i in range(3)]
+        assert list(template) == [['echo a 0'], ['echo b 1'], ['echo c 2']]
+        assert [s.path for s in template] == template.paths
+
+    def test_2(self):
+        template = ScriptTemplate(['cd {directory}', 'run {name}'], [{'directory': '/tmp', 'name': 'x'}])
+        assert template.render(0) == ['cd /tmp', 'run x']
+        template = ScriptTemplate('run {1} {0}', [(1, 2)])
+        assert template.render(0) == ['run 2 1']
+
+    def test_3(self):
+        template = ScriptTemplate('echo {}', (i for i in range(5)))
+        assert len(template) == 5
+        template = ScriptTemplate('echo {}', range(10 ** 9))
+        assert len(template) == 10 ** 9
+        assert template.render(10 ** 8) == ['echo 100000000']
+        with pytest.raises(ValueError):
+            ScriptTemplate('echo {}', [], suffix='')
+
+    @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+    def test_4(self):
+        script = pytest.helpers.get_py_script(0, 1)
+        template = ScriptTemplate('echo {}', range(100), prefix='pyjob', stem='test')
+        sc = ScriptCollector([script, template])
+        assert len(sc) == 101
+        assert sc.paths == [script.path] + template.paths
+        assert sc.logs == [script.log] + template.logs
+        assert sc.dump(processes=4) == 101
+        assert all(os.path.isfile(path) for path in sc.paths)
+        assert sc.dump(processes=4) == 0
+        with open(template.paths[42], 'r') as f:
+            assert f.read() == '#!/bin/bash\necho 42'
+        pytest.helpers.unlink(sc.paths)
+        sc.scripts = []
+        assert len(sc) == 0
+
+    def test_5(self):
+        with pytest.raises(ValueError):
+            ScriptTemplate('echo ${HOME} {}', ['a'])
+        with pytest.raises(ValueError):
+            ScriptTemplate("awk '{print $1}' {}", ['a'])
+        with pytest.raises(ValueError):
+            ScriptTemplate('echo {} {1}', ['a'])
+        with pytest.raises(ValueError):
+            ScriptTemplate('echo {', [])
+        template = ScriptTemplate("echo ${{HOME}} | awk '{{print $1}}' {name}", [{'name': 'a'}])
+        assert template.render(0) == ["echo ${HOME} | awk '{print $1}' a"]
@@ -70,7 +70,9 @@ class TestCreateRunscript(object):
             '#$ -wd ' + os.getcwd(),
             '#$ -t 1-3 -tc 3',
             '#$ -o {}'.format(logf),
-            'script=$(awk "NR==$SGE_TASK_ID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($SGE_TASK_ID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -99,7 +101,9 @@ class TestCreateRunscript(object):
             '#$ -wd ' + os.getcwd(),
             '#$ -t 1-3 -tc 1',
             '#$ -o {}'.format(logf),
-            'script=$(awk "NR==$SGE_TASK_ID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($SGE_TASK_ID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -316,3 +320,88 @@ class TestCreateRunscript(object):
                                          queue='dummy-queue')
 
         task = MockSunGridEngineTask(paths, extra=['-l mem=100', '-r yes'], environment='mpi', queue='medium.q')
+
+
+class TestParseStatus(object):
+    def test_1(self):
+        stdout = """job-ID  prior   name       user         state submit/start at     queue    slots ja-task-ID
+-----------------------------------------------------------------------------------------------
+    100 0.55500 pyjob      user         r     06/19/2019 10:52:04 all.q@node1  1 1
+    100 0.55500 pyjob      user         qw    06/19/2019 10:52:00              1 2-5:1
+    101 0.55500 pyjob      user         qw    06/19/2019 10:52:00              1"""
+        assert SunGridEngineTask._parse_status(stdout, [100, 101, 102]) == {
+            100: {'job_number': 100, 'status': 'r'},
+            101: {'job_number': 101, 'status': 'qw'},
+        }
+
+    def test_2(self):
+        stdout = 'error: failed receiving gdi request response for mid=1 (got syncron message receive timeout error).'
+        assert SunGridEngineTask._parse_status(stdout, [100]) is None
+
+
+class TestGetSgeAvailConfigs(object):
+    @mock.patch.dict(SunGridEngineTask._sge_avail_configs_by_env, clear=True)
+    @mock.patch('pyjob.sge.cexec')
+    def test_1(self, cexec_mock):
+        cexec_mock.return_value = 'mpi\nsmp\n'
+        assert SunGridEngineTask.get_sge_avail_configs(SGEConfigParameter.ENVIRONMENT) == {'mpi', 'smp'}
+        cexec_mock.return_value = 'all.q\nlow.q\n'
+        assert SunGridEngineTask.get_sge_avail_configs(SGEConfigParameter.QUEUE) == {'all.q', 'low.q'}
+        assert [c[0][0] for c in cexec_mock.call_args_list] == [['qconf', '-spl'], ['qconf', '-sql']]
+
+    @mock.patch.dict(SunGridEngineTask._sge_avail_configs_by_env, clear=True)
+    @mock.patch('pyjob.sge.cexec')
+    @mock.patch('pyjob.task.ClusterTask._ensure_exec_available')
+    def test_2(self, ensure_exec_mock, cexec_mock):
+        ensure_exec_mock.return_value = None
+        cexec_mock.side_effect = lambda cmd, **kwargs: 'mpi\nsmp\n' if cmd[-1] == '-spl' else 'all.q\n'
+        script = pytest.helpers.get_py_script(0, 1)
+        task = SunGridEngineTask(script, environment='mpi', queue='all.q')
+        assert task.environment == 'mpi'
+        with pytest.raises(PyJobError):
+            SunGridEngineTask(script, environment='openmp')
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+class TestResults(object):
+    @mock.patch('pyjob.sge.SunGridEngineTask._check_requirements')
+    def test_1(self, check_requirements_mock):
+        stdout = """==============================================================
+qname        all.q
+jobnumber    100
+taskid       1
+exit_status  0
+ru_wallclock 12s
+ru_utime     10.500s
+ru_stime     0.250s
+ru_maxrss    1480
+==============================================================
+qname        all.q
+jobnumber    100
+taskid       2
+exit_status  137
+ru_wallclock 3
+ru_utime     0.010
+ru_stime     0.005
+ru_maxrss    2048"""
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        task = SunGridEngineTask(scripts)
+        task.pid = 100
+        with mock.patch('pyjob.task.cexec', return_value=stdout) as cexec_mock:
+            results = task.results
+        task.pid = None
+        assert cexec_mock.call_args[0][0] == ['qacct', '-j', '100']
+        assert [r.exit_code for r in results] == [0, 137, None]
+        assert [r.wall_time for r in results] == [12.0, 3.0, None]
+        assert [r.user_time for r in results] == [10.5, 0.01, None]
+        assert [r.max_rss for r in results] == [1480, 2048, None]
+        assert results[1].error == 'Array element 2 exited with code 137'
+
+    @mock.patch('pyjob.sge.SunGridEngineTask._check_requirements')
+    def test_2(self, check_requirements_mock):
+        task = SunGridEngineTask([pytest.helpers.get_py_script(0, 1)])
+        task.pid = 100
+        with mock.patch('pyjob.task.cexec', return_value='error: job id 100 not found'):
+            results = task.results
+        task.pid = None
+        assert [r.exit_code for r in results] == [None]
@@ -0,0 +1,148 @@
+__author__ = 'Felix Simkovic'
+
+import os
+import pytest
+import shutil
+import tempfile
+import time
+
+from pyjob.cache import ExecutionCache
+from pyjob.lsf import LoadSharingFacilityTask
+from pyjob.pbs import PortableBatchSystemTask
+from pyjob.script import Script
+from pyjob.sge import SunGridEngineTask
+from pyjob.simulator import SchedulerSimulator, main
+from pyjob.slurm import SlurmTask
+from pyjob.torque import TorqueTask
+
+
+def get_scripts(directory, commands):
+    scripts = []
+    for i, command in enumerate(commands):
+        script = Script(directory=directory, prefix='sim', stem=str(i), suffix='.sh')
+        script.append(command)
+        scripts.append(script)
+    return scripts
+
+
+def run_task(task, monkeypatch):
+    monkeypatch.setattr(task.status_broker, 'interval', 0.1)
+    task.run()
+    task.wait(interval=0.5, min_interval=0.1)
+    return task
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+class TestSchedulerSimulator(object):
+    def test_1(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        scripts = get_scripts(directory, ['echo hello {}'.format(i) for i in range(3)])
+        with SchedulerSimulator('slurm', os.path.join(directory, 'state')) as simulator:
+            task = run_task(SlurmTask(scripts, directory=directory), monkeypatch)
+            assert [r.exit_code for r in task.results] == [0, 0, 0]
+            assert [job['state'] for job in simulator.jobs] == ['completed']
+            assert task.pid in task.status_broker._finished
+            task.close()
+            assert task.pid not in task.status_broker._finished
+            monkeypatch.setattr(task.status_broker, 'refresh', lambda: pytest.fail('Closed task queried'))
+            task.close()
+            assert task.info == {}
+            assert task.completed
+            assert task.pid not in task.status_broker._active
+        for i, script in enumerate(scripts):
+            with open(script.log) as f_in:
+                assert f_in.read() == 'hello {}\n'.format(i)
+        shutil.rmtree(directory)
+
+    def test_2(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        scripts = get_scripts(directory, ['exit 3'])
+        with SchedulerSimulator('sge', os.path.join(directory, 'state')) as simulator:
+            task = run_task(SunGridEngineTask(scripts, directory=directory), monkeypatch)
+            assert task.results[0].exit_code == 3
+            assert task.results[0].error
+            assert [job['state'] for job in simulator.jobs] == ['failed']
+        shutil.rmtree(directory)
+
+    @pytest.mark.parametrize(
+        'platform, task_class, n',
+        [('pbs', PortableBatchSystemTask, 2), ('torque', TorqueTask, 2), ('lsf', LoadSharingFacilityTask, 1)],
+    )
+    def test_3(self, monkeypatch, platform, task_class, n):
+        directory = tempfile.mkdtemp()
+        scripts = get_scripts(directory, ['echo hello'] * (n - 1) + ['exit 3'])
+        with SchedulerSimulator(platform, os.path.join(directory, 'state')) as simulator:
+            task = run_task(task_class(scripts, directory=directory), monkeypatch)
+            assert task.completed
+            assert [r.exit_code for r in task.results] == [0] * (n - 1) + [3]
+            assert task.results[-1].error
+            assert [job['state'] for job in simulator.jobs] == ['failed']
+        assert all(os.path.isfile(script.log) for script in scripts)
+        shutil.rmtree(directory)
+
+    def test_4(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        scripts = get_scripts(directory, ['echo hello'])
+        with SchedulerSimulator('slurm', os.path.join(directory, 'state'), latency=60) as simulator:
+            task = SlurmTask(scripts, directory=directory)
+            monkeypatch.setattr(task.status_broker, 'interval', 0.1)
+            task.run()
+            assert task.info['status'] == 'PENDING'
+            task.kill()
+            time.sleep(0.2)
+            assert task.completed
+            assert [job['state'] for job in simulator.jobs] == ['cancelled']
+        assert not os.path.isfile(scripts[0].log)
+        shutil.rmtree(directory)
+
+    def test_5(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        scripts = get_scripts(directory, ['sleep 0.2; exit 1', 'echo hello'])
+        with SchedulerSimulator('slurm', os.path.join(directory, 'state')) as simulator:
+            parent = SlurmTask(scripts[:1], directory=directory)
+            parent.run()
+            child = run_task(SlurmTask(scripts[1:], directory=directory, dependency=[parent.pid]), monkeypatch)
+            assert [job['state'] for job in simulator.jobs] == ['failed', 'cancelled']
+        assert not os.path.isfile(scripts[1].log)
+        assert child.results[0].exit_code is None
+        shutil.rmtree(directory)
+
+    def test_6(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        scripts = get_scripts(directory, ['sleep 0.2'] * 3)
+        with SchedulerSimulator('slurm', os.path.join(directory, 'state'), latency=0.2, slots=1) as simulator:
+            task = run_task(SlurmTask(scripts, directory=directory), monkeypatch)
+            records = simulator.records(task.pid)
+            job = simulator.jobs[0]
+        assert len(records) == 3
+        starts = sorted(record['start'] for record in records)
+        assert starts[0] - job['submitted'] >= 0.2
+        assert all(b - a >= 0.2 for a, b in zip(starts, starts[1:]))
+        shutil.rmtree(directory)
+
+    def test_7(self, capsys):
+        directory = tempfile.mkdtemp()
+        assert main(['sge', '-d', directory, '--slots', '2']) == 0
+        bin_directory = os.path.join(directory, 'bin')
+        assert capsys.readouterr().out == 'export PATH={}:$PATH\n'.format(bin_directory)
+        assert sorted(os.listdir(bin_directory)) == ['qacct', 'qconf', 'qdel', 'qstat', 'qsub']
+        assert all(os.access(os.path.join(bin_directory, f), os.X_OK) for f in os.listdir(bin_directory))
+        with pytest.raises(ValueError):
+            SchedulerSimulator('unknown')
+        shutil.rmtree(directory)
+
+    def test_8(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        cache = ExecutionCache(os.path.join(directory, 'cache'))
+        scripts = get_scripts(directory, ['echo hello {}'.format(i) for i in range(4)])
+        with SchedulerSimulator('slurm', os.path.join(directory, 'state')):
+            with SlurmTask(scripts[:2], directory=directory, cache=cache) as task:
+                run_task(task, monkeypatch)
+            with SlurmTask(scripts, directory=directory, cache=cache) as task:
+                run_task(task, monkeypatch)
+                results = task.results
+        assert task.pid is not None
+        assert [r.script for r in results[:2]] == [s.path for s in scripts[:2]]
+        assert sorted(r.script for r in results[2:]) == sorted(s.path for s in scripts[2:])
+        assert [r.exit_code for r in results] == [0, 0, 0, 0]
+        shutil.rmtree(directory)
@@ -1,5 +1,6 @@
 __author__ = 'Felix Simkovic'
 
+import asyncio
 import mock
 import os
 import pytest
@@ -48,7 +49,9 @@ class TestCreateRunscript(object):
             '#SBATCH --workdir=' + os.getcwd(),
             '#SBATCH --array=1-3%3',
             '#SBATCH -o {}'.format(logf),
-            'script=$(awk "NR==$SLURM_ARRAY_TASK_ID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($SLURM_ARRAY_TASK_ID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -74,7 +77,9 @@ class TestCreateRunscript(object):
             '#SBATCH --workdir=' + os.getcwd(),
             '#SBATCH --array=1-3%1',
             '#SBATCH -o {}'.format(logf),
-            'script=$(awk "NR==$SLURM_ARRAY_TASK_ID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($SLURM_ARRAY_TASK_ID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -191,3 +196,148 @@ class TestCreateRunscript(object):
             '#SBATCH -o ' + paths[0].replace('.py', '.log'),
             paths[0],
         ]
+
+    def test_10(self, check_requirements_mock):
+        check_requirements_mock.return_value = None
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(5)]
+        [s.write() for s in scripts]
+        paths = [s.path for s in scripts]
+        task = SlurmTask(paths, scripts_per_element=2, element_processes=2)
+        runscript = task._create_runscript()
+        logf = runscript.path.replace('.script', '.log')
+        jobsf = runscript.path.replace('.script', '.jobs')
+        with open(jobsf, 'r') as f_in:
+            jobs = [l.strip() for l in f_in]
+        pytest.helpers.unlink(paths + [jobsf])
+        assert runscript.content == [
+            '#SBATCH --export=ALL',
+            '#SBATCH --job-name=pyjob',
+            '#SBATCH -n 1',
+            '#SBATCH --workdir=' + os.getcwd(),
+            '#SBATCH --array=1-3%3',
+            '#SBATCH -o {}'.format(logf),
+            'skip=$((($SLURM_ARRAY_TASK_ID - 1) * 2))',
+            'dd if={} bs={} skip=$skip count=2 2>/dev/null | sed "s/ *$//" | tr "\\n" "\\0" | '
+            'xargs -0 -n 1 -P 2 sh -c \'"$0" > "${{0%.*}}.log" 2>&1\''.format(jobsf, max(map(len, paths)) + 1),
+        ]
+        assert jobs == paths
+
+    def test_11(self, check_requirements_mock):
+        check_requirements_mock.return_value = None
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        task = SlurmTask(scripts, bundle=True)
+        runscript = task._create_runscript()
+        bundlef = runscript.path.replace('.script', '.bundle')
+        indexf = runscript.path.replace('.script', '.index')
+        assert os.path.isfile(bundlef) and os.path.isfile(indexf)
+        assert not os.path.isfile(runscript.path.replace('.script', '.jobs'))
+        with open(indexf, 'rb') as f_in:
+            width = len(f_in.readline())
+        runscript.cleanup()
+        assert not os.path.isfile(bundlef) and not os.path.isfile(indexf)
+        assert runscript.content[-2:] == [
+            "run='set -- $(dd if={0} bs={1} skip=$(($0 - 1)) count=1 2>/dev/null); tmp=$(mktemp {2}.XXXXXX); "
+            "tail -c +$(($1 + 1)) {2} | head -c $2 > $tmp; chmod +x $tmp; $tmp > \"$3\" 2>&1; "
+            "status=$?; rm -f $tmp; exit $status'".format(indexf, width, bundlef),
+            'sh -c "$run" $(($SLURM_ARRAY_TASK_ID))',
+        ]
+
+
+class TestParseStatus(object):
+    def test_1(self):
+        stdout = '100_[3-5%5] PENDING\n100_1 RUNNING\n100_2 RUNNING\n101 RUNNING'
+        assert SlurmTask._parse_status(stdout, [100, 101, 102]) == {
+            100: {'job_number': 100, 'status': 'PENDING'},
+            101: {'job_number': 101, 'status': 'RUNNING'},
+        }
+
+    def test_2(self):
+        stdout = 'slurm_load_jobs error: Invalid job id specified'
+        assert SlurmTask._parse_status(stdout, [100]) == {}
+
+    def test_3(self):
+        stdout = 'slurm_load_jobs error: Socket timed out on send/recv operation'
+        assert SlurmTask._parse_status(stdout, [100]) is None
+
+    def test_4(self):
+        assert SlurmTask._status_command([100, 101]) == ['squeue', '-h', '-o', '%i %T', '-j', '100,101']
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+@mock.patch('pyjob.slurm.SlurmTask._check_requirements')
+class TestAsync(object):
+    def test_1(self, check_requirements_mock):
+        async def acexec(cmd, **kwargs):
+            if cmd[0] == 'sbatch':
+                return 'Submitted batch job 1234'
+            return '1234 RUNNING' if cmd[0] == 'squeue' else ''
+
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(1)]
+        task = SlurmTask(scripts)
+        loop = asyncio.new_event_loop()
+        with mock.patch('pyjob.task.acexec', side_effect=acexec), mock.patch('pyjob.broker.acexec', side_effect=acexec):
+            loop.run_until_complete(task.arun())
+            info = loop.run_until_complete(task.ainfo())
+        loop.close()
+        task.status_broker.unregister(task.pid)
+        pytest.helpers.unlink(task.script + [task.runscript.path])
+        task.pid = None
+        assert info == {'job_number': 1234, 'status': 'RUNNING'}
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+@mock.patch('pyjob.slurm.SlurmTask._check_requirements')
+class TestResults(object):
+    def test_1(self, check_requirements_mock):
+        stdout = '\n'.join(
+            [
+                '1234_1|0:0|65|01:02.500|00:01.250|',
+                '1234_1.batch|0:0|65|01:02.500|00:01.250|1480K',
+                '1234_2|2:0|3|00:00.010|00:00.005|',
+                '1234_2.batch|2:0|3|00:00.010|00:00.005|2M',
+                '1234_[3-4]|0:0|0|00:00:00|00:00:00|',
+            ]
+        )
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        task = SlurmTask(scripts)
+        task.pid = 1234
+        with mock.patch('pyjob.task.cexec', return_value=stdout) as cexec_mock:
+            results = task.results
+        task.pid = None
+        assert cexec_mock.call_count == 1
+        assert cexec_mock.call_args[0][0][:5] == ['sacct', '-n', '-P', '-j', '1234']
+        assert [r.script for r in results] == task.script
+        assert [r.log for r in results] == task.log
+        assert [r.exit_code for r in results] == [0, 2, None]
+        assert [r.wall_time for r in results] == [65.0, 3.0, None]
+        assert results[0].user_time == 62.5
+        assert results[0].system_time == 1.25
+        assert [r.max_rss for r in results] == [1480, 2048, None]
+        assert results[0].error is None
+        assert results[1].error == 'Array element 2 exited with code 2'
+
+    def test_2(self, check_requirements_mock):
+        stdout = '1234|0:9|7|1-00:00:01|00:00:00|\n1234.batch|0:9|7|1-00:00:01|00:00:00|1G'
+        task = SlurmTask([pytest.helpers.get_py_script(0, 1)])
+        task.pid = 1234
+        with mock.patch('pyjob.task.cexec', return_value=stdout):
+            results = task.results
+        task.pid = None
+        assert len(results) == 1
+        assert results[0].exit_code == -9
+        assert results[0].user_time == 86401.0
+        assert results[0].max_rss == 1024 ** 2
+        assert results[0].error == 'Job 1234 exited with code -9'
+
+    def test_3(self, check_requirements_mock):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(5)]
+        task = SlurmTask(scripts, scripts_per_element=2)
+        task.pid = 1234
+        with mock.patch('pyjob.task.cexec', return_value='1234_2|1:0|3|00:01|00:01|\n1234_3|0:0|3|00:01|00:01|'):
+            results = task.results
+        task.pid = None
+        assert [r.exit_code for r in results] == [None, None, 1, 1, 0]
+
+    def test_4(self, check_requirements_mock):
+        task = SlurmTask([pytest.helpers.get_py_script(0, 1)])
+        assert task.results == []
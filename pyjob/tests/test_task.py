@@ -1,11 +1,17 @@
 __author__ = 'Felix Simkovic'
 
+import asyncio
 import os
 import pytest
+import shutil
+import subprocess
+import tempfile
+import time
 
+from pyjob.cache import ExecutionCache
 from pyjob.exception import PyJobError, PyJobTaskLockedError
 from pyjob.script import ScriptCollector
-from pyjob.task import Task, ClusterTask
+from pyjob.task import ScriptResult, Task, ClusterTask
 
 
 class MockTask(Task):
@@ -168,6 +174,47 @@ class TestTask(object):
         assert task.info == {}
         assert task.log == []
 
+    def test_16(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(2)]
+        task = MockTask(scripts)
+        results = task.results
+        assert [r.script for r in results] == task.script
+        assert [r.log for r in results] == task.log
+        assert all(r.exit_code is None and r.error is None for r in results)
+
+
+class TestTaskAsync(object):
+    @staticmethod
+    def run(coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_1(self):
+        script = pytest.helpers.get_py_script(0, 1)
+        task = MockTask(script)
+        self.run(task.arun())
+        assert task.locked
+        with pytest.raises(PyJobTaskLockedError):
+            self.run(task.arun())
+        pytest.helpers.unlink(task.script)
+
+    def test_2(self):
+        task = MockTask(None)
+        with pytest.raises(PyJobError):
+            self.run(task.arun())
+        assert not task.locked
+
+    def test_3(self):
+        script = pytest.helpers.get_py_script(0, 1)
+        task = MockTask(script)
+        self.run(task.arun())
+        self.run(task.await_completion(interval=1))
+        assert self.run(task.ainfo()) == {}
+        pytest.helpers.unlink(task.script)
+
 
 @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
 class TestClusterTask(object):
@@ -211,6 +258,108 @@ class TestClusterTask(object):
             task.get_array_bash_extension(fname, -1)
         pytest.helpers.unlink([fname])
 
+    def test_get_array_bash_extension_6(self):
+        task = MockClusterTask(None, scripts_per_element=10, element_processes=4)
+        fname = 'test.jobs'
+        open(fname, 'w')
+        assert task.get_array_bash_extension(fname, 1) == [
+            'first=$((($TEST + 1 - 1) * 10 + 1))',
+            'last=$(($first + 9))',
+            'sed -n "${first},${last}p;${last}q" test.jobs | tr "\\n" "\\0" | '
+            'xargs -0 -n 1 -P 4 sh -c \'"$0" > "${0%.*}.log" 2>&1\'',
+        ]
+        pytest.helpers.unlink([fname])
+
+    def test_get_array_bash_extension_7(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(5)]
+        [s.write() for s in scripts]
+        task = MockClusterTask(scripts, scripts_per_element=2, element_processes=2)
+        fname = 'test.jobs'
+        width = task._write_jobs_file(fname)
+        for w in (None, width):
+            cmd = '\n'.join(task.get_array_bash_extension(fname, 0, width=w))
+            subprocess.check_call(['bash', '-c', cmd], env=dict(os.environ, TEST='2'))
+            assert [os.path.isfile(log) for log in task.log] == [False, False, True, True, False]
+            with open(task.log[2], 'r') as f:
+                assert f.read().strip() == '1th fib is: 0'
+            pytest.helpers.unlink(task.log)
+        pytest.helpers.unlink(task.script + [fname])
+
+    def test_get_array_bash_extension_8(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(12)]
+        [s.write() for s in scripts]
+        task = MockClusterTask(scripts)
+        fname = 'test.jobs'
+        width = task._write_jobs_file(fname)
+        cmd = '\n'.join(task.get_array_bash_extension(fname, 1, width=width))
+        subprocess.check_call(['bash', '-c', cmd], env=dict(os.environ, TEST='10'))
+        assert [os.path.isfile(log) for log in task.log] == [False] * 10 + [True, False]
+        pytest.helpers.unlink(task.script + task.log + [fname])
+
+    def test_write_jobs_file_1(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in (1, 100, 10)]
+        [s.write() for s in scripts]
+        task = MockClusterTask(scripts)
+        fname = 'test.jobs'
+        width = task._write_jobs_file(fname)
+        assert width == len(scripts[1].path) + 1
+        with open(fname, 'r') as f:
+            lines = f.readlines()
+        assert [len(l) for l in lines] == [width] * 3
+        assert [l.rstrip() for l in lines] == task.script
+        pytest.helpers.unlink(task.script)
+        pytest.helpers.unlink([fname])
+
+    def test_get_bundle_bash_extension_1(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(5)]
+        task = MockClusterTask(scripts, bundle=True)
+        width = task.script_collector.bundle('test.bundle', 'test.index')
+        cmd = '\n'.join(task.get_bundle_bash_extension('test.bundle', 'test.index', 1, width))
+        subprocess.check_call(['bash', '-c', cmd], env=dict(os.environ, TEST='2', TMPDIR='/nonexistent'))
+        assert not any(os.path.isfile(path) for path in task.script)
+        assert not any(f.startswith('test.bundle.') for f in os.listdir('.'))
+        assert [os.path.isfile(log) for log in task.log] == [False, False, True, False, False]
+        with open(task.log[2], 'r') as f:
+            assert f.read().strip() == '1th fib is: 0'
+        pytest.helpers.unlink(task.log + ['test.bundle', 'test.index'])
+
+    def test_get_bundle_bash_extension_2(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(5)]
+        task = MockClusterTask(scripts, bundle=True, scripts_per_element=2, element_processes=2)
+        width = task.script_collector.bundle('test.bundle', 'test.index')
+        cmd = '\n'.join(task.get_bundle_bash_extension('test.bundle', 'test.index', 0, width))
+        for index in ('2', '3'):
+            subprocess.check_call(['bash', '-c', cmd], env=dict(os.environ, TEST=index))
+        assert not any(os.path.isfile(path) for path in task.script)
+        assert [os.path.isfile(log) for log in task.log] == [False, False, True, True, True]
+        pytest.helpers.unlink(task.log + ['test.bundle', 'test.index'])
+
+    def test_get_bundle_bash_extension_3(self):
+        task = MockClusterTask(None)
+        with pytest.raises(ValueError):
+            task.get_bundle_bash_extension('test.bundle', 'test.index', 0, 10)
+
+    def test_dump_scripts_1(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        MockClusterTask(scripts, bundle=True)._prepare_run()
+        assert not any(os.path.isfile(s.path) for s in scripts)
+        MockClusterTask(scripts[:1], bundle=True)._prepare_run()
+        assert os.path.isfile(scripts[0].path)
+        pytest.helpers.unlink([scripts[0].path])
+
+    def test_array_size_1(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(5)]
+        assert MockClusterTask(scripts).array_size == 5
+        assert MockClusterTask(scripts, scripts_per_element=2).array_size == 3
+        assert MockClusterTask(scripts, scripts_per_element=5).array_size == 1
+        assert MockClusterTask(scripts, scripts_per_element=8).array_size == 1
+
+    def test_array_size_2(self):
+        with pytest.raises(ValueError):
+            MockClusterTask(None, scripts_per_element=-1)
+        with pytest.raises(ValueError):
+            MockClusterTask(None, element_processes=-2)
+
     def test_ensure_exec_available_1(self):
         task = MockClusterTask(None)
         with pytest.raises(PyJobError):
@@ -219,3 +368,34 @@ class TestClusterTask(object):
     def test_ensure_exec_available_2(self):
         task = MockClusterTask(None)
         task._ensure_exec_available('echo')
+
+    def test_wait_for_event_1(self):
+        task = MockClusterTask(None)
+        start = time.time()
+        assert not task._wait_for_event(0.1)
+        assert time.time() - start < 1
+
+    def test_cache_1(self):
+        directory = tempfile.mkdtemp()
+        cache = ExecutionCache(os.path.join(directory, 'cache'))
+        scripts = [pytest.helpers.get_py_script(i, i) for i in range(3)]
+        for script in scripts[:2]:
+            with open(script.log, 'w') as f_out:
+                f_out.write('cached')
+            cache.put(cache.key(script), ScriptResult(script.path, script.log, 0, 1.0, None, None, None, None))
+        pytest.helpers.unlink([s.log for s in scripts[:2]])
+        task = MockClusterTask(scripts, cache=cache)
+        task._prepare_run()
+        assert task.script == [scripts[2].path]
+        assert [r.script for r in task.results] == [s.path for s in scripts[:2]]
+        assert [r.exit_code for r in task.results] == [0, 0]
+        assert all(os.path.isfile(s.log) for s in scripts[:2])
+        pytest.helpers.unlink([s.log for s in scripts[:2]] + [scripts[2].path])
+        task = MockClusterTask(scripts[:2], cache=cache)
+        task.run()
+        assert task.locked
+        assert task.pid is None
+        assert len(task.script_collector) == 0
+        assert [r.wall_time for r in task.results] == [1.0, 1.0]
+        pytest.helpers.unlink([s.log for s in scripts[:2]])
+        shutil.rmtree(directory)
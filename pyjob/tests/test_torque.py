@@ -50,7 +50,9 @@ class TestCreateRunscript(object):
             '#PBS -t 1-3%3',
             '#PBS -o {}'.format(logf),
             '#PBS -e {}'.format(logf),
-            'script=$(awk "NR==$PBS_ARRAYID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($PBS_ARRAYID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -77,7 +79,9 @@ class TestCreateRunscript(object):
             '#PBS -t 1-3%1',
             '#PBS -o {}'.format(logf),
             '#PBS -e {}'.format(logf),
-            'script=$(awk "NR==$PBS_ARRAYID" {})'.format(jobsf),
+            'script=$(dd if={} bs={} skip=$(($PBS_ARRAYID - 1)) count=1 2>/dev/null | sed "s/ *$//")'.format(
+                jobsf, max(map(len, paths)) + 1
+            ),
             'log=$(echo $script | sed "s/\\.${script##*.}/\\.log/")',
             '$script > $log 2>&1',
         ]
@@ -240,3 +244,19 @@ class TestCreateRunscript(object):
             '#PBS -e ' + paths[0].replace('.py', '.log'),
             paths[0],
         ]
+
+
+@pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+@mock.patch('pyjob.torque.TorqueTask._check_requirements')
+class TestResults(object):
+    def test_1(self, check_requirements_mock):
+        stdout = 'Job Id: 100.server\n    resources_used.mem = 1gb\n    exit_status = 0\n'
+        task = TorqueTask([pytest.helpers.get_py_script(0, 1)])
+        task.pid = '100.server'
+        with mock.patch('pyjob.task.cexec', return_value=stdout) as cexec_mock:
+            results = task.results
+        task.pid = None
+        assert cexec_mock.call_args[0][0] == ['qstat', '-f', '-t', '100.server']
+        assert results[0].exit_code == 0
+        assert results[0].max_rss == 1024 ** 2
+        assert results[0].error is None
@@ -0,0 +1,245 @@
+__author__ = 'Felix Simkovic'
+
+import itertools
+import os
+import pytest
+import shutil
+import tempfile
+
+from pyjob.cache import ExecutionCache
+from pyjob.local import LocalTask
+from pyjob.script import Script
+from pyjob.sge import SunGridEngineTask
+from pyjob.simulator import SchedulerSimulator
+from pyjob.slurm import SlurmTask
+from pyjob.task import ClusterTask, ScriptResult
+from pyjob.workflow import Workflow
+
+
+class MockClusterTask(ClusterTask):
+    JOB_ARRAY_INDEX = '$TEST'
+    SCRIPT_DIRECTIVE = '#TEST'
+    PIDS = itertools.count(1)
+
+    def __init__(self, *args, **kwargs):
+        self.running = False
+        self.failed = False
+        self.killed = False
+        self.accounted = True
+        super(MockClusterTask, self).__init__(*args, **kwargs)
+
+    @property
+    def info(self):
+        return {'job_number': self.pid, 'status': 'RUNNING'} if self.running else {}
+
+    @property
+    def results(self):
+        error = 'Job {} exited with code 1'.format(self.pid) if self.failed else None
+        exit_code = int(self.failed) if self.accounted else None
+        return [ScriptResult(self.script[0], self.log[0], exit_code, None, None, None, None, error)]
+
+    def close(self):
+        pass
+
+    def kill(self):
+        self.killed = True
+        self.running = False
+
+    def run(self):
+        self._prepare_run()
+        self.pid = next(self.PIDS)
+        self.running = True
+        self.lock()
+
+    def _accounting_command(self):
+        return ['true']
+
+    def _check_requirements(self):
+        pass
+
+    def _create_runscript(self):
+        pass
+
+
+class NoAccountingClusterTask(MockClusterTask):
+    def _accounting_command(self):
+        return None
+
+
+class OtherClusterTask(MockClusterTask):
+    pass
+
+
+class TestWorkflow(object):
+    def test_1(self):
+        workflow = Workflow()
+        task = MockClusterTask(pytest.helpers.get_py_script(0, 1))
+        workflow.add(task)
+        with pytest.raises(ValueError):
+            workflow.add(task)
+        with pytest.raises(ValueError):
+            workflow.add(MockClusterTask(pytest.helpers.get_py_script(1, 1)), after=[object()])
+        assert len(workflow) == 1
+        assert list(workflow) == [task]
+        assert workflow.status == {task: 'pending'}
+
+    def test_2(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(4)]
+        workflow = Workflow()
+        a = workflow.add(MockClusterTask(scripts[0]))
+        b = workflow.add(MockClusterTask(scripts[1]), after=[a])
+        c = workflow.add(MockClusterTask(scripts[2]), after=[a])
+        d = workflow.add(MockClusterTask(scripts[3], dependency=[99]), after=[b, c])
+        assert workflow.run()
+        assert set(workflow.status.values()) == {'submitted'}
+        assert a.dependency == []
+        assert b.dependency == [a.pid]
+        assert c.dependency == [a.pid]
+        assert d.dependency == [99, b.pid, c.pid]
+        for task in workflow:
+            task.running = False
+        workflow.wait(min_interval=0.01)
+        assert set(workflow.status.values()) == {'done'}
+        pytest.helpers.unlink([s.path for s in scripts])
+
+    def test_3(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(3)]
+        workflow = Workflow()
+        a = workflow.add(MockClusterTask(scripts[0]))
+        b = workflow.add(OtherClusterTask(scripts[1]), after=[a])
+        c = workflow.add(MockClusterTask(scripts[2]), after=[b])
+        workflow.run()
+        assert list(workflow.status.values()) == ['submitted', 'pending', 'pending']
+        a.running = False
+        workflow.wait(min_interval=0.01, monitor_f=lambda: [setattr(t, 'running', False) for t in workflow])
+        assert set(workflow.status.values()) == {'done'}
+        assert b.dependency == [] and c.dependency == []
+        pytest.helpers.unlink([s.path for s in scripts])
+
+    def test_4(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(4)]
+        workflow = Workflow()
+        a = workflow.add(MockClusterTask(scripts[0]))
+        b = workflow.add(MockClusterTask(scripts[1]), after=[a])
+        c = workflow.add(OtherClusterTask(scripts[2]), after=[a])
+        d = workflow.add(MockClusterTask(scripts[3]))
+        workflow.run()
+        a.running = d.running = False
+        a.failed = True
+        workflow.wait(min_interval=0.01)
+        assert list(workflow.status.values()) == ['failed', 'skipped', 'skipped', 'done']
+        assert b.killed
+        assert c.pid is None
+        pytest.helpers.unlink([s.path for s in scripts[:2] + scripts[3:]])
+
+    @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+    def test_5(self):
+        scripts = [pytest.helpers.get_py_script(i, 10) for i in range(4)]
+        for i, script in enumerate(scripts):
+            script.append("\twith open('order.txt', 'a') as f: f.write('{}\\n')".format(i))
+        scripts[2].append('\timport sys; sys.exit(1)')
+        with Workflow() as workflow:
+            a = workflow.add(LocalTask(scripts[0], processes=1))
+            b = workflow.add(LocalTask(scripts[1], processes=1), after=[a])
+            c = workflow.add(LocalTask(scripts[2], processes=1), after=[a])
+            d = workflow.add(LocalTask(scripts[3], processes=1), after=[b, c])
+            workflow.run()
+        with open('order.txt', 'r') as f:
+            order = f.read().split()
+        pytest.helpers.unlink(['order.txt'] + [p for task in (a, b, c, d) for p in task.script + task.log])
+        assert order[0] == '0'
+        assert sorted(order[1:]) == ['1', '2']
+        assert list(workflow.status.values()) == ['done', 'done', 'failed', 'skipped']
+
+    @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+    def test_6(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        cache = ExecutionCache(os.path.join(directory, 'cache'))
+        scripts = []
+        for i in range(2):
+            script = Script(directory=directory, prefix='workflow', stem=str(i), suffix='.sh')
+            script.append('echo {}'.format(i))
+            scripts.append(script)
+        with SchedulerSimulator('slurm', os.path.join(directory, 'state')) as simulator:
+            with Workflow() as workflow:
+                a = workflow.add(SlurmTask(scripts[0], directory=directory, cache=cache))
+                monkeypatch.setattr(a.status_broker, 'interval', 0.1)
+                workflow.run()
+                workflow.wait(interval=0.5, min_interval=0.1)
+            with Workflow() as workflow:
+                a = workflow.add(SlurmTask(scripts[0], directory=directory, cache=cache))
+                b = workflow.add(SlurmTask(scripts[1], directory=directory), after=[a])
+                workflow.run()
+                assert a.pid is None
+                assert b.dependency == []
+                workflow.wait(interval=0.5, min_interval=0.1)
+            assert list(workflow.status.values()) == ['done', 'done']
+            assert len(simulator.jobs) == 2
+            assert [r.exit_code for r in a.results + b.results] == [0, 0]
+        shutil.rmtree(directory)
+
+    @pytest.mark.skipif(pytest.on_windows, reason='Unavailable on Windows')
+    def test_7(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        scripts = []
+        for i in range(2):
+            script = Script(directory=directory, prefix='workflow', stem=str(i), suffix='.sh')
+            script.append('exit {}'.format(1 - i))
+            scripts.append(script)
+        with SchedulerSimulator('sge', os.path.join(directory, 'state')) as simulator:
+            with Workflow() as workflow:
+                a = workflow.add(SunGridEngineTask(scripts[0], directory=directory))
+                b = workflow.add(SunGridEngineTask(scripts[1], directory=directory), after=[a])
+                monkeypatch.setattr(a.status_broker, 'interval', 0.1)
+                workflow.run()
+                assert list(workflow.status.values()) == ['submitted', 'pending']
+                workflow.wait(interval=0.5, min_interval=0.1)
+                a.kill()
+            assert list(workflow.status.values()) == ['failed', 'skipped']
+            assert b.pid is None
+            assert len(simulator.jobs) == 1
+        shutil.rmtree(directory)
+
+    def test_8(self, monkeypatch):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(4)]
+        workflow = Workflow()
+        a = workflow.add(NoAccountingClusterTask(scripts[0]))
+        with pytest.raises(ValueError):
+            workflow.add(MockClusterTask(scripts[1]), after=[a])
+        b = workflow.add(MockClusterTask(scripts[2]))
+        c = workflow.add(MockClusterTask(scripts[3]), after=[b])
+        workflow.run()
+        a.running = b.running = b.accounted = False
+        workflow._update()
+        assert list(workflow.status.values()) == ['done', 'submitted', 'submitted']
+        monkeypatch.setattr('pyjob.workflow.ACCOUNTING_GRACE_PERIOD', 0)
+        workflow.wait(min_interval=0.01)
+        assert list(workflow.status.values()) == ['done', 'failed', 'skipped']
+        assert c.killed
+        pytest.helpers.unlink([s.path for s in scripts[:1] + scripts[2:]])
+
+    def test_9(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(2)]
+        workflow = Workflow()
+        a = workflow.add(NoAccountingClusterTask(scripts[0]))
+        b = workflow.add(NoAccountingClusterTask(scripts[1]), after=[a])
+        workflow.run()
+        assert b.dependency == [a.pid]
+        workflow.wait(min_interval=0.01, monitor_f=lambda: [setattr(t, 'running', False) for t in workflow])
+        assert list(workflow.status.values()) == ['done', 'done']
+        pytest.helpers.unlink([s.path for s in scripts])
+
+    def test_10(self):
+        scripts = [pytest.helpers.get_py_script(i, 1) for i in range(2)]
+        workflow = Workflow()
+        a = workflow.add(MockClusterTask(scripts[0]))
+        workflow.add(LocalTask([scripts[1]]), after=[a])
+        workflow.run()
+        a.running = False
+        a.accounted = False
+        assert not workflow._update()
+        assert list(workflow.status.values()) == ['submitted', 'pending']
+        a.accounted = True
+        assert workflow._update()
+        assert list(workflow.status.values()) == ['done', 'pending']
+        pytest.helpers.unlink([s.path for s in scripts])
@@ -29,4 +29,12 @@ from pyjob.pbs import PortableBatchSystemTask
 class TorqueTask(PortableBatchSystemTask):
     """TORQUE executable :obj:`~pyjob.task.Task`"""
 
-    pass
+    def _accounting_command(self):
+        """Utility method to create the accounting command for all array elements
+
+        Note
+        ----
+        TORQUE lists finished jobs for ``keep_completed`` seconds, its ``-x`` option requests XML output.
+
+        """
+        return ['qstat', '-f', '-t', str(self.pid)]
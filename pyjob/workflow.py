@@ -0,0 +1,334 @@
+# MIT License
+#
+# Copyright (c) 2017-18 Felix Simkovic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Module to run tasks with dependencies between them as a directed acyclic graph"""
+
+__author__ = 'Felix Simkovic'
+__version__ = '1.0'
+
+import collections
+import logging
+import threading
+import time
+
+from pyjob.local import LocalTask
+from pyjob.misc import ExponentialBackoff
+from pyjob.sge import SunGridEngineTask
+from pyjob.task import ClusterTask
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+SUBMITTED = 'submitted'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+FINAL_STATES = (DONE, FAILED, SKIPPED)
+
+# Seconds to wait for the accounting record of a completed task before it is considered failed
+ACCOUNTING_GRACE_PERIOD = 120
+
+
+class Workflow(object):
+    """Directed acyclic graph of :obj:`~pyjob.task.Task` instances
+
+    Every :obj:`~pyjob.task.Task` is submitted as soon as its dependencies allow. A
+    :obj:`~pyjob.task.ClusterTask` depending only on tasks of the same platform is
+    submitted immediately with a native scheduler dependency on their job identifiers,
+    any other :obj:`~pyjob.task.Task` is submitted once all its dependencies have
+    completed successfully. Tasks depending on a failed task are skipped.
+
+    Note
+    ----
+    :obj:`~pyjob.sge.SunGridEngineTask` instances are never chained, because ``-hold_jid``
+    releases a job whatever the exit status of its dependencies. They are submitted once
+    the accounting of their dependencies reports success.
+
+    Examples
+    --------
+
+    >>> from pyjob import TaskFactory
+    >>> from pyjob.workflow import Workflow
+    >>> with Workflow() as workflow:
+    ...     prepare = workflow.add(TaskFactory('slurm', prepare_script))
+    ...     simulate = [workflow.add(TaskFactory('slurm', s), after=[prepare]) for s in simulate_scripts]
+    ...     workflow.add(TaskFactory('local', analyse_script), after=simulate)
+    ...     workflow.run()
+    ...     workflow.wait()
+
+    """
+
+    def __init__(self):
+        """Instantiate a new :obj:`~pyjob.workflow.Workflow`"""
+        self._nodes = collections.OrderedDict()
+        self._event = threading.Event()
+
+    def __enter__(self):
+        """Contextmanager entry function
+
+        Note
+        ----
+        For further details see `PEP 343 <https://www.python.org/dev/peps/pep-0343/>`_.
+
+        """
+        return self
+
+    def __exit__(self, *exc):
+        """Contextmanager exit function
+
+        Note
+        ----
+        For further details see `PEP 343 <https://www.python.org/dev/peps/pep-0343/>`_.
+
+        """
+        self.close()
+
+    def __iter__(self):
+        """Iterator function"""
+        for task in self._nodes:
+            yield task
+
+    def __len__(self):
+        """Length function"""
+        return len(self._nodes)
+
+    def __repr__(self):
+        """Representation of the :obj:`~pyjob.workflow.Workflow`"""
+        counts = collections.Counter(node.state for node in self._nodes.values())
+        states = ' '.join('{}={}'.format(state, count) for state, count in sorted(counts.items()))
+        return '{}({})'.format(self.__class__.__name__, states)
+
+    @property
+    def completed(self):
+        """Boolean to indicate that no :obj:`~pyjob.task.Task` is pending or running"""
+        return all(node.state in FINAL_STATES for node in self._nodes.values())
+
+    @property
+    def status(self):
+        """The state of each :obj:`~pyjob.task.Task`
+
+        Note
+        ----
+        The states are ``pending``, ``submitted``, ``done``, ``failed`` and ``skipped``.
+
+        """
+        return collections.OrderedDict((task, node.state) for task, node in self._nodes.items())
+
+    def add(self, task, after=None):
+        """Add a :obj:`~pyjob.task.Task` to the :obj:`~pyjob.workflow.Workflow`
+
+        Parameters
+        ----------
+        task : :obj:`~pyjob.task.Task`
+           The :obj:`~pyjob.task.Task` to add
+        after : list, tuple, optional
+           The :obj:`~pyjob.task.Task` instances that need to complete successfully first
+
+        Returns
+        -------
+        :obj:`~pyjob.task.Task`
+           The added :obj:`~pyjob.task.Task`
+
+        Raises
+        ------
+        :exc:`ValueError`
+           :obj:`~pyjob.task.Task` already added
+        :exc:`ValueError`
+           Dependency not part of the :obj:`~pyjob.workflow.Workflow`
+        :exc:`ValueError`
+           Dependency cannot report its exit status and cannot be chained
+
+        Note
+        ----
+        Dependencies need to be added first, which guarantees that the graph has no cycles.
+        A :obj:`~pyjob.task.ClusterTask` without accounting can only be a dependency of tasks
+        the scheduler chains to it, because its success cannot be determined otherwise.
+
+        """
+        if task in self._nodes:
+            raise ValueError('Task already part of the workflow')
+        parents = []
+        for parent in after or []:
+            if parent not in self._nodes:
+                raise ValueError('Dependency not part of the workflow: {}'.format(parent))
+            if not _reports_exit_status(parent) and not _can_chain(task, parent):
+                raise ValueError('Dependency cannot report its exit status: {}'.format(parent))
+            parents.append(self._nodes[parent])
+        self._nodes[task] = _Node(task, parents)
+        return task
+
+    def close(self):
+        """Wait for the completion of the :obj:`~pyjob.workflow.Workflow` and close all submitted tasks"""
+        self.wait()
+        for node in self._nodes.values():
+            if node.state != PENDING and node.task.locked:
+                node.task.close()
+
+    def kill(self):
+        """Terminate all running :obj:`~pyjob.task.Task` instances and skip all pending ones"""
+        for node in self._nodes.values():
+            if node.state == SUBMITTED:
+                node.task.kill()
+                node.state = FAILED
+            elif node.state == PENDING:
+                node.state = SKIPPED
+
+    def run(self):
+        """Submit every :obj:`~pyjob.task.Task` whose dependencies allow it
+
+        Returns
+        -------
+        bool
+           Indicate if any :obj:`~pyjob.task.Task` changed its state
+
+        """
+        changed = False
+        for node in self._nodes.values():
+            if node.state != PENDING:
+                continue
+            if any(parent.state in (FAILED, SKIPPED) for parent in node.parents):
+                logger.debug('Skipping %s due to failed dependency', node.task)
+                node.state = SKIPPED
+                changed = True
+            elif all(parent.state == DONE or node.chains(parent) for parent in node.parents):
+                self._submit(node)
+                changed = True
+        return changed
+
+    def wait(self, interval=30, monitor_f=None, min_interval=0.5):
+        """Submit every :obj:`~pyjob.task.Task` once its dependencies allow it until all have completed
+
+        Parameters
+        ----------
+        interval : int, float, optional
+           The maximum interval to wait between checking (in seconds)
+        monitor_f : callable, optional
+           A :obj:`callable` that is regularly invoked
+        min_interval : int, float, optional
+           The initial interval to wait between checking (in seconds)
+
+        Note
+        ----
+        The interval between checks restarts from ``min_interval`` whenever a
+        :obj:`~pyjob.task.Task` changes its state. Completing :obj:`~pyjob.local.LocalTask`
+        instances end the current interval early. A completed :obj:`~pyjob.task.Task` whose
+        accounting reports no exit status within ``ACCOUNTING_GRACE_PERIOD`` seconds fails.
+
+        """
+        backoff = ExponentialBackoff(initial=min_interval, maximum=interval)
+        while True:
+            changed = self._update()
+            changed = self.run() or changed
+            if self.completed:
+                break
+            if changed:
+                backoff.reset()
+            if monitor_f:
+                monitor_f()
+            self._event.wait(next(backoff))
+            self._event.clear()
+
+    def _submit(self, node):
+        """Submit the :obj:`~pyjob.task.Task` of ``node``, chained to its running dependencies"""
+        pids = [parent.task.pid for parent in node.parents if node.chains(parent)]
+        if pids:
+            node.task.dependency = list(node.task.dependency) + pids
+        try:
+            node.task.run()
+        except Exception as e:
+            logger.warning('Submission of %s failed: %s', node.task, e)
+            node.state = FAILED
+            return
+        if node.task.pid is None:
+            # All scripts were restored from a cache or journal, nothing was submitted
+            logger.debug('Restored %s without submission', node.task)
+            node.state = DONE
+            return
+        node.state = SUBMITTED
+        if isinstance(node.task, LocalTask) and node.task._task_id is not None:
+            node.task.executor.add_done_callback(node.task._task_id, self._event.set)
+        logger.debug('Submitted %s [%s]', node.task, node.task.pid)
+
+    def _update(self):
+        """Record the outcome of all completed :obj:`~pyjob.task.Task` instances
+
+        Returns
+        -------
+        bool
+           Indicate if any :obj:`~pyjob.task.Task` changed its state
+
+        """
+        changed = False
+        for node in self._nodes.values():
+            if node.state != SUBMITTED:
+                continue
+            if any(parent.state in (FAILED, SKIPPED) for parent in node.parents):
+                # Chained jobs would otherwise wait for their failed dependency forever
+                logger.debug('Terminating %s due to failed dependency', node.task)
+                node.task.kill()
+                node.state = SKIPPED
+                changed = True
+            elif node.task.completed:
+                results = node.task.results
+                failed = [result.error for result in results if result.error]
+                unaccounted = any(result.exit_code is None for result in results)
+                if not failed and unaccounted and _reports_exit_status(node.task):
+                    # Accounting records often appear after the job left the queue, but a
+                    # missing record must not release the dependent tasks
+                    if node.completed_at is None:
+                        node.completed_at = time.monotonic()
+                    if time.monotonic() - node.completed_at < ACCOUNTING_GRACE_PERIOD:
+                        continue
+                    failed = ['Exit status unavailable']
+                node.state = FAILED if failed else DONE
+                if failed:
+                    logger.warning('%s failed: %s', node.task, failed[0])
+                changed = True
+        return changed
+
+
+class _Node(object):
+    """Bookkeeping for a :obj:`~pyjob.task.Task` in a :obj:`~pyjob.workflow.Workflow`"""
+
+    def __init__(self, task, parents):
+        self.task = task
+        self.parents = parents
+        self.state = PENDING
+        self.completed_at = None
+
+    def chains(self, parent):
+        """Boolean to indicate that the scheduler can hold this node until ``parent`` completes"""
+        return parent.state == SUBMITTED and parent.task.pid is not None and _can_chain(self.task, parent.task)
+
+
+def _can_chain(task, parent):
+    """Boolean to indicate that the scheduler of ``task`` can hold it until ``parent`` completes successfully"""
+    return (
+        isinstance(task, ClusterTask) and
+        not isinstance(task, SunGridEngineTask) and
+        type(task) is type(parent)
+    )
+
+
+def _reports_exit_status(task):
+    """Boolean to indicate that the exit status of ``task`` is available after its completion"""
+    return not isinstance(task, ClusterTask) or task._accounting_command() is not None
@@ -55,12 +55,16 @@ CLASSIFIERS = [
     "Intended Audience :: Developers",
     "Intended Audience :: Science/Research",
     "Programming Language :: Python",
-    "Programming Language :: Python :: 2.7",
-    "Programming Language :: Python :: 3.5",
+    "Programming Language :: Python :: 3",
     "Programming Language :: Python :: 3.6",
     "Programming Language :: Python :: 3.7",
+    "Programming Language :: Python :: 3.8",
+    "Programming Language :: Python :: 3.9",
+    "Programming Language :: Python :: 3.10",
+    "Programming Language :: Python :: 3.11",
 ]
 
+PYTHON_REQUIRES = '>=3.6'
 ENTRY_POINTS = {'console_scripts': ['pyjob = pyjob.__main__:main']}
 SETUP_REQUIRES = ['pytest-runner']
 TESTS_REQUIRE = [
@@ -83,6 +87,7 @@ setup(
     version=VERSION,
     url=URL,
     packages=PACKAGES,
+    python_requires=PYTHON_REQUIRES,
     package_dir={PACKAGE_NAME: PACKAGE_DIR},
     classifiers=CLASSIFIERS,
     install_requires=dependencies(),